@@ -9,22 +9,30 @@
 
 from typing import Annotated, Any
 
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 
 
 from dotenv import load_dotenv
-import os
-from langchain_openai import ChatOpenAI
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 使 examples/common 可导入
+from common.context import ContextCompactor
+from common.llm import create_chat_model
+from common.llm_cache import get_llm_cache
+from common.streaming import TokenStream, summarize_timings
 load_dotenv()
 
 provider = "WILDCARD"
 model = "gpt-5-mini"
-base_url = os.environ[f"{provider}_BASE_URL"]
-api_key = os.environ[f"{provider}_API_KEY"]
-model = ChatOpenAI(model=model, base_url=base_url, api_key=api_key)
+model = create_chat_model(provider, model)
+
+# 历史消息压缩 (见 common/context.py): 上下文超过 MAX_CONTEXT_TOKENS 时, 把最早的若干轮合并进摘要
+SYSTEM_PROMPT = "你是一个乐于助人的助手, 回答简洁准确."
+MAX_CONTEXT_TOKENS = 2000
+compactor = ContextCompactor(max_tokens=MAX_CONTEXT_TOKENS, system_prompt=SYSTEM_PROMPT, summarizer=model)
 
 
 # 用户输入
@@ -46,18 +54,31 @@ class State(TypedDict):
     # state["messages"] = add_message(state["messages"], node_output["messages"])
     # 之前的例子都没有做类似的标识, 所以默认是用节点返回的值覆盖相应的字段
     messages: Annotated[list, add_messages]
+    # 被压缩掉的早期对话的摘要
+    summary: NotRequired[str]
+
+
+def compact_history(state: State):
+    return compactor.compact(state["messages"], state.get("summary", ""))
 
 
 def chatbot(state: State):
-    return {"messages": [model.invoke(state["messages"])]}
+    prompt = compactor.build_prompt(state["messages"], state.get("summary", ""))
+    return {"messages": [model.invoke(prompt)]}
 
 graph_builder = StateGraph(State)
+graph_builder.add_node("compact_history", compact_history)
 graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_edge(START, "chatbot")
+graph_builder.add_edge(START, "compact_history")
+graph_builder.add_edge("compact_history", "chatbot")
 graph_builder.add_edge("chatbot", END)
 graph = graph_builder.compile()
 
 
+# 每轮回复的首 token 耗时等
+timings = []
+
+
 def stream_graph_updates(state, user_input: str):
     """
     state: 当前状态(上一轮 graph.stream 返回的结果)
@@ -67,20 +88,24 @@ def stream_graph_updates(state, user_input: str):
     # (1) "前一轮的状态 + 当前的用户输入" 得到本轮的输入
     # (2) graph.invoke/stream 得到本轮的输出
 
-    # STEP 1: 根据本轮输入更新状态
-    if not state.get("messages"):
-        state["messages"] = []
-    state["messages"].append({"role": "user", "content": user_input})
-    
-    # STEP 2: graph.invoke/stream 得到本轮的输出
-    for event in graph.stream(
-        state,
-        stream_mode="values"
-    ):
-        print(render_green(event["messages"][-1].content))
-        # print(render_green(event))
+    # STEP 1: 根据本轮输入更新状态 (add_messages 会给消息分配 id, 压缩历史时按 id 删除)
+    state["messages"] = add_messages(state.get("messages", []), [{"role": "user", "content": user_input}])
+
+    # STEP 2: graph.stream 逐 token 输出本轮回复 (见 common/streaming.py),
+    # 不再用 stream_mode="values" 每步拿一份完整的 state, 而是把各节点返回的增量合并回本地的 state
+    stream = TokenStream(graph, state, nodes={"chatbot"})
+    for token in stream:
+        print(render_green(token), end="", flush=True)
+    print()
+    for _, update in stream.updates:
+        if "messages" in update:
+            state["messages"] = add_messages(state["messages"], update["messages"])
+        if "summary" in update:
+            state["summary"] = update["summary"]
 
-    return event
+    timings.append(stream.timing)
+    print(render_red(stream.timing))
+    return state
 
 
 if __name__ == "__main__":
@@ -91,6 +116,9 @@ if __name__ == "__main__":
         user_input = input(render_yellow("User: "))
         if user_input.lower() in ["quit", "exit", "q"]:
             print("Goodbye!")
+            print(summarize_timings(timings))
+            if (cache := get_llm_cache()) is not None:
+                print(cache.stats)
             break
         # old_state + user_input -> new_state
         state = stream_graph_updates(state, user_input)
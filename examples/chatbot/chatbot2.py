@@ -4,23 +4,31 @@
 
 from typing import Annotated, Any
 
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import InMemorySaver
 
 
 from dotenv import load_dotenv
-import os
-from langchain_openai import ChatOpenAI
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 使 examples/common 可导入
+from common.context import ContextCompactor
+from common.llm import create_chat_model
+from common.checkpointer import get_checkpointer
+from common.llm_cache import get_llm_cache
+from common.streaming import TokenStream, summarize_timings
 load_dotenv()
 
 provider = "WILDCARD"
 model = "gpt-5-mini"
-base_url = os.environ[f"{provider}_BASE_URL"]
-api_key = os.environ[f"{provider}_API_KEY"]
-model = ChatOpenAI(model=model, base_url=base_url, api_key=api_key)
+model = create_chat_model(provider, model)
+
+# 历史消息压缩 (见 common/context.py): 上下文超过 MAX_CONTEXT_TOKENS 时, 把最早的若干轮合并进摘要
+SYSTEM_PROMPT = "你是一个乐于助人的助手, 回答简洁准确."
+MAX_CONTEXT_TOKENS = 2000
+compactor = ContextCompactor(max_tokens=MAX_CONTEXT_TOKENS, system_prompt=SYSTEM_PROMPT, summarizer=model)
 
 
 # 用户输入
@@ -38,33 +46,45 @@ def render_green(input: Any) -> str:
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
+    summary: NotRequired[str]  # 被压缩掉的早期对话的摘要
+
+
+def compact_history(state: State):
+    return compactor.compact(state["messages"], state.get("summary", ""))
 
 
 def chatbot(state: State):
-    return {"messages": [model.invoke(state["messages"])]}
+    prompt = compactor.build_prompt(state["messages"], state.get("summary", ""))
+    return {"messages": [model.invoke(prompt)]}
 
 graph_builder = StateGraph(State)
+graph_builder.add_node("compact_history", compact_history)
 graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_edge(START, "chatbot")
+graph_builder.add_edge(START, "compact_history")
+graph_builder.add_edge("compact_history", "chatbot")
 graph_builder.add_edge("chatbot", END)
-graph = graph_builder.compile(checkpointer=InMemorySaver())
+# 会话持久化到 SQLite, 重启后可以继续之前的对话 (见 common/checkpointer.py)
+graph = graph_builder.compile(checkpointer=get_checkpointer())
+
+
+# 每轮回复的首 token 耗时等
+timings = []
 
 
 # 使用checkpoint之后, 无需再手动维护 state 变量
+# 逐 token 输出 chatbot 节点的回复 (见 common/streaming.py), 摘要等其他 LLM 调用的 token 不输出
 def stream_graph_updates(user_input: str, config):
     """
     user_input: 本轮用户输入
     """
-    for event in graph.stream(
-        {"messages": [{"role": "user", "content": user_input}]},
-        config,
-        stream_mode="values"
-    ):
-        print(render_green(event["messages"][-1].content))
-        # print(render_green(event))
+    stream = TokenStream(graph, {"messages": [{"role": "user", "content": user_input}]}, config, nodes={"chatbot"})
+    for token in stream:
+        print(render_green(token), end="", flush=True)
+    print()
 
-    print(render_red(event))
-    return event
+    timings.append(stream.timing)
+    print(render_red(stream.timing))
+    return stream.timing
 
 
 if __name__ == "__main__":
@@ -74,6 +94,9 @@ if __name__ == "__main__":
         user_input = input(render_yellow("User: "))
         if user_input.lower() in ["quit", "exit", "q"]:
             print("Goodbye!")
+            print(summarize_timings(timings))
+            if (cache := get_llm_cache()) is not None:
+                print(cache.stats)
             break
         stream_graph_updates(user_input, config)
 
@@ -0,0 +1,106 @@
+"""checkpointer 基准测试: 大量会话下的内存占用与会话恢复耗时
+
+使用 chatbot2 的 graph, LLM 为零延迟的 mock 模型 (common/mock_llm.py), 依次创建 --threads 个会话,
+每个会话进行 --turns 轮对话, 期间记录 RSS; 之后随机抽取会话, 测量恢复 (graph.get_state) 的耗时:
+- hot: 刚刚访问过, 在 LRU 中
+- cold: 不在 LRU 中, 需要从 SQLite 读取
+
+用法:
+    python examples/chatbot/checkpoint_benchmark.py --threads 100000 --turns 2
+    python examples/chatbot/checkpoint_benchmark.py --saver memory --threads 20000   # 对比 InMemorySaver
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _rss_mb() -> float:
+    # 当前 RSS, 读 /proc; 其他平台退回峰值 RSS
+    try:
+        with open("/proc/self/statm") as fr:
+            return int(fr.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def _percentiles(values: list[float]) -> str:
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return f"p50 {q[49]:.0f} us, p99 {q[98]:.0f} us, max {max(values):.0f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=100_000)
+    parser.add_argument("--turns", type=int, default=2, help="每个会话的对话轮数")
+    parser.add_argument("--samples", type=int, default=2000, help="测量恢复耗时的抽样次数")
+    parser.add_argument("--saver", choices=["sqlite", "memory"], default="sqlite")
+    parser.add_argument("--path", help="SQLite 文件路径, 默认为临时目录")
+    parser.add_argument("--hot-threads", type=int, default=1024)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    path = args.path or str(Path(tmpdir.name) / "checkpoints.sqlite")
+    # 必须在 import chatbot2 之前设置
+    os.environ.update(
+        LLM_BACKEND="mock",
+        LLM_CACHE="false",
+        LLM_MOCK_LATENCY="0",
+        LLM_MOCK_JITTER="0",
+        LLM_MOCK_TOKENS_PER_SECOND="",
+        CHECKPOINTER=args.saver,
+        CHECKPOINT_PATH=path,
+        CHECKPOINT_HOT_THREADS=str(args.hot_threads),
+    )
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from chatbot2 import graph
+
+    def config(i: int) -> dict:
+        return {"configurable": {"thread_id": f"bench-{i}"}}
+
+    rss_start = _rss_mb()
+    print(f"{'threads':>9} {'rss MB':>8} {'turns/s':>9}")
+    report_every = max(1, args.threads // 10)
+    start = last = time.perf_counter()
+    for i in range(args.threads):
+        for turn in range(args.turns):
+            graph.invoke({"messages": [{"role": "user", "content": f"你好, 这是第 {turn} 轮"}]}, config(i))
+        if (i + 1) % report_every == 0:
+            now = time.perf_counter()
+            print(f"{i + 1:>9} {_rss_mb():>8.1f} {report_every * args.turns / (now - last):>9.0f}")
+            last = now
+    elapsed = time.perf_counter() - start
+    print(f"\n{args.threads * args.turns} turns in {elapsed:.1f}s, rss {rss_start:.1f} -> {_rss_mb():.1f} MB")
+    if args.saver == "sqlite":
+        size = sum(p.stat().st_size for p in Path(path).parent.glob(Path(path).name + "*"))
+        print(f"database: {size / 2**20:.1f} MB")
+
+    rng = random.Random(0)
+    samples = [rng.randrange(args.threads) for _ in range(args.samples)]
+    for label, warm in [("cold", False), ("hot", True)]:
+        latencies = []
+        for i in samples:
+            if warm:
+                graph.get_state(config(i))
+            t0 = time.perf_counter()
+            state = graph.get_state(config(i))
+            latencies.append((time.perf_counter() - t0) * 1e6)
+            assert len(state.values["messages"]) == 2 * args.turns
+        print(f"resume ({label}): {_percentiles(latencies)}")
+
+    checkpointer = graph.checkpointer
+    if hasattr(checkpointer, "stats"):
+        print(checkpointer.stats)
+        checkpointer.close()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
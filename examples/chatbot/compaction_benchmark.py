@@ -0,0 +1,72 @@
+"""历史消息压缩的基准测试: 长对话中每轮的耗时与 prompt token 数
+
+使用 chatbot2 的 graph, LLM 为零延迟的 mock 模型, 同一个会话连续进行 --turns 轮对话,
+分别在开启/关闭压缩 (common/context.py) 时统计每 --window 轮的:
+- 平均每轮耗时 (graph.invoke, 即 langgraph + checkpointer 的开销)
+- 平均 prompt token 数 (发给模型的上下文)
+- state 中的消息条数
+
+用法:
+    python examples/chatbot/compaction_benchmark.py --turns 500
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def run(graph, compactor, turns: int, window: int, thread_id: str) -> None:
+    config = {"configurable": {"thread_id": thread_id}}
+    print(f"{'turns':>11} {'ms/turn':>8} {'prompt tokens':>14} {'messages':>9}")
+    latencies, prompt_tokens = [], []
+    for turn in range(1, turns + 1):
+        user_input = f"第 {turn} 轮: 请帮我记住这个数字 {turn * 7919 % 10007}, 并简单解释一下它有什么特别之处。"
+        start = time.perf_counter()
+        state = graph.invoke({"messages": [{"role": "user", "content": user_input}]}, config)
+        latencies.append((time.perf_counter() - start) * 1e3)
+        # 本轮发给模型的上下文 = 除最新回复外的所有消息 + system prompt/摘要
+        prompt_tokens.append(compactor.context_tokens(state["messages"][:-1], state.get("summary", "")))
+        if turn % window == 0:
+            print(
+                f"{turn - window + 1:>5}-{turn:<5} {statistics.mean(latencies):>8.2f} "
+                f"{statistics.mean(prompt_tokens):>14.0f} {len(state['messages']):>9}"
+            )
+            latencies, prompt_tokens = [], []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--window", type=int, default=100)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    # 必须在 import chatbot2 之前设置
+    os.environ.update(
+        LLM_BACKEND="mock",
+        LLM_CACHE="false",
+        LLM_MOCK_LATENCY="0",
+        LLM_MOCK_JITTER="0",
+        LLM_MOCK_TOKENS_PER_SECOND="",
+        CHECKPOINT_PATH=str(Path(tmpdir.name) / "checkpoints.sqlite"),
+    )
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import chatbot2
+
+    compactor = chatbot2.compactor
+    print(f"== 开启压缩 (max_tokens={compactor.max_tokens}, target_tokens={compactor.target_tokens}) ==")
+    run(chatbot2.graph, compactor, args.turns, args.window, "with-compaction")
+    print(f"压缩 {compactor.compactions} 次\n")
+
+    compactor.max_tokens = float("inf")
+    print("== 关闭压缩 ==")
+    run(chatbot2.graph, compactor, args.turns, args.window, "without-compaction")
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
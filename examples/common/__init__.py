@@ -0,0 +1,7 @@
+"""examples 下各示例共用的工具代码
+
+示例脚本以 `python examples/xxx/graph.py` 的方式运行, 需要先把 examples 目录加入 sys.path:
+
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    from common.llm_cache import get_llm_cache
+"""
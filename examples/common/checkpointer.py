@@ -0,0 +1,693 @@
+"""持久化的 langgraph checkpointer: SQLite (WAL) + 热点会话的内存 LRU
+
+用来替代 `InMemorySaver`. 后者把所有会话的每一步都放在内存里, 进程重启即丢失, 内存随会话数无限增长.
+
+用法:
+    graph = builder.compile(checkpointer=get_checkpointer())
+
+存储:
+- 三张表 checkpoints / blobs / writes, 与官方 saver 的布局相同: checkpoint 本身只保存各 channel 的版本号,
+  channel 的值按 (channel, version) 单独存放, 因此只有本步更新过的 channel 会写入新的 blob
+- 消息增量: `messages` 这类 list channel 每轮只是在末尾追加几条消息, 但完整保存时每步都要重新序列化整个历史,
+  n 轮对话总写入量为 O(n^2). 这里如果新值以父 checkpoint 中的旧值为前缀, 只保存追加的部分 (delta) 及其基准版本;
+  读取时用一条递归 CTE 沿基准链取回所有片段拼接. 每 `snapshot_every` 个 delta 保存一次完整值, 限制链长.
+  消息被替换/删除 (add_messages 的同 id 替换, RemoveMessage) 时不满足前缀条件, 自动退回完整保存.
+  只有元素全是消息 (BaseMessage) 的 list 才保存 delta: 父 checkpoint 的旧值与节点拿到的是同一批对象,
+  节点原地修改其中的 dict 等元素后前缀比较仍然成立, 却没有写入数据库; 消息按 add_messages 的约定不原地修改
+
+连接与写入:
+- WAL 模式, 读写互不阻塞. 读使用一个小连接池, 写由单独的后台线程负责
+- 组提交 (group commit): 写线程把队列中所有待写的操作合并到一个事务中提交, 并发会话越多, 每个事务合并的写入越多;
+  调用方等待自己的写入提交后才返回, 因此不会因批量写入丢失数据
+
+热点会话:
+- LRU 中保存最近使用的 `max_hot_threads` 个会话的最新 checkpoint (已反序列化的值, pending writes),
+  恢复这些会话时不访问数据库; 新写入的 delta 也直接与这里的旧值比较前缀, 无需读库
+- 冷会话的恢复是按主键的 2~3 次查询, 内存占用只与 LRU 大小有关, 与会话总数无关
+- 假设同一个数据库文件只由一个进程写入 (LRU 以自己写入的为准)
+- 数据库文件与写线程在第一次读写时才打开/启动, 导入示例模块 (在模块级 compile) 没有副作用
+
+环境变量 (见 .env.example):
+- CHECKPOINTER: sqlite (默认) 或 memory (使用 InMemorySaver)
+- CHECKPOINT_PATH: SQLite 文件路径, 默认 .cache/checkpoints.sqlite
+- CHECKPOINT_HOT_THREADS: 热点会话 LRU 的大小
+"""
+
+import asyncio
+import operator
+import os
+import queue
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    base_version TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+# 从指定版本出发, 沿 base_version 取回 delta 链上的所有片段 (最新的在前, 最后一条是完整值)
+_BLOB_CHAIN_SQL = """
+WITH RECURSIVE chain(type, value, base_version) AS (
+    SELECT type, value, base_version FROM blobs
+    WHERE thread_id = ?1 AND checkpoint_ns = ?2 AND channel = ?3 AND version = ?4
+    UNION ALL
+    SELECT b.type, b.value, b.base_version FROM blobs b JOIN chain c
+    ON b.thread_id = ?1 AND b.checkpoint_ns = ?2 AND b.channel = ?3 AND b.version = c.base_version
+)
+SELECT type, value FROM chain
+"""
+
+_DELTA_PREFIX = "delta:"
+
+
+def _is_prefix(old: list, new: list) -> bool:
+    """new 是否以 old 为前缀; 只用于消息列表 (元素不会被原地修改)"""
+    if len(old) > len(new):
+        return False
+    # add_messages 返回的新列表复用了原有的消息对象, 绝大多数情况下 is 比较即可
+    if all(map(operator.is_, old, new)):
+        return True
+    return old == new[: len(old)]
+
+
+@dataclass
+class _HotCheckpoint:
+    """某个会话 (thread_id, checkpoint_ns) 的最新 checkpoint, 值均已反序列化"""
+
+    checkpoint_id: str
+    parent_checkpoint_id: str | None
+    checkpoint: Checkpoint  # 不含 channel_values
+    metadata: CheckpointMetadata
+    values: dict[str, Any]
+    # channel -> (version, 该版本距离最近一次完整保存的 delta 数)
+    blobs: dict[str, tuple[str, int]]
+    # (task_id, idx) -> (task_id, channel, value, task_path)
+    writes: dict[tuple[str, int], tuple[str, str, Any, str]] = field(default_factory=dict)
+
+
+@dataclass
+class CheckpointerStats:
+    hot_hits: int = 0
+    cold_loads: int = 0
+    full_blobs: int = 0
+    delta_blobs: int = 0
+    commits: int = 0
+    committed_ops: int = 0
+
+    def __str__(self) -> str:
+        per_commit = self.committed_ops / self.commits if self.commits else 0.0
+        return (
+            f"checkpointer: {self.hot_hits} hot hits, {self.cold_loads} cold loads, "
+            f"blobs full={self.full_blobs} delta={self.delta_blobs}, "
+            f"{self.commits} commits ({per_commit:.1f} ops/commit)"
+        )
+
+
+class _GroupCommitWriter(threading.Thread):
+    """后台写线程: 把队列里积压的写操作合并到一个事务中提交"""
+
+    def __init__(self, conn: sqlite3.Connection, stats: CheckpointerStats, max_batch: int):
+        super().__init__(name="checkpoint-writer", daemon=True)
+        self.conn = conn
+        self.stats = stats
+        self.max_batch = max_batch
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    def submit(self, ops: list[tuple[str, list[tuple]]]) -> Future:
+        future = Future()
+        self.queue.put((ops, future))
+        return future
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.join()
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                with self.conn:
+                    for ops, _ in batch:
+                        for sql, rows in ops:
+                            self.conn.executemany(sql, rows)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                self.stats.commits += 1
+                self.stats.committed_ops += len(batch)
+                for _, future in batch:
+                    future.set_result(None)
+            if stop:
+                return
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """SQLite 持久化 checkpointer, 接口与 `InMemorySaver` 相同
+
+    Args:
+        path: SQLite 文件路径
+        max_hot_threads: 内存中保留最新 checkpoint 的会话数
+        snapshot_every: list channel 连续保存多少个 delta 后保存一次完整值
+        pool_size: 读连接池大小
+        max_batch: 组提交时单个事务最多合并的写操作数
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_hot_threads: int = 1024,
+        snapshot_every: int = 32,
+        pool_size: int = 4,
+        max_batch: int = 256,
+        serde: SerializerProtocol | None = None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.max_hot_threads = max_hot_threads
+        self.snapshot_every = snapshot_every
+        self.stats = CheckpointerStats()
+        self.pool_size = pool_size
+        self.max_batch = max_batch
+        # 连接与写线程在第一次读写时由 _open 创建
+        self._writer: _GroupCommitWriter | None = None
+        self._readers: queue.SimpleQueue = queue.SimpleQueue()
+        self._open_lock = threading.Lock()
+
+        # thread_id -> {checkpoint_ns -> _HotCheckpoint}
+        self._hot: OrderedDict[str, dict[str, _HotCheckpoint]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _open(self) -> _GroupCommitWriter:
+        with self._open_lock:
+            if self._writer is None:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                writer_conn = self._connect()
+                writer_conn.executescript(_SCHEMA)
+                writer_conn.commit()
+                for _ in range(self.pool_size):
+                    self._readers.put(self._connect())
+                writer = _GroupCommitWriter(writer_conn, self.stats, self.max_batch)
+                writer.start()
+                self._writer = writer
+            return self._writer
+
+    def _submit(self, ops: list[tuple[str, list[tuple]]]) -> None:
+        """提交写操作, 等待所在的事务提交后返回"""
+        self._open().submit(ops).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 下 NORMAL 只在断电时可能丢失最近的事务, 不会损坏数据库
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.isolation_level = "DEFERRED"
+        return conn
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        self._open()
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def close(self) -> None:
+        with self._open_lock:
+            writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        writer.close()
+        writer.conn.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self) -> "SQLiteCheckpointer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ---------------- 热点会话 LRU ----------------
+
+    def _get_hot(self, thread_id: str, checkpoint_ns: str) -> _HotCheckpoint | None:
+        with self._lock:
+            entries = self._hot.get(thread_id)
+            if entries is None or checkpoint_ns not in entries:
+                return None
+            self._hot.move_to_end(thread_id)
+            return entries[checkpoint_ns]
+
+    def _set_hot(self, thread_id: str, checkpoint_ns: str, hot: _HotCheckpoint) -> None:
+        with self._lock:
+            self._hot.setdefault(thread_id, {})[checkpoint_ns] = hot
+            self._hot.move_to_end(thread_id)
+            while len(self._hot) > self.max_hot_threads:
+                self._hot.popitem(last=False)
+
+    def _hot_tuple(self, thread_id: str, checkpoint_ns: str, hot: _HotCheckpoint) -> CheckpointTuple:
+        # 返回副本, 调用方对列表的修改不影响缓存
+        values = {k: list(v) if type(v) is list else v for k, v in hot.values.items()}
+        writes = [hot.writes[k] for k in sorted(hot.writes, key=lambda k: writes_sort_key(hot.writes[k][3], *k))]
+        return CheckpointTuple(
+            config=self._config(thread_id, checkpoint_ns, hot.checkpoint_id),
+            checkpoint={**hot.checkpoint, "channel_values": values},
+            metadata=hot.metadata,
+            parent_config=(
+                self._config(thread_id, checkpoint_ns, hot.parent_checkpoint_id)
+                if hot.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, value) for task_id, channel, value, _ in writes],
+        )
+
+    @staticmethod
+    def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    # ---------------- 读取 ----------------
+
+    def _load_blob(
+        self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, channel: str, version: str
+    ) -> tuple[Any, int] | None:
+        """返回 (值, delta 链长度), 没有值时返回 None"""
+        rows = conn.execute(_BLOB_CHAIN_SQL, (thread_id, checkpoint_ns, channel, version)).fetchall()
+        if not rows or rows[-1][0] == "empty":
+            return None
+        value = self.serde.loads_typed(rows[-1])
+        for type_, data in reversed(rows[:-1]):
+            value.extend(self.serde.loads_typed((type_[len(_DELTA_PREFIX):], data)))
+        return value, len(rows) - 1
+
+    def _load_tuple(
+        self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, row: tuple
+    ) -> tuple[CheckpointTuple, _HotCheckpoint]:
+        checkpoint_id, parent_checkpoint_id, type_, data, metadata_type, metadata_data = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, data))
+        metadata = self.serde.loads_typed((metadata_type, metadata_data))
+        values, blobs = {}, {}
+        for channel, version in checkpoint["channel_versions"].items():
+            loaded = self._load_blob(conn, thread_id, checkpoint_ns, channel, str(version))
+            if loaded is not None:
+                values[channel] = loaded[0]
+                blobs[channel] = (str(version), loaded[1])
+        writes = {}
+        for task_id, idx, channel, w_type, w_data, task_path in conn.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ):
+            writes[(task_id, idx)] = (task_id, channel, self.serde.loads_typed((w_type, w_data)), task_path)
+        hot = _HotCheckpoint(checkpoint_id, parent_checkpoint_id, checkpoint, metadata, values, blobs, writes)
+        return self._hot_tuple(thread_id, checkpoint_ns, hot), hot
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        hot = self._get_hot(thread_id, checkpoint_ns)
+        if hot is not None and checkpoint_id in (None, hot.checkpoint_id):
+            self.stats.hot_hits += 1
+            return self._hot_tuple(thread_id, checkpoint_ns, hot)
+
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._reader() as conn:
+            if checkpoint_id:
+                row = conn.execute(
+                    f"SELECT {columns} FROM checkpoints"
+                    " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            self.stats.cold_loads += 1
+            result, loaded = self._load_tuple(conn, thread_id, checkpoint_ns, row)
+        # 只缓存最新的 checkpoint; 指定了历史 checkpoint_id 时 (time travel) 不进入 LRU
+        if not checkpoint_id:
+            self._set_hot(thread_id, checkpoint_ns, loaded)
+        return result
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        conditions, params = [], []
+        if config:
+            conditions.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                conditions.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,"
+            f" metadata_type, metadata FROM checkpoints {where} ORDER BY checkpoint_id DESC"
+        )
+        with self._reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and limit <= 0:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[4], row[5]))
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                if limit is not None:
+                    limit -= 1
+                yield self._load_tuple(conn, thread_id, checkpoint_ns, tuple(row))[0]
+
+    # ---------------- 写入 ----------------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        parent_checkpoint_id = config["configurable"].get("checkpoint_id")
+        c = checkpoint.copy()
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        metadata = get_checkpoint_metadata(config, metadata)
+
+        parent = self._get_hot(thread_id, checkpoint_ns)
+        if parent is not None and parent.checkpoint_id != parent_checkpoint_id:
+            parent = None  # 从历史 checkpoint 分叉, 没有可比较的旧值
+        blobs = dict(parent.blobs) if parent else {}
+        blob_rows = []
+        for channel, version in new_versions.items():
+            version = str(version)
+            if channel not in values:
+                blob_rows.append((thread_id, checkpoint_ns, channel, version, "empty", b"", None))
+                blobs.pop(channel, None)
+                continue
+            value = values[channel]
+            base = parent.blobs.get(channel) if parent else None
+            if (
+                base is not None
+                and type(value) is list
+                and type(old := parent.values.get(channel)) is list
+                and base[1] < self.snapshot_every
+                and all(isinstance(m, BaseMessage) for m in value)
+                and _is_prefix(old, value)
+            ):
+                type_, data = self.serde.dumps_typed(value[len(old):])
+                blob_rows.append(
+                    (thread_id, checkpoint_ns, channel, version, _DELTA_PREFIX + type_, data, base[0])
+                )
+                blobs[channel] = (version, base[1] + 1)
+                self.stats.delta_blobs += 1
+            else:
+                type_, data = self.serde.dumps_typed(value)
+                blob_rows.append((thread_id, checkpoint_ns, channel, version, type_, data, None))
+                blobs[channel] = (version, 0)
+                self.stats.full_blobs += 1
+        # 父 checkpoint 不在内存中时, 未更新的 channel 不知道 delta 链长度, 视为已满, 下次更新时完整保存
+        for channel, version in c["channel_versions"].items():
+            if channel in values and channel not in blobs:
+                blobs[channel] = (str(version), self.snapshot_every)
+
+        type_, data = self.serde.dumps_typed(c)
+        metadata_type, metadata_data = self.serde.dumps_typed(metadata)
+        ops = [
+            (
+                "INSERT OR REPLACE INTO blobs"
+                " (thread_id, checkpoint_ns, channel, version, type, value, base_version)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                blob_rows,
+            ),
+            (
+                "INSERT OR REPLACE INTO checkpoints"
+                " (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,"
+                " type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(thread_id, checkpoint_ns, checkpoint["id"], parent_checkpoint_id,
+                  type_, data, metadata_type, metadata_data)],
+            ),
+        ]
+        self._submit(ops)
+        hot_values = {k: list(v) if type(v) is list else v for k, v in values.items()}
+        self._set_hot(
+            thread_id,
+            checkpoint_ns,
+            _HotCheckpoint(checkpoint["id"], parent_checkpoint_id, c, metadata, hot_values, blobs),
+        )
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        hot = self._get_hot(thread_id, checkpoint_ns)
+        if hot is not None and hot.checkpoint_id != checkpoint_id:
+            hot = None
+        # 与官方 saver 一致: 普通写入 (idx >= 0) 重复提交时保留第一次, 特殊写入 (错误, 中断等) 覆盖
+        upsert, insert = [], []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, data = self.serde.dumps_typed(value)
+            row = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, data, task_path)
+            (insert if idx >= 0 else upsert).append(row)
+            if hot is not None and (idx < 0 or (task_id, idx) not in hot.writes):
+                hot.writes[(task_id, idx)] = (task_id, channel, value, task_path)
+        columns = "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path)"
+        ops = [
+            (f"INSERT OR IGNORE INTO writes {columns} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", insert),
+            (f"INSERT OR REPLACE INTO writes {columns} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", upsert),
+        ]
+        self._submit([op for op in ops if op[1]])
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._hot.pop(thread_id, None)
+        ops = [
+            (f"DELETE FROM {table} WHERE thread_id = ?", [(thread_id,)])
+            for table in ("checkpoints", "blobs", "writes")
+        ]
+        self._submit(ops)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # 与 InMemorySaver 相同: 递增的整数 + 随机后缀, 按字符串比较即可排序
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ---------------- async: 放到线程池中执行, 不阻塞事件循环 ----------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: [*self.list(config, filter=filter, before=before, limit=limit)]
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_default_checkpointer: BaseCheckpointSaver | None = None
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """根据环境变量返回进程内共享的 checkpointer
+
+    用法:
+        graph = builder.compile(checkpointer=get_checkpointer())
+    """
+    global _default_checkpointer
+    if _default_checkpointer is None:
+        if os.environ.get("CHECKPOINTER", "sqlite").lower() == "memory":
+            _default_checkpointer = InMemorySaver()
+        else:
+            _default_checkpointer = SQLiteCheckpointer(
+                os.environ.get("CHECKPOINT_PATH") or ".cache/checkpoints.sqlite",
+                max_hot_threads=int(os.environ.get("CHECKPOINT_HOT_THREADS") or 1024),
+            )
+    return _default_checkpointer
+
+
+def _self_check() -> None:
+    """冷恢复 (新的 checkpointer 实例从 SQLite 读取) 的状态与热点 LRU / InMemorySaver 一致:
+    节点原地修改 list channel 中的元素时不能只保存 (空的) delta; 消息列表仍按 delta 保存"""
+    import tempfile
+    from typing import Annotated, TypedDict
+
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langgraph.graph import END, START, StateGraph
+    from langgraph.graph.message import add_messages
+
+    class State(TypedDict):
+        history: Annotated[list, operator.add]
+        messages: Annotated[list, add_messages]
+
+    def attempt(state: State):
+        return {"history": [{"attempt": len(state["history"]) + 1}], "messages": [AIMessage("draft")]}
+
+    def validate(state: State):
+        state["history"][-1]["valid"] = True  # 原地修改, 只追加空列表
+        return {"history": [], "messages": [AIMessage("ok")]}
+
+    builder = StateGraph(State)
+    builder.add_node("attempt", attempt)
+    builder.add_node("validate", validate)
+    builder.add_edge(START, "attempt")
+    builder.add_edge("attempt", "validate")
+    builder.add_edge("validate", END)
+
+    config = {"configurable": {"thread_id": "self-check"}}
+    inputs = {"history": [], "messages": [HumanMessage("hi")]}
+    expected = builder.compile(checkpointer=InMemorySaver()).invoke(inputs, config)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "checkpoints.sqlite")
+        with SQLiteCheckpointer(path) as saver:
+            graph = builder.compile(checkpointer=saver)
+            graph.invoke(inputs, config, durability="sync")
+            graph.invoke({"history": [], "messages": [HumanMessage("again")]}, config, durability="sync")
+            hot = graph.get_state(config).values
+            assert saver.stats.delta_blobs > 0, saver.stats
+        with SQLiteCheckpointer(path) as saver:
+            cold = builder.compile(checkpointer=saver).get_state(config).values
+            assert saver.stats.cold_loads == 1, saver.stats
+    assert expected["history"] == [{"attempt": 1, "valid": True}], expected
+    assert cold["history"] == hot["history"] == [{"attempt": 1, "valid": True}, {"attempt": 2, "valid": True}], cold
+    assert [m.content for m in cold["messages"]] == [m.content for m in hot["messages"]], cold
+    print("checkpointer self-check passed")
+
+
+if __name__ == "__main__":
+    _self_check()
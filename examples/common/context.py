@@ -0,0 +1,175 @@
+"""对话历史压缩: 控制每轮发给模型的上下文长度
+
+chatbot 每轮都把完整的 messages 发给模型, prompt token、延迟、费用都随对话轮数线性增长,
+add_messages 每次合并也要扫描整个列表. `ContextCompactor` 作为 chatbot 节点之前的一个节点:
+
+- 用本地 tokenizer 统计 token 数 (优先 tiktoken, 没有或无法加载词表时退回 common/mock_llm.py 中的切分规则),
+  每条消息的 token 数按消息 id 缓存, 不会每轮重新计算
+- system prompt 固定在最前面, 不参与压缩
+- 总 token 数超过 max_tokens 时, 从最早的对话开始按整轮 (以用户消息为界, 不会拆开 tool call 与其结果) 移出,
+  直到降到 target_tokens 以下; 至少保留最近的 keep_last_turns 轮.
+  降到低水位而不是刚好低于上限, 使压缩 (以及摘要的 LLM 调用) 每隔若干轮才发生一次
+- 被移出的消息通过 RemoveMessage 从 state 中删除, state 中的 messages 长度因此有上界, 每轮耗时不随对话轮数增长
+- 配置了 summarizer 时, 被移出的消息与已有摘要合并成新的摘要, 存放在 state["summary"] 中, 之后每轮直接使用;
+  没有配置则直接丢弃
+
+用法:
+    compactor = ContextCompactor(max_tokens=2000, system_prompt="...", summarizer=model)
+
+    class State(TypedDict):
+        messages: Annotated[list, add_messages]
+        summary: NotRequired[str]
+
+    def compact_history(state):
+        return compactor.compact(state["messages"], state.get("summary", ""))
+
+    def chatbot(state):
+        return {"messages": [model.invoke(compactor.build_prompt(state["messages"], state.get("summary", "")))]}
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage, SystemMessage, get_buffer_string
+
+from common.mock_llm import tokenize
+
+# 每条消息的固定开销 (role, 分隔符等), 与 OpenAI 的计数方式大致相同
+_MESSAGE_OVERHEAD = 4
+
+_encoding: Any = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding() -> Any:
+    """返回 tiktoken 的 encoding, 无法使用时返回 False"""
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception:  # 未安装, 或离线环境下无法下载词表
+                _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(tokenize(text))
+
+
+def _message_text(message: BaseMessage) -> str:
+    text = message.content if isinstance(message.content, str) else str(message.content)
+    tool_calls = getattr(message, "tool_calls", None)
+    return f"{text}{tool_calls}" if tool_calls else text
+
+
+class ContextCompactor:
+    """按 token 预算压缩对话历史
+
+    Args:
+        max_tokens: 上下文 (system prompt + 摘要 + 历史消息) 的 token 上限
+        target_tokens: 压缩后降到的 token 数, 默认为 max_tokens 的 60%
+        system_prompt: 固定在最前面的 system prompt
+        summarizer: 用于生成摘要的模型, None 表示直接丢弃旧消息
+        keep_last_turns: 至少保留的最近轮数
+        summary_max_chars: 提示摘要模型的摘要长度上限
+        token_counter: 文本 -> token 数, 默认为 `count_tokens`
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        target_tokens: int | None = None,
+        system_prompt: str = "",
+        summarizer: BaseChatModel | None = None,
+        keep_last_turns: int = 1,
+        summary_max_chars: int = 300,
+        token_counter: Callable[[str], int] = count_tokens,
+        cache_size: int = 100_000,
+    ):
+        self.max_tokens = max_tokens
+        self.target_tokens = target_tokens if target_tokens is not None else int(max_tokens * 0.6)
+        self.system_prompt = system_prompt
+        self.summarizer = summarizer
+        self.keep_last_turns = keep_last_turns
+        self.summary_max_chars = summary_max_chars
+        self.token_counter = token_counter
+        self.cache_size = cache_size
+        # message id -> token 数
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.compactions = 0
+
+    def message_tokens(self, message: BaseMessage) -> int:
+        key = message.id
+        if key is not None:
+            with self._lock:
+                if (count := self._cache.get(key)) is not None:
+                    self._cache.move_to_end(key)
+                    return count
+        count = self.token_counter(_message_text(message)) + _MESSAGE_OVERHEAD
+        if key is not None:
+            with self._lock:
+                self._cache[key] = count
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return count
+
+    def _system_text(self, summary: str) -> str:
+        if not summary:
+            return self.system_prompt
+        return f"{self.system_prompt}\n\n之前对话的摘要:\n{summary}".strip()
+
+    def context_tokens(self, messages: Sequence[BaseMessage], summary: str = "") -> int:
+        system_text = self._system_text(summary)
+        total = self.token_counter(system_text) + _MESSAGE_OVERHEAD if system_text else 0
+        return total + sum(self.message_tokens(m) for m in messages)
+
+    def build_prompt(self, messages: Sequence[BaseMessage], summary: str = "") -> list[BaseMessage]:
+        """system prompt (含摘要) + 保留的历史消息, 直接传给 model.invoke"""
+        system_text = self._system_text(summary)
+        return ([SystemMessage(system_text)] if system_text else []) + list(messages)
+
+    def compact(self, messages: Sequence[BaseMessage], summary: str = "") -> dict[str, Any]:
+        """返回 state 的更新: 删除被移出的消息, 更新摘要; 未超出预算时返回 {}"""
+        total = self.context_tokens(messages, summary)
+        if total <= self.max_tokens:
+            return {}
+
+        # 每轮的起点: 用户消息的位置
+        turn_starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if turn_starts[:1] != [0]:
+            turn_starts.insert(0, 0)
+        # 可以移出的轮: 保留最近 keep_last_turns 轮
+        removable = turn_starts[1 : max(1, len(turn_starts) - self.keep_last_turns + 1)]
+        cut = 0
+        for end in removable:
+            if total <= self.target_tokens:
+                break
+            total -= sum(self.message_tokens(m) for m in messages[cut:end])
+            cut = end
+        if cut == 0:
+            return {}
+
+        evicted = messages[:cut]
+        self.compactions += 1
+        update: dict[str, Any] = {"messages": [RemoveMessage(id=m.id) for m in evicted]}
+        if self.summarizer is not None:
+            update["summary"] = self.summarize(evicted, summary)
+        return update
+
+    def summarize(self, evicted: Sequence[BaseMessage], summary: str = "") -> str:
+        prompt = (
+            f"请把下面的已有摘要和新的对话内容合并成一份新的摘要, 保留人名、数字、结论等关键事实, "
+            f"不超过 {self.summary_max_chars} 字, 只输出摘要本身.\n\n"
+            f"已有摘要:\n{summary or '(无)'}\n\n新的对话内容:\n{get_buffer_string(evicted)}"
+        )
+        return self.summarizer.invoke(prompt).content.strip()
@@ -0,0 +1,249 @@
+"""编译期的图优化: 把空节点 (passthrough) 融合进相邻节点, 减少每轮循环的任务调度次数
+
+langgraph 中每个节点都是一次任务调度 + 一次状态合并 + 若干 stream 事件, 即使节点什么也不做.
+例如 stream_example 每轮循环要经过 4 个节点, 3 个 superstep:
+
+    before_condition_passthrough -[should_continue]-> after_condition_passthrough -> (increment_a | increment_b) -> before...
+
+`fuse_passthrough_nodes(builder)` 返回一个新的 StateGraph (原 builder 不变), 做两类改写:
+
+规则 A: 空节点 p 只有普通边指向 s1..sk, 且 s1..sk 只由 p 触发
+    把 s1..sk 合并成一个节点 "s1+...+sk", 取代 p. 合并节点内并发执行各个成员 (同步时用线程池, 异步时用 gather),
+    每个成员看到的都是同一份输入状态, 各自的返回值以 Command 列表的形式写回, 因此 reducer 的语义与原来并行执行时相同.
+    成员节点中的 get_stream_writer 事件照常发出; 成员内部的 metadata["langgraph_node"] 仍是成员自己的名字
+    (stream_mode="messages" 按它区分节点), 只有 stream_mode="updates" 的 key 变成合并节点的名字.
+
+规则 B: 空节点 p 只有条件边, 它的每个前驱 q 都只通向 p
+    把 p 的条件边挪到每个前驱 q 上, 删除 p. 条件函数读到的是 q 刚写入后的状态, 与原来读到的相同.
+    如果两个前驱可能在同一个 superstep 中运行 (例如同一个节点扇出的兄弟节点), 条件函数只能看到其中一个的写入,
+    此时不做改写.
+
+改写后 stream_example 每轮循环只剩 "increment_a+increment_b" 一个节点, 一个 superstep.
+
+空节点的识别: 使用 `@passthrough` 标记, 或者函数体 (除 docstring 外) 只有 `return {}` / `return None` / `pass`.
+不满足上述条件的结构 (waiting edge, 没有 path_map 的条件边, defer 节点等) 保持原样.
+"""
+
+import ast
+import asyncio
+import copy
+import inspect
+import textwrap
+from collections import defaultdict
+from typing import Any, Callable
+
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import get_executor_for_config, merge_configs, set_config_context
+from langgraph.graph import START, StateGraph
+from langgraph.types import Command
+
+
+def passthrough(func: Callable) -> Callable:
+    """显式标记空节点"""
+    func.__passthrough__ = True
+    return func
+
+
+def _is_empty_return(stmt: ast.stmt) -> bool:
+    if isinstance(stmt, ast.Pass):
+        return True
+    if not isinstance(stmt, ast.Return):
+        return False
+    value = stmt.value
+    if value is None or (isinstance(value, ast.Constant) and value.value is None):
+        return True
+    return isinstance(value, ast.Dict) and not value.keys
+
+
+def is_passthrough(func: Any) -> bool:
+    if getattr(func, "__passthrough__", False):
+        return True
+    try:
+        source = textwrap.dedent(inspect.getsource(func))
+    except (OSError, TypeError):
+        return False
+    tree = ast.parse(source)
+    if not tree.body or not isinstance(tree.body[0], (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return False
+    body = tree.body[0].body
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+        body = body[1:]  # docstring
+    return bool(body) and all(_is_empty_return(stmt) for stmt in body)
+
+
+def _node_func(spec) -> Callable | None:
+    runnable = spec.runnable
+    return getattr(runnable, "func", None) or getattr(runnable, "afunc", None)
+
+
+def _to_commands(output: Any) -> list[Command]:
+    if output is None:
+        return []
+    if isinstance(output, Command):
+        return [output]
+    if isinstance(output, (list, tuple)) and all(isinstance(o, Command) for o in output):
+        return list(output)
+    return [Command(update=output)] if output else []
+
+
+def _member_config(config: RunnableConfig, name: str) -> RunnableConfig:
+    # stream_mode="messages" 和回调里的 langgraph_node 仍是成员自己的名字, 按节点名过滤消息的代码不受融合影响
+    return merge_configs(config, {"metadata": {"langgraph_node": name}, "run_name": name})
+
+
+def _invoke_member(member: tuple[str, Any], state, config: RunnableConfig) -> Any:
+    name, runnable = member
+    config = _member_config(config, name)
+    # 节点函数里的 llm.invoke 等从上下文读取 config, 需要在成员自己的 config 上下文中运行
+    with set_config_context(config) as context:
+        return context.run(runnable.invoke, state, config)
+
+
+async def _ainvoke_member(member: tuple[str, Any], state, config: RunnableConfig) -> Any:
+    name, runnable = member
+    config = _member_config(config, name)
+    with set_config_context(config) as context:
+        return await asyncio.create_task(runnable.ainvoke(state, config), context=context)
+
+
+def _collect(outputs: list[Any]) -> Any:
+    commands = [command for output in outputs for command in _to_commands(output)]
+    if not commands:
+        return {}
+    return commands[0] if len(commands) == 1 else commands
+
+
+def _make_fused_node(members: list[tuple[str, Any]]) -> RunnableLambda:
+    # 与同一 superstep 中并行执行的语义一致: 成员并发执行, 每个成员都读取同一份输入状态
+    def fused(state, config: RunnableConfig):
+        with get_executor_for_config(config) as executor:
+            return _collect(list(executor.map(
+                lambda member: _invoke_member(member, state, config), members
+            )))
+
+    async def afused(state, config: RunnableConfig):
+        return _collect(await asyncio.gather(
+            *(_ainvoke_member(member, state, config) for member in members)
+        ))
+
+    name = "+".join(name for name, _ in members)
+    return RunnableLambda(fused, afunc=afused, name=name)
+
+
+class _GraphView:
+    """对 builder.edges / builder.branches 的简单索引"""
+
+    def __init__(self, builder: StateGraph):
+        self.builder = builder
+        self.waiting = {n for starts, end in builder.waiting_edges for n in (*starts, end)}
+
+    def successors(self, node: str) -> set[str]:
+        return {end for start, end in self.builder.edges if start == node}
+
+    def predecessors(self, node: str) -> set[str]:
+        return {start for start, end in self.builder.edges if end == node}
+
+    def branch_sources_to(self, node: str) -> list[tuple[str, str]]:
+        """返回以 node 为目标的条件边 (source, branch_name); path_map 缺失时无法判断, 返回 None"""
+        result = []
+        for source, branches in self.builder.branches.items():
+            for name, branch in branches.items():
+                if branch.ends is None:
+                    return None
+                if node in branch.ends.values():
+                    result.append((source, name))
+        return result
+
+    def is_plain(self, node: str) -> bool:
+        spec = self.builder.nodes[node]
+        return node not in self.waiting and not getattr(spec, "defer", False)
+
+
+def _remap_branch_targets(builder: StateGraph, old: str, new: str) -> None:
+    for source, branches in builder.branches.items():
+        for name, branch in list(branches.items()):
+            if branch.ends and old in branch.ends.values():
+                ends = {k: (new if v == old else v) for k, v in branch.ends.items()}
+                branches[name] = branch._replace(ends=ends)
+
+
+def _fuse_successors(builder: StateGraph, p: str) -> bool:
+    """规则 A"""
+    view = _GraphView(builder)
+    members = sorted(view.successors(p))
+    if not members or p in builder.branches or not view.is_plain(p):
+        return False
+    if view.branch_sources_to(p) is None:
+        return False
+    for s in members:
+        if s not in builder.nodes or not view.is_plain(s) or s in builder.branches:
+            return False
+        if view.predecessors(s) != {p} or view.branch_sources_to(s):
+            return False
+        if view.successors(s) & set(members):
+            return False
+
+    fused_name = "+".join(members)
+    fused = _make_fused_node([(s, builder.nodes[s].runnable) for s in members])
+    out_edges = set().union(*(view.successors(s) for s in members))
+    in_edges = view.predecessors(p)
+
+    builder.edges = {(a, b) for a, b in builder.edges if p not in (a, b) and a not in members}
+    for s in [p, *members]:
+        del builder.nodes[s]
+    builder.add_node(fused_name, fused)
+    for q in in_edges:
+        builder.edges.add((q, fused_name))
+    for t in out_edges:
+        builder.edges.add((fused_name, t))
+    _remap_branch_targets(builder, p, fused_name)
+    return True
+
+
+def _hoist_branches(builder: StateGraph, p: str) -> bool:
+    """规则 B"""
+    view = _GraphView(builder)
+    preds = view.predecessors(p)
+    if not preds or view.successors(p) or not builder.branches.get(p) or not view.is_plain(p):
+        return False
+    if view.branch_sources_to(p) != []:
+        return False
+    for q in preds:
+        if q != START and (view.successors(q) != {p} or q in builder.branches or not view.is_plain(q)):
+            return False
+    # 同一节点扇出的兄弟节点会在同一个 superstep 运行, 条件函数只能看到其中一个的写入
+    parents = defaultdict(set)
+    for q in preds:
+        for parent in view.predecessors(q):
+            parents[parent].add(q)
+    if any(len(children) > 1 for children in parents.values()):
+        return False
+
+    branches = builder.branches.pop(p)
+    builder.edges = {(a, b) for a, b in builder.edges if b != p}
+    del builder.nodes[p]
+    for q in preds:
+        builder.branches[q].update(branches)
+    return True
+
+
+def fuse_passthrough_nodes(builder: StateGraph) -> StateGraph:
+    """返回融合了空节点的新 StateGraph, 原 builder 不受影响
+
+    用法:
+        fused_graph = fuse_passthrough_nodes(builder).compile()
+    """
+    fused = copy.copy(builder)
+    fused.nodes = dict(builder.nodes)
+    fused.edges = set(builder.edges)
+    fused.branches = defaultdict(dict, {k: dict(v) for k, v in builder.branches.items()})
+    fused.waiting_edges = set(builder.waiting_edges)
+    fused.compiled = False
+
+    candidates = [name for name, spec in builder.nodes.items() if is_passthrough(_node_func(spec))]
+    for p in candidates:
+        _fuse_successors(fused, p)
+    for p in candidates:
+        if p in fused.nodes:
+            _hoist_branches(fused, p)
+    return fused
@@ -0,0 +1,227 @@
+"""进程内共享的 HTTP 连接池
+
+`ChatOpenAI` 默认每个实例各自创建一个 httpx client. 示例里每个 graph 模块都会创建自己的模型,
+在同一个进程中加载多个 graph (例如 serve/app.py) 时连接池也各自独立, 无法复用 keep-alive 连接.
+这里提供进程内唯一的同步/异步 client, 由 `create_chat_model` 传给 ChatOpenAI.
+
+直接调用 HTTP 接口的示例 (tool_use_basic) 使用 `post_json` / `apost_json`:
+- 复用上面的连接池 (keep-alive)
+- 429/5xx 及连接错误时按带抖动的指数退避重试, 优先遵循服务端的 Retry-After
+- 返回每次请求的耗时分解 `RequestTiming` (连接、TLS、首字节、总耗时)
+
+环境变量 (见 .env.example):
+- LLM_HTTP_MAX_CONNECTIONS: 连接数上限
+- LLM_HTTP_MAX_KEEPALIVE: 空闲 keep-alive 连接数上限
+- LLM_HTTP_CONNECT_TIMEOUT / LLM_HTTP_READ_TIMEOUT: 连接/读取超时(秒)
+- LLM_HTTP2: 是否启用 HTTP/2 (需要安装 h2, 未安装时退回 HTTP/1.1)
+- LLM_HTTP_MAX_RETRIES: post_json 的最大重试次数
+- LLM_HTTP_BACKOFF_BASE / LLM_HTTP_BACKOFF_MAX: 退避的初始/最大等待时间(秒)
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+_lock = threading.Lock()
+_client: httpx.Client | None = None
+_async_client: httpx.AsyncClient | None = None
+
+
+def _settings() -> dict:
+    connect_timeout = float(os.environ.get("LLM_HTTP_CONNECT_TIMEOUT") or 5)
+    read_timeout = float(os.environ.get("LLM_HTTP_READ_TIMEOUT") or 120)
+    http2 = os.environ.get("LLM_HTTP2", "").lower() in ("1", "true", "yes")
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            http2 = False
+    return {
+        "limits": httpx.Limits(
+            max_connections=int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS") or 200),
+            max_keepalive_connections=int(os.environ.get("LLM_HTTP_MAX_KEEPALIVE") or 50),
+        ),
+        "timeout": httpx.Timeout(read_timeout, connect=connect_timeout),
+        "http2": http2,
+    }
+
+
+def get_http_client() -> httpx.Client:
+    global _client
+    with _lock:
+        if _client is None:
+            _client = httpx.Client(**_settings())
+    return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = httpx.AsyncClient(**_settings())
+    return _async_client
+
+
+# ---------------- 重试与耗时分解 ----------------
+
+RETRY_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+@dataclass
+class RequestTiming:
+    """一次 post_json 调用的耗时(秒), 多次重试时 connect/tls/ttfb 为最后一次尝试的值
+
+    httpcore 在建立 TCP 连接时才解析域名, 所以 connect 包含 DNS 解析; 复用 keep-alive 连接时 connect/tls 为 0.
+    """
+
+    connect: float = 0.0
+    tls: float = 0.0
+    ttfb: float = 0.0  # 开始发送请求 -> 收到响应头
+    total: float = 0.0  # 包括重试及退避等待
+    attempts: int = 0
+    status: int | None = None
+    reused: bool = True  # 是否复用了已有连接
+    _events: dict[str, float] = field(default_factory=dict, repr=False)
+
+    def _trace(self, event: str, info: dict) -> None:
+        # event 形如 "connection.connect_tcp.started", "http11.receive_response_headers.complete"
+        *_, name, phase = event.split(".")
+        now = time.perf_counter()
+        if phase == "started":
+            self._events[name] = now
+            if name == "connect_tcp":
+                self.reused = False
+            return
+        if phase != "complete":
+            return
+        if name == "connect_tcp":
+            self.connect = now - self._events[name]
+        elif name == "start_tls":
+            self.tls = now - self._events[name]
+        elif name == "receive_response_headers" and "send_request_headers" in self._events:
+            self.ttfb = now - self._events["send_request_headers"]
+
+    async def _atrace(self, event: str, info: dict) -> None:
+        self._trace(event, info)
+
+    def _new_attempt(self) -> None:
+        self.attempts += 1
+        self.connect = self.tls = self.ttfb = 0.0
+        self.status = None
+        self.reused = True
+        self._events.clear()
+
+    def __str__(self) -> str:
+        connection = "reused" if self.reused else f"connect {self.connect * 1e3:.1f} ms, tls {self.tls * 1e3:.1f} ms"
+        return (
+            f"HTTP {self.status}, {connection}, TTFB {self.ttfb * 1e3:.1f} ms, "
+            f"total {self.total * 1e3:.1f} ms, {self.attempts} attempt(s)"
+        )
+
+
+def _retry_settings() -> tuple[int, float, float]:
+    return (
+        int(os.environ.get("LLM_HTTP_MAX_RETRIES") or 3),
+        float(os.environ.get("LLM_HTTP_BACKOFF_BASE") or 0.5),
+        float(os.environ.get("LLM_HTTP_BACKOFF_MAX") or 20),
+    )
+
+
+def _retry_after(response: httpx.Response | None) -> float | None:
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float, response: httpx.Response | None = None) -> float:
+    """第 attempt 次重试前的等待时间: full jitter 的指数退避, 服务端给出 Retry-After 时以其为下限"""
+    delay = random.uniform(0, min(cap, base * 2**attempt))
+    if (retry_after := _retry_after(response)) is not None:
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+def _should_retry(response: httpx.Response | None, error: Exception | None) -> bool:
+    if error is not None:
+        # 连接失败、超时、连接被对端关闭等
+        return isinstance(error, httpx.TransportError)
+    return response.status_code in RETRY_STATUS_CODES
+
+
+def post_json(
+    url: str,
+    payload: Any,
+    headers: dict[str, str] | None = None,
+    *,
+    max_retries: int | None = None,
+    client: httpx.Client | None = None,
+) -> tuple[Any, RequestTiming]:
+    """POST JSON 并返回 (解析后的响应, 耗时); 重试耗尽后抛出最后一次的错误"""
+    client = client or get_http_client()
+    default_retries, base, cap = _retry_settings()
+    max_retries = default_retries if max_retries is None else max_retries
+    timing = RequestTiming()
+    start = time.perf_counter()
+    for attempt in range(max_retries + 1):
+        timing._new_attempt()
+        response = error = None
+        try:
+            response = client.post(url, json=payload, headers=headers, extensions={"trace": timing._trace})
+            timing.status = response.status_code
+        except httpx.TransportError as e:
+            error = e
+        if attempt == max_retries or not _should_retry(response, error):
+            break
+        time.sleep(backoff_delay(attempt, base, cap, response))
+    timing.total = time.perf_counter() - start
+    if error is not None:
+        raise error
+    response.raise_for_status()
+    return response.json(), timing
+
+
+async def apost_json(
+    url: str,
+    payload: Any,
+    headers: dict[str, str] | None = None,
+    *,
+    max_retries: int | None = None,
+    client: httpx.AsyncClient | None = None,
+) -> tuple[Any, RequestTiming]:
+    """post_json 的异步版本 (LLM_HTTP2=true 时可使用 HTTP/2 多路复用)"""
+    client = client or get_async_http_client()
+    default_retries, base, cap = _retry_settings()
+    max_retries = default_retries if max_retries is None else max_retries
+    timing = RequestTiming()
+    start = time.perf_counter()
+    for attempt in range(max_retries + 1):
+        timing._new_attempt()
+        response = error = None
+        try:
+            response = await client.post(url, json=payload, headers=headers, extensions={"trace": timing._atrace})
+            timing.status = response.status_code
+        except httpx.TransportError as e:
+            error = e
+        if attempt == max_retries or not _should_retry(response, error):
+            break
+        await asyncio.sleep(backoff_delay(attempt, base, cap, response))
+    timing.total = time.perf_counter() - start
+    if error is not None:
+        raise error
+    response.raise_for_status()
+    return response.json(), timing
@@ -0,0 +1,33 @@
+"""示例中统一的 chat model 构造入口
+
+- 默认: 根据 `{provider}_BASE_URL` / `{provider}_API_KEY` 构造 ChatOpenAI
+- LLM_BACKEND=mock: 返回离线的 MockChatModel, 无需网络和 API key (见 common/mock_llm.py)
+
+两种情况都会挂上 common/llm_cache.py 中的响应缓存 (若启用); ChatOpenAI 使用 common/http_client.py 中
+进程内共享的连接池.
+"""
+
+import os
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+
+from common.http_client import get_async_http_client, get_http_client
+from common.llm_cache import get_llm_cache
+from common.mock_llm import MockChatModel, get_mock_backend
+
+
+def use_mock_backend() -> bool:
+    return os.environ.get("LLM_BACKEND", "").lower() == "mock"
+
+
+def create_chat_model(provider: str, model: str, **kwargs: Any) -> BaseChatModel:
+    """kwargs 会透传给 ChatOpenAI, 例如 seed, temperature"""
+    if use_mock_backend():
+        return MockChatModel(model_name=model, backend=get_mock_backend(), cache=get_llm_cache())
+    base_url = os.environ[f"{provider}_BASE_URL"]
+    api_key = os.environ[f"{provider}_API_KEY"]
+    kwargs.setdefault("http_client", get_http_client())
+    kwargs.setdefault("http_async_client", get_async_http_client())
+    return ChatOpenAI(model=model, base_url=base_url, api_key=api_key, cache=get_llm_cache(), **kwargs)
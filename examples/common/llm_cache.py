@@ -0,0 +1,284 @@
+"""LLM 响应缓存: 内存 LRU + 磁盘 SQLite 两级
+
+实现的是 langchain 的 `BaseCache` 接口, 通过 `ChatOpenAI(cache=...)` 挂到模型上即可生效,
+节点代码里的 `llm.invoke(...)` 无需任何修改.
+
+缓存 key 由 langchain 传入的两部分组成:
+- prompt: 序列化后的消息列表 (langchain 已去掉消息 id, 这里再做一次同样的归一化)
+- llm_string: 序列化后的模型参数, 包含 model, base_url, seed/temperature 等采样参数, 以及 bind_tools 绑定的工具
+
+两级缓存:
+- 内存: OrderedDict 实现的 LRU, 直接存放 Generation 对象, 命中时为微秒级
+- 磁盘: SQLite, 存放 langchain 序列化后的 json, 进程重启后依然有效; 命中后回填内存
+
+两级都支持 TTL 与条目数上限淘汰.
+
+流式调用 (`llm.stream` / `astream`) 不经过 BaseCache: 需要缓存时用 `streamed_call(llm, prompt)` 取得与 invoke
+相同的 key, 先 lookup, 未命中时流式生成, 完整生成 (没有中途停止) 后再 update.
+
+环境变量 (见 .env.example):
+- LLM_CACHE: 是否启用, 默认不启用
+- LLM_CACHE_PATH: SQLite 文件路径, 为空则只使用内存缓存
+- LLM_CACHE_TTL: 过期时间(秒), 为空或 0 表示不过期
+- LLM_CACHE_MAX_ENTRIES: 内存 LRU 条目上限
+- LLM_CACHE_MAX_DISK_ENTRIES: SQLite 条目上限
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.runnables import Runnable, RunnableBinding
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"LLM cache: {self.hits} hits (memory={self.memory_hits}, disk={self.disk_hits}), "
+            f"{self.misses} misses, hit rate {self.hit_rate:.1%}, saved {self.hits} LLM calls"
+        )
+
+
+def _normalize_prompt(prompt: str) -> str:
+    """去掉消息里每次都会变化的 id 字段, 使相同内容的消息列表得到相同的 key"""
+    try:
+        data = json.loads(prompt)
+    except ValueError:
+        return prompt
+
+    def strip_ids(obj: Any) -> Any:
+        if isinstance(obj, dict):
+            kwargs = obj.get("kwargs")
+            if obj.get("lc") == 1 and isinstance(kwargs, dict):
+                kwargs.pop("id", None)
+            return {k: strip_ids(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [strip_ids(v) for v in obj]
+        return obj
+
+    return json.dumps(strip_ids(data), sort_keys=True, ensure_ascii=False)
+
+
+def make_cache_key(prompt: str, llm_string: str) -> str:
+    raw = _normalize_prompt(prompt) + "\x00" + llm_string
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    """内存 LRU + SQLite 两级 LLM 响应缓存
+
+    Args:
+        path: SQLite 文件路径, None 表示只使用内存缓存
+        max_entries: 内存 LRU 的条目上限
+        max_disk_entries: SQLite 的条目上限, 超出后按最近访问时间淘汰
+        ttl: 过期时间(秒), None 表示不过期
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        max_entries: int = 1024,
+        max_disk_entries: int = 100_000,
+        ttl: float | None = None,
+    ):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        # key -> (写入时间, generations)
+        self._memory: OrderedDict[str, tuple[float, RETURN_VAL_TYPE]] = OrderedDict()
+        # langgraph 的并行节点运行在线程池中, 需要加锁
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)"
+            )
+            self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _put_memory(self, key: str, created_at: float, value: RETURN_VAL_TYPE) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = make_cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                created_at, value = item
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    text, created_at = row
+                    if self._expired(created_at, now):
+                        self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        self._conn.commit()
+                    else:
+                        with warnings.catch_warnings():
+                            warnings.simplefilter("ignore")
+                            value = [loads(g) for g in json.loads(text)]
+                        self._conn.execute(
+                            "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                        self._conn.commit()
+                        self._put_memory(key, created_at, value)
+                        self.stats.disk_hits += 1
+                        return value
+
+            self.stats.misses += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = make_cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, now, return_val)
+            self.stats.writes += 1
+            if self._conn is None:
+                return
+            text = json.dumps([dumps(g) for g in return_val], ensure_ascii=False)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, text, now, now),
+            )
+            self._evict_disk(now)
+            self._conn.commit()
+
+    def _evict_disk(self, now: float) -> None:
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN"
+                " (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.stats.evictions += overflow
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+
+_default_cache: LLMResponseCache | None = None
+
+
+def get_llm_cache() -> LLMResponseCache | None:
+    """根据环境变量返回进程内共享的缓存实例, 未启用时返回 None
+
+    用法:
+        llm = ChatOpenAI(model=model, base_url=base_url, api_key=api_key, cache=get_llm_cache())
+    """
+    global _default_cache
+    if os.environ.get("LLM_CACHE", "").lower() not in ("1", "true", "yes"):
+        return None
+    if _default_cache is None:
+        ttl = float(os.environ.get("LLM_CACHE_TTL") or 0) or None
+        _default_cache = LLMResponseCache(
+            path=os.environ.get("LLM_CACHE_PATH") or None,
+            max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES") or 1024),
+            max_disk_entries=int(os.environ.get("LLM_CACHE_MAX_DISK_ENTRIES") or 100_000),
+            ttl=ttl,
+        )
+    return _default_cache
+
+
+@dataclass
+class StreamedCall:
+    """一次流式调用在 llm 所挂缓存中的条目, key 与同样参数的 invoke 相同 (两者共用缓存)"""
+
+    cache: BaseCache
+    prompt: str
+    llm_string: str
+
+    def lookup(self) -> str | None:
+        value = self.cache.lookup(self.prompt, self.llm_string)
+        return value[0].text if value else None
+
+    async def alookup(self) -> str | None:
+        value = await self.cache.alookup(self.prompt, self.llm_string)
+        return value[0].text if value else None
+
+    def _value(self, text: str) -> RETURN_VAL_TYPE:
+        return [ChatGeneration(message=AIMessage(content=text))]
+
+    def update(self, text: str) -> None:
+        self.cache.update(self.prompt, self.llm_string, self._value(text))
+
+    async def aupdate(self, text: str) -> None:
+        await self.cache.aupdate(self.prompt, self.llm_string, self._value(text))
+
+
+def streamed_call(llm: Runnable, prompt: LanguageModelInput) -> StreamedCall | None:
+    """llm (chat model 或其 bind(...) 的结果) 挂了缓存时返回 prompt 对应的缓存条目, 否则返回 None"""
+    kwargs: dict[str, Any] = {}
+    while isinstance(llm, RunnableBinding):
+        kwargs = {**llm.kwargs, **kwargs}
+        llm = llm.bound
+    if not isinstance(llm, BaseChatModel) or not isinstance(llm.cache, BaseCache):
+        return None
+    # 与 BaseChatModel._generate_with_cache 相同的 key
+    messages = [m.model_copy(update={"id": None}) if m.id is not None else m
+                for m in llm._convert_input(prompt).to_messages()]
+    llm_string = llm._get_llm_string(stop=kwargs.pop("stop", None), **kwargs)
+    return StreamedCall(llm.cache, dumps(messages), llm_string)
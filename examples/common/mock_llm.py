@@ -0,0 +1,343 @@
+"""离线 mock LLM: 不依赖网络, 用于压测/基准测试各个示例 graph
+
+- `MockBackend`: 规则引擎, 输入 OpenAI 格式的 messages/tools, 输出 content 或 tool_calls, 并给出模拟耗时
+- `MockChatModel`: langchain 的 chat model, 可直接替换 `ChatOpenAI` (支持 invoke/stream/ainvoke/astream/bind_tools)
+- `mock_server.py`: 基于同一个 `MockBackend` 的 OpenAI 兼容 HTTP 服务, 给 `tool_use_basic.call_llm` 这类直接发请求的代码用
+
+回复的决定顺序:
+1. 按顺序匹配 rules, 第一个匹配的规则生效
+2. 若配置了 script, 依次(循环)返回 script 中的回复
+3. 上一条消息是工具结果时, 把工具结果拼接成最终回答
+4. 兜底回复 default_response
+
+规则 (也可以写在 json 文件里, 通过 LLM_MOCK_RULES 指定, 默认使用 mock_rules.json):
+    {"match": "天气", "tool_calls": [{"name": "get_weather", "args": {"location": "深圳"}}]}
+    {"match": "标题", "content": "《春日漫步》"}
+
+耗时模型: latency (首 token 延迟) + 均匀分布的 jitter + 输出 token 数 / tokens_per_second
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterator, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict, Field
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s+")
+_ROLE_MAP = {"human": "user", "ai": "assistant", "system": "system", "tool": "tool"}
+
+
+def tokenize(text: str) -> list[str]:
+    """粗略切分 token: 英文按单词, 中文按字, 标点单独成 token, 拼接后与原文一致"""
+    tokens = []
+    for piece in _TOKEN_PATTERN.findall(text):
+        # \w 会匹配连续的中文, 中文按单字切分
+        if piece.isascii():
+            tokens.append(piece)
+        else:
+            tokens.extend(piece)
+    return tokens
+
+
+@dataclass
+class MockRule:
+    """一条回复规则
+
+    match: 正则, 匹配最后一条 user 消息的内容
+    content: 文本回复, 也可以是 `(messages) -> str` 的函数
+    tool_calls: [{"name": ..., "args": {...}}], 只有当绑定的工具里包含对应名称时才生效
+    """
+
+    match: str = ""
+    content: str | Callable[[list[dict]], str] = ""
+    tool_calls: list[dict] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._pattern = re.compile(self.match, re.S)
+
+
+@dataclass
+class MockReply:
+    content: str
+    tool_calls: list[dict]
+    input_tokens: int
+    output_tokens: int
+    delay: float  # 首 token 之前的耗时 (秒)
+    token_interval: float  # 每个输出 token 的耗时 (秒)
+
+    @property
+    def total_delay(self) -> float:
+        return self.delay + self.token_interval * self.output_tokens
+
+
+def load_rules(path: str) -> list[MockRule]:
+    with open(path, encoding="utf-8") as fr:
+        data = json.load(fr)
+    return [MockRule(**item) for item in data]
+
+
+class MockBackend:
+    """规则驱动的 mock 回复生成器, 线程安全, 给定 seed 时结果确定"""
+
+    def __init__(
+        self,
+        rules: Sequence[MockRule] = (),
+        script: Sequence[str] = (),
+        default_response: str = "这是一个来自 mock LLM 的回答。",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        tokens_per_second: float | None = None,
+        seed: int | None = 0,
+    ):
+        self.rules = list(rules)
+        self.script = list(script)
+        self.default_response = default_response
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self._rng = random.Random(seed)
+        self._script_index = 0
+        self._call_index = 0
+        self._lock = threading.Lock()
+
+    def _last_content(self, messages: list[dict], role: str) -> str | None:
+        for msg in reversed(messages):
+            if msg.get("role") == role:
+                content = msg.get("content")
+                return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+        return None
+
+    def respond(self, messages: list[dict], tools: list[dict] | None = None) -> MockReply:
+        """messages/tools 均为 OpenAI 接口格式"""
+        tool_names = {t["function"]["name"] for t in tools or [] if "function" in t}
+        last_user = self._last_content(messages, "user") or ""
+        last_is_tool = bool(messages) and messages[-1].get("role") == "tool"
+
+        content, tool_calls = None, []
+        for rule in self.rules:
+            if not rule._pattern.search(last_user):
+                continue
+            if rule.tool_calls:
+                # 已经拿到工具结果或没有绑定对应工具时, 不再重复发起工具调用
+                if last_is_tool or not all(c["name"] in tool_names for c in rule.tool_calls):
+                    continue
+                tool_calls = rule.tool_calls
+            content = rule.content if isinstance(rule.content, str) else rule.content(messages)
+            break
+
+        with self._lock:
+            if content is None and self.script:
+                content = self.script[self._script_index % len(self.script)]
+                self._script_index += 1
+            if content is None and last_is_tool:
+                results = [m["content"] for m in messages[len(messages) - self._trailing_tools(messages):]]
+                content = "根据工具结果: " + "; ".join(str(r) for r in results)
+            if content is None:
+                content = self.default_response
+
+            calls = []
+            for call in tool_calls:
+                self._call_index += 1
+                calls.append({"name": call["name"], "args": dict(call.get("args", {})), "id": f"call_mock_{self._call_index}"})
+            jitter = self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+
+        output_tokens = len(tokenize(content)) + sum(len(json.dumps(c["args"])) for c in calls)
+        input_tokens = sum(len(tokenize(str(m.get("content") or ""))) for m in messages)
+        return MockReply(
+            content=content,
+            tool_calls=calls,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            delay=max(0.0, self.latency + jitter),
+            token_interval=1 / self.tokens_per_second if self.tokens_per_second else 0.0,
+        )
+
+    @staticmethod
+    def _trailing_tools(messages: list[dict]) -> int:
+        n = 0
+        for msg in reversed(messages):
+            if msg.get("role") != "tool":
+                break
+            n += 1
+        return n
+
+
+def to_openai_messages(messages: list[BaseMessage]) -> list[dict]:
+    result = []
+    for msg in messages:
+        item = {"role": _ROLE_MAP.get(msg.type, msg.type), "content": msg.content}
+        if getattr(msg, "tool_calls", None):
+            item["tool_calls"] = msg.tool_calls
+        if getattr(msg, "tool_call_id", None):
+            item["tool_call_id"] = msg.tool_call_id
+        result.append(item)
+    return result
+
+
+class MockChatModel(BaseChatModel):
+    """可替换 ChatOpenAI 的离线 chat model
+
+    用法:
+        llm = MockChatModel(backend=MockBackend(rules=[...], latency=0.5, tokens_per_second=50))
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model_name: str = "mock"
+    backend: MockBackend = Field(default_factory=MockBackend)
+    # 为 False 时只统计耗时而不真正 sleep, 用于只关心 langgraph 自身开销的基准测试
+    simulate_delay: bool = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock-chat"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def bind_tools(self, tools, *, tool_choice: str | None = None, **kwargs: Any):
+        formatted = [convert_to_openai_tool(t) for t in tools]
+        return self.bind(tools=formatted, **kwargs)
+
+    def _reply(self, messages: list[BaseMessage], **kwargs: Any) -> MockReply:
+        return self.backend.respond(to_openai_messages(messages), kwargs.get("tools"))
+
+    def _message(self, reply: MockReply) -> AIMessage:
+        return AIMessage(
+            content=reply.content,
+            tool_calls=reply.tool_calls,
+            usage_metadata={
+                "input_tokens": reply.input_tokens,
+                "output_tokens": reply.output_tokens,
+                "total_tokens": reply.input_tokens + reply.output_tokens,
+            },
+            response_metadata={
+                "model_name": self.model_name,
+                "finish_reason": "tool_calls" if reply.tool_calls else "stop",
+            },
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reply = self._reply(messages, **kwargs)
+        if self.simulate_delay and reply.total_delay:
+            time.sleep(reply.total_delay)
+        return ChatResult(generations=[ChatGeneration(message=self._message(reply))])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reply = self._reply(messages, **kwargs)
+        if self.simulate_delay and reply.total_delay:
+            await asyncio.sleep(reply.total_delay)
+        return ChatResult(generations=[ChatGeneration(message=self._message(reply))])
+
+    def _chunks(self, reply: MockReply) -> Iterator[ChatGenerationChunk]:
+        for token in tokenize(reply.content):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        if reply.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {"name": c["name"], "args": json.dumps(c["args"], ensure_ascii=False), "id": c["id"], "index": i}
+                        for i, c in enumerate(reply.tool_calls)
+                    ],
+                )
+            )
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                usage_metadata={
+                    "input_tokens": reply.input_tokens,
+                    "output_tokens": reply.output_tokens,
+                    "total_tokens": reply.input_tokens + reply.output_tokens,
+                },
+                # UsageMetadataCallbackHandler 按 model_name 统计用量, 没有时忽略该次调用
+                response_metadata={
+                    "model_name": self.model_name,
+                    "finish_reason": "tool_calls" if reply.tool_calls else "stop",
+                },
+            )
+        )
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        reply = self._reply(messages, **kwargs)
+        if self.simulate_delay and reply.delay:
+            time.sleep(reply.delay)
+        for chunk in self._chunks(reply):
+            if self.simulate_delay and reply.token_interval and chunk.message.content:
+                time.sleep(reply.token_interval)
+            if run_manager and chunk.message.content:
+                run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        reply = self._reply(messages, **kwargs)
+        if self.simulate_delay and reply.delay:
+            await asyncio.sleep(reply.delay)
+        for chunk in self._chunks(reply):
+            if self.simulate_delay and reply.token_interval and chunk.message.content:
+                await asyncio.sleep(reply.token_interval)
+            if run_manager and chunk.message.content:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("mock_rules.json")
+_default_backend: MockBackend | None = None
+
+
+def get_mock_backend() -> MockBackend:
+    """根据环境变量返回进程内共享的 MockBackend
+
+    - LLM_MOCK_RULES: 规则文件, 默认 common/mock_rules.json (覆盖了 examples 下各示例的提示词)
+    - LLM_MOCK_LATENCY / LLM_MOCK_JITTER: 首 token 延迟及其抖动(秒)
+    - LLM_MOCK_TOKENS_PER_SECOND: 输出速度, 为空表示瞬间输出
+    - LLM_MOCK_SEED: 随机种子
+    """
+    global _default_backend
+    if _default_backend is None:
+        tokens_per_second = float(os.environ.get("LLM_MOCK_TOKENS_PER_SECOND") or 0) or None
+        _default_backend = MockBackend(
+            rules=load_rules(os.environ.get("LLM_MOCK_RULES") or str(DEFAULT_RULES_PATH)),
+            latency=float(os.environ.get("LLM_MOCK_LATENCY") or 0),
+            jitter=float(os.environ.get("LLM_MOCK_JITTER") or 0),
+            tokens_per_second=tokens_per_second,
+            seed=int(os.environ.get("LLM_MOCK_SEED") or 0),
+        )
+    return _default_backend
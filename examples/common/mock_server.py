@@ -0,0 +1,154 @@
+"""OpenAI 兼容的本地 mock 服务 (POST /v1/chat/completions), 回复由 `MockBackend` 生成
+
+给直接发 HTTP 请求的代码 (例如 tool_use_basic.call_llm) 使用, 只需把 base_url 指向本服务:
+
+    python examples/common/mock_server.py --port 8765 --latency 0.5 --tokens-per-second 50
+    WILDCARD_BASE_URL="http://127.0.0.1:8765/v1" python examples/tool_use_basic/tool_use_basic.py
+
+也可以在进程内启动:
+
+    server, base_url = start_mock_server(MockBackend(rules=[...]))
+    ...
+    server.shutdown()
+
+支持 "stream": true 的 SSE 流式输出.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.mock_llm import DEFAULT_RULES_PATH, MockBackend, MockReply, load_rules, tokenize
+
+
+def _openai_tool_calls(reply: MockReply) -> list[dict]:
+    return [
+        {
+            "id": call["id"],
+            "type": "function",
+            "function": {"name": call["name"], "arguments": json.dumps(call["args"], ensure_ascii=False)},
+        }
+        for call in reply.tool_calls
+    ]
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    backend: MockBackend
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        reply = self.backend.respond(payload.get("messages", []), payload.get("tools"))
+        model = payload.get("model", "mock")
+        created = int(time.time())
+        finish_reason = "tool_calls" if reply.tool_calls else "stop"
+        usage = {
+            "prompt_tokens": reply.input_tokens,
+            "completion_tokens": reply.output_tokens,
+            "total_tokens": reply.input_tokens + reply.output_tokens,
+        }
+
+        if not payload.get("stream"):
+            time.sleep(reply.total_delay)
+            message = {"role": "assistant", "content": reply.content or None}
+            if reply.tool_calls:
+                message["tool_calls"] = _openai_tool_calls(reply)
+            self._send_json(200, {
+                "id": f"chatcmpl-mock-{created}",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send_chunk(delta: dict, finish: str | None = None, **extra) -> None:
+            chunk = {
+                "id": f"chatcmpl-mock-{created}",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                **extra,
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        time.sleep(reply.delay)
+        send_chunk({"role": "assistant", "content": ""})
+        for token in tokenize(reply.content):
+            time.sleep(reply.token_interval)
+            send_chunk({"content": token})
+        if reply.tool_calls:
+            tool_calls = [{"index": i, **call} for i, call in enumerate(_openai_tool_calls(reply))]
+            send_chunk({"tool_calls": tool_calls})
+        send_chunk({}, finish_reason, usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_mock_server(backend: MockBackend, host: str = "127.0.0.1", port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """在后台线程启动 mock 服务, port=0 表示随机端口, 返回 (server, base_url)"""
+    handler = type("BoundMockRequestHandler", (MockRequestHandler,), {"backend": backend})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的本地 mock LLM 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    # 默认与进程内的 mock 模型 (LLM_BACKEND=mock) 使用同一份规则
+    parser.add_argument(
+        "--rules",
+        default=os.environ.get("LLM_MOCK_RULES") or str(DEFAULT_RULES_PATH),
+        help="json 规则文件, 格式见 common/mock_llm.py; 默认为 LLM_MOCK_RULES 或 common/mock_rules.json",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="首 token 延迟(秒)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟的随机抖动(秒)")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    backend = MockBackend(
+        rules=load_rules(args.rules),
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+    )
+    handler = type("BoundMockRequestHandler", (MockRequestHandler,), {"backend": backend})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"mock LLM serving at http://{args.host}:{args.port}/v1")
+    server.serve_forever()
@@ -0,0 +1,57 @@
+"""按阶段累计耗时的简单 profiler, 用于区分框架开销 (prompt 格式化、工具 schema 生成等) 与 LLM 调用本身
+
+用法:
+    profiler = PhaseProfiler()
+    with profiler.phase("format prompt"):
+        ...
+    print(profiler.report())
+"""
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+
+@dataclass
+class PhaseStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class PhaseProfiler:
+    def __init__(self):
+        self.phases: dict[str, PhaseStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.phases.setdefault(name, PhaseStats())
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+
+    def report(self) -> str:
+        with self._lock:
+            total = sum(s.total for s in self.phases.values()) or 1.0
+            lines = [f"{'phase':<36} {'count':>6} {'total ms':>10} {'avg ms':>9} {'max ms':>9} {'share':>6}"]
+            for name, s in self.phases.items():
+                lines.append(
+                    f"{name:<36} {s.count:>6} {s.total * 1e3:>10.2f} {s.avg * 1e3:>9.3f} "
+                    f"{s.max * 1e3:>9.3f} {s.total / total:>6.1%}"
+                )
+        return "\n".join(lines)
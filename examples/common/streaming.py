@@ -0,0 +1,123 @@
+"""token 级流式输出: 把 LLM 节点生成的 token 直接转发给终端或异步消费者
+
+`stream_mode="values"` 每个 superstep 才发一次事件, 用户要等整条回复生成完才能看到内容, 而且每个事件都带着完整的 state.
+`TokenStream` 使用 `stream_mode=["messages", "updates"]`:
+- messages: LLM 的每个 token chunk (节点里照常调用 model.invoke 即可, langgraph 会自动切换为流式调用)
+- updates: 每个节点返回的增量, 需要最终 state 的调用方 (例如不使用 checkpointer 的 chatbot1) 可以自行合并
+
+同时记录首 token 耗时 (TTFT), 这是交互场景下用户感受到的延迟.
+
+用法:
+    stream = TokenStream(graph, inputs, config, nodes={"chatbot"})
+    for token in stream:              # 或 async for token in stream
+        print(token, end="", flush=True)
+    print(stream.timing)              # TTFT 1.2 ms, total 35.4 ms, 20 tokens (565 tokens/s)
+    stream.updates                    # [(node, update), ...]
+"""
+
+import statistics
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+
+
+@dataclass
+class StreamTiming:
+    start: float = field(default_factory=time.perf_counter)
+    first_token: float | None = None
+    end: float | None = None
+    tokens: int = 0
+
+    @property
+    def ttft(self) -> float | None:
+        """首 token 耗时 (秒)"""
+        return None if self.first_token is None else self.first_token - self.start
+
+    @property
+    def total(self) -> float | None:
+        return None if self.end is None else self.end - self.start
+
+    @property
+    def tokens_per_sec(self) -> float:
+        # 生成速度只统计首 token 之后的部分
+        if self.first_token is None or self.end is None or self.end <= self.first_token:
+            return 0.0
+        return (self.tokens - 1) / (self.end - self.first_token)
+
+    def __str__(self) -> str:
+        ttft = "-" if self.ttft is None else f"{self.ttft * 1e3:.1f} ms"
+        total = "-" if self.total is None else f"{self.total * 1e3:.1f} ms"
+        return f"TTFT {ttft}, total {total}, {self.tokens} tokens ({self.tokens_per_sec:.0f} tokens/s)"
+
+
+def summarize_timings(timings: Iterable[StreamTiming]) -> str:
+    """多轮的 TTFT/总耗时分位数"""
+    ttfts = [t.ttft * 1e3 for t in timings if t.ttft is not None]
+    totals = [t.total * 1e3 for t in timings if t.total is not None]
+    if not ttfts:
+        return "no streamed replies"
+
+    def quantiles(values: list[float]) -> str:
+        if len(values) == 1:
+            return f"{values[0]:.1f} ms"
+        q = statistics.quantiles(values, n=100, method="inclusive")
+        return f"p50 {q[49]:.1f} ms, p90 {q[89]:.1f} ms"
+
+    return f"{len(ttfts)} replies, TTFT {quantiles(ttfts)}; total {quantiles(totals)}"
+
+
+class TokenStream:
+    """迭代 graph 中指定节点生成的 token 文本
+
+    Args:
+        graph: 编译后的 graph
+        input: graph 的输入
+        config: RunnableConfig
+        nodes: 只转发这些节点中 LLM 的 token, None 表示所有节点 (例如过滤掉生成摘要的 LLM 调用)
+    """
+
+    def __init__(
+        self,
+        graph: Any,
+        input: Any,
+        config: RunnableConfig | None = None,
+        nodes: Iterable[str] | None = None,
+    ):
+        self.graph = graph
+        self.input = input
+        self.config = config
+        self.nodes = set(nodes) if nodes is not None else None
+        self.updates: list[tuple[str, Any]] = []
+        self.timing = StreamTiming()
+
+    def _handle(self, mode: str, chunk: Any) -> str | None:
+        if mode == "updates":
+            self.updates.extend((node, update) for node, update in chunk.items() if update)
+            return None
+        message, metadata = chunk
+        if self.nodes is not None and metadata.get("langgraph_node") not in self.nodes:
+            return None
+        text = message.content if isinstance(message.content, str) else ""
+        if not text:
+            return None
+        if self.timing.first_token is None:
+            self.timing.first_token = time.perf_counter()
+        self.timing.tokens += 1
+        return text
+
+    def __iter__(self) -> Iterator[str]:
+        self.timing = StreamTiming()
+        for mode, chunk in self.graph.stream(self.input, self.config, stream_mode=["messages", "updates"]):
+            if (text := self._handle(mode, chunk)) is not None:
+                yield text
+        self.timing.end = time.perf_counter()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        self.timing = StreamTiming()
+        async for mode, chunk in self.graph.astream(self.input, self.config, stream_mode=["messages", "updates"]):
+            if (text := self._handle(mode, chunk)) is not None:
+                yield text
+        self.timing.end = time.perf_counter()
@@ -0,0 +1,174 @@
+"""工具调用缓存与统计: 作为 `ToolNode` 的 wrap_tool_call / awrap_tool_call 使用
+
+汇率换算、日期计算这类纯函数工具, 相同参数在多轮对话中会被反复调用. `ToolCache`:
+- 以 (工具名, 归一化后的参数) 为 key 缓存成功的结果, LRU 淘汰; 参数先经过工具的 args schema 校验,
+  所以 {"amount": 100} 与 {"amount": 100.0} 是同一个 key
+- `non_cacheable` 中的工具 (如 current_datetime) 每次都执行
+- 同一条 AIMessage 中的多个调用由 ToolNode 并发执行; 参数相同的并发调用只执行一次, 其余等待其结果
+- 按工具统计调用次数、命中次数、错误次数与耗时
+
+用法:
+    tool_cache = ToolCache(non_cacheable={"current_datetime"})
+    tool_node = ToolNode(tools, wrap_tool_call=tool_cache.wrap_tool_call, awrap_tool_call=tool_cache.awrap_tool_call)
+    print(tool_cache.report())
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import ToolMessage
+from langgraph.prebuilt.tool_node import ToolCallRequest
+from pydantic import ValidationError
+
+
+@dataclass
+class ToolStats:
+    calls: int = 0
+    hits: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    @property
+    def avg_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.calls if self.calls else 0.0
+
+
+@dataclass(frozen=True)
+class _Entry:
+    content: Any
+    artifact: Any
+
+
+class ToolCache:
+    """
+    Args:
+        max_entries: 缓存条目上限 (所有工具共用)
+        non_cacheable: 结果随时间变化或有副作用、不能缓存的工具名
+    """
+
+    def __init__(self, max_entries: int = 1024, non_cacheable: Iterable[str] = ()):
+        self.max_entries = max_entries
+        self.non_cacheable = set(non_cacheable)
+        self.stats: dict[str, ToolStats] = {}
+        self.evictions = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, request: ToolCallRequest) -> str | None:
+        tool = request.tool
+        if tool is None or tool.name in self.non_cacheable:
+            return None
+        try:
+            args = tool.get_input_schema().model_validate(request.tool_call["args"]).model_dump(mode="json")
+        except ValidationError:
+            return None  # 交给工具本身报错
+        return json.dumps([tool.name, args], sort_keys=True, ensure_ascii=False)
+
+    def _claim(self, key: str) -> tuple[_Entry | None, Future | None, bool]:
+        """返回 (缓存条目, 进行中的调用, 是否由当前调用负责执行)"""
+        with self._lock:
+            if (entry := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+                return entry, None, False
+            if (future := self._inflight.get(key)) is not None:
+                return None, future, False
+            future = self._inflight[key] = Future()
+            return None, future, True
+
+    def _release(self, key: str, future: Future, result: Any) -> None:
+        entry = None
+        if isinstance(result, ToolMessage) and result.status != "error":
+            entry = _Entry(result.content, result.artifact)
+        with self._lock:
+            del self._inflight[key]
+            if entry is not None:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        future.set_result(entry)
+
+    def _record(self, name: str, start: float, hit: bool, result: Any) -> None:
+        """result 为 None 表示工具抛出了异常"""
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats = self.stats.setdefault(name, ToolStats())
+            stats.calls += 1
+            stats.hits += hit
+            stats.errors += result is None or (isinstance(result, ToolMessage) and result.status == "error")
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+
+    @staticmethod
+    def _message(entry: _Entry, request: ToolCallRequest) -> ToolMessage:
+        return ToolMessage(
+            content=entry.content,
+            artifact=entry.artifact,
+            name=request.tool_call["name"],
+            tool_call_id=request.tool_call["id"],
+        )
+
+    def wrap_tool_call(self, request: ToolCallRequest, execute: Callable[[ToolCallRequest], Any]) -> Any:
+        start = time.perf_counter()
+        key = self._key(request)
+        entry, future, owner = self._claim(key) if key is not None else (None, None, False)
+        if future is not None and not owner:
+            entry = future.result()
+        if entry is not None:
+            result = self._message(entry, request)
+            self._record(request.tool_call["name"], start, True, result)
+            return result
+        result = None
+        try:
+            result = execute(request)
+        finally:
+            if owner:
+                self._release(key, future, result)
+            self._record(request.tool_call["name"], start, False, result)
+        return result
+
+    async def awrap_tool_call(
+        self, request: ToolCallRequest, execute: Callable[[ToolCallRequest], Awaitable[Any]]
+    ) -> Any:
+        start = time.perf_counter()
+        key = self._key(request)
+        entry, future, owner = self._claim(key) if key is not None else (None, None, False)
+        if future is not None and not owner:
+            entry = await asyncio.wrap_future(future)
+        if entry is not None:
+            result = self._message(entry, request)
+            self._record(request.tool_call["name"], start, True, result)
+            return result
+        result = None
+        try:
+            result = await execute(request)
+        finally:
+            if owner:
+                self._release(key, future, result)
+            self._record(request.tool_call["name"], start, False, result)
+        return result
+
+    def report(self) -> str:
+        lines = [f"{'tool':<18} {'calls':>6} {'hits':>6} {'hit rate':>9} {'errors':>7} {'avg ms':>8} {'max ms':>8}"]
+        with self._lock:
+            for name, s in sorted(self.stats.items()):
+                hit_rate = "-" if name in self.non_cacheable else f"{s.hit_rate:.0%}"
+                lines.append(
+                    f"{name:<18} {s.calls:>6} {s.hits:>6} {hit_rate:>9} {s.errors:>7} "
+                    f"{s.avg_time * 1e3:>8.2f} {s.max_time * 1e3:>8.2f}"
+                )
+            lines.append(f"tool cache: {len(self._entries)}/{self.max_entries} entries, {self.evictions} evictions")
+        return "\n".join(lines)
@@ -0,0 +1,241 @@
+"""裁判文书 (legal_doc) 的列式统计: 按公司、年份、原告/被告、涉案金额过滤, 排序、求和、分组
+
+表中各列都是文本 ("35.6万"、"1.2亿元"、"2020-04-01"), 按年份和金额范围过滤、求和要对每一行做文本解析;
+让 LLM 逐个案件取回再调用 API_18 计算, 还要多出若干次调用.
+
+`LegalDocs` 在首次使用时把整张表读入一次, 解析成 NumPy 数组:
+- amount: float64, 单位元, 没有或无法解析的为 NaN
+- date: datetime64[D] (日期列), year: int16 (案号中的年份, 即立案年份, 没有时取日期的年份, 都没有为 0)
+- role: uint8, 关联公司在该案件中的角色 (ROLE_PLAINTIFF | ROLE_DEFENDANT, 都不是为 0)
+- cause: int32, 案由在 causes 中的下标
+- 按关联公司排序后的行号, 一家公司的全部案件是其中连续的一段
+
+`LegalDocs.query` 在一家公司的行上用布尔掩码过滤, argsort 排序, 求和与分组 (np.unique + np.bincount) 都是向量运算.
+同一文本只解析一次 (赛题数据中金额、日期大量重复).
+
+用法:
+    docs = legal_docs(tables)          # 每个 Tables / Store 构建一次
+    docs.query("示例科技股份有限公司", role=ROLE_DEFENDANT, year=2021)
+"""
+
+import re
+import threading
+import weakref
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+ROLE_PLAINTIFF = 1
+ROLE_DEFENDANT = 2
+ROLES = {"原告": ROLE_PLAINTIFF, "被告": ROLE_DEFENDANT}
+ROLE_NAMES = {0: "", ROLE_PLAINTIFF: "原告", ROLE_DEFENDANT: "被告", ROLE_PLAINTIFF | ROLE_DEFENDANT: "原告/被告"}
+GROUP_KEYS = ("年份", "角色", "案由")
+SORT_KEYS = ("涉案金额", "日期", "案号")
+CASE_FIELDS = ("案号", "涉案金额", "日期", "年份", "角色", "案由")  # records 的字段
+
+_AMOUNT = re.compile(r"^\s*([-+]?\d+(?:\.\d+)?)\s*(万|亿)?\s*元?\s*$")
+_UNITS = {None: 1, "万": 1e4, "亿": 1e8}
+_DATE = re.compile(r"(\d{4})\D{1,3}(\d{1,2})\D{1,3}(\d{1,2})")
+_CASE_YEAR = re.compile(r"^\s*[(（〔\[]\s*(\d{4})")
+
+
+def parse_amount(value: Any) -> float:
+    """数字或 "12.5"、"3万"、"1.2亿元" 这样的文本, 单位元; 无法解析时为 NaN"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    m = _AMOUNT.match(str(value).replace(",", ""))
+    if m is None:
+        return float("nan")
+    return float(m[1]) * _UNITS[m[2]]
+
+
+def parse_amounts(values: Iterable[Any]) -> np.ndarray:
+    """parse_amount 的数组版本, 相同的文本只解析一次"""
+    cache: dict[Any, float] = {}
+    out = []
+    for v in values:
+        key = v if isinstance(v, str) else (type(v), v)
+        if (x := cache.get(key)) is None:
+            x = cache[key] = parse_amount(v)
+        out.append(x)
+    return np.array(out, dtype=np.float64)
+
+
+def parse_date(value: Any) -> np.datetime64:
+    """"2020-04-01"、"2020年4月1日"、"2020-04-01 00:00:00" 等; 无法解析时为 NaT"""
+    m = _DATE.search(str(value or ""))
+    if m is None:
+        return np.datetime64("NaT", "D")
+    try:
+        return np.datetime64(f"{m[1]}-{int(m[2]):02d}-{int(m[3]):02d}", "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+def _role(company: str, plaintiff: str, defendant: str) -> int:
+    # 原告/被告可能有多方, 以顿号、逗号分隔, 所以按包含判断
+    if not company:
+        return 0
+    return (ROLE_PLAINTIFF if company in plaintiff else 0) | (ROLE_DEFENDANT if company in defendant else 0)
+
+
+@dataclass
+class Aggregate:
+    """query 的结果, rows 为按条件过滤 (及排序) 后的行号"""
+
+    company: str
+    rows: np.ndarray
+    total: float  # 涉案金额之和 (元), 不含没有金额的案件
+    with_amount: int  # 有涉案金额的案件数
+    groups: dict[str, dict[str, float]] | None = None
+
+
+class LegalDocs:
+    def __init__(self, rows: Iterable[dict]):
+        rows = list(rows)
+        n = len(rows)
+        text = lambda column: [str(row.get(column) or "") for row in rows]  # noqa: E731
+        self.case_no = np.array(text("案号"), dtype=object)
+        companies = text("关联公司")
+        plaintiffs, defendants = text("原告"), text("被告")
+
+        self.amount = parse_amounts(row.get("涉案金额") or "" for row in rows)
+        raw_dates = text("日期")
+        dates = {d: parse_date(d) for d in set(raw_dates)}
+        self.date = np.array([dates[d] for d in raw_dates], dtype="datetime64[D]").reshape(n)
+        date_year = np.where(np.isnat(self.date), 0, self.date.astype("datetime64[Y]").astype(np.int64) + 1970)
+        case_year = np.array([int(m[1]) if (m := _CASE_YEAR.match(c)) else 0 for c in self.case_no], dtype=np.int64)
+        self.year = np.where(case_year > 0, case_year, date_year).astype(np.int16)
+        self.role = np.array([_role(c, p, d) for c, p, d in zip(companies, plaintiffs, defendants)], dtype=np.uint8)
+        causes: dict[str, int] = {}
+        self.cause = np.array([causes.setdefault(c, len(causes)) for c in text("案由")], dtype=np.int32)
+        self.causes = list(causes)
+
+        # 公司名称编码后按编码稳定排序: 每家公司的行号是 order 中连续的一段, 且保持原表顺序
+        codes: dict[str, int] = {}
+        company_code = np.array([codes.setdefault(c, len(codes)) for c in companies], dtype=np.int32)
+        self.order = np.argsort(company_code, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(company_code[self.order], np.arange(len(codes) + 1))
+        self._spans = {c: (int(bounds[i]), int(bounds[i + 1])) for c, i in codes.items()}
+
+    def __len__(self) -> int:
+        return len(self.case_no)
+
+    def company_rows(self, company: str) -> np.ndarray:
+        start, end = self._spans.get(company, (0, 0))
+        return self.order[start:end]
+
+    def query(
+        self,
+        company: str,
+        *,
+        role: int = 0,
+        year: int | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        amount_gt: float | None = None,
+        amount_lt: float | None = None,
+        with_amount: bool = False,
+        sort_by: str | None = None,
+        desc: bool = False,
+        group_by: str | None = None,
+    ) -> Aggregate:
+        """过滤条件都是可选的, 同时给出时取交集; 金额条件为严格的大于/小于, 日期范围含两端"""
+        rows = self.company_rows(company)
+        mask = np.ones(len(rows), dtype=bool)
+        if role:
+            mask &= (self.role[rows] & role) != 0
+        if year is not None:
+            mask &= self.year[rows] == year
+        if date_from is not None:
+            mask &= self.date[rows] >= np.datetime64(date_from, "D")
+        if date_to is not None:
+            mask &= self.date[rows] <= np.datetime64(date_to, "D")
+        amount = self.amount[rows]
+        # 与 NaN 比较均为 False, 给出金额条件时没有金额的案件自然被排除
+        if amount_gt is not None:
+            mask &= amount > amount_gt
+        if amount_lt is not None:
+            mask &= amount < amount_lt
+        if with_amount:
+            mask &= ~np.isnan(amount)
+        rows = rows[mask]
+
+        if sort_by is not None:
+            rows = rows[self._sort(rows, sort_by, desc)]
+        amount = self.amount[rows]
+        known = ~np.isnan(amount)
+        result = Aggregate(company, rows, float(amount[known].sum()), int(known.sum()))
+        if group_by is not None:
+            result.groups = self._group(rows, group_by)
+        return result
+
+    def _sort(self, rows: np.ndarray, key: str, desc: bool) -> np.ndarray:
+        """返回排序用的下标; 没有金额 / 日期的行总是排在最后"""
+        if key == "涉案金额":
+            values = self.amount[rows]
+        elif key == "日期":
+            values = self.date[rows].astype(np.float64)
+            values[np.isnat(self.date[rows])] = np.nan
+        else:
+            values = self.case_no[rows]
+            order = np.argsort(values, kind="stable")
+            return order[::-1] if desc else order
+        # NaN 由 argsort 排到最后; 降序时取负数, 相等的值仍保持原表顺序
+        return np.argsort(-values if desc else values, kind="stable")
+
+    def _group(self, rows: np.ndarray, key: str) -> dict[str, dict[str, float]]:
+        if key == "年份":
+            keys, labels = self.year[rows].astype(np.int64), lambda k: str(k) if k else ""
+        elif key == "角色":
+            keys, labels = self.role[rows].astype(np.int64), ROLE_NAMES.__getitem__
+        else:
+            keys, labels = self.cause[rows].astype(np.int64), self.causes.__getitem__
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        amount = self.amount[rows]
+        known = ~np.isnan(amount)
+        counts = np.bincount(inverse, minlength=len(uniq))
+        totals = np.bincount(inverse, weights=np.where(known, amount, 0.0), minlength=len(uniq))
+        with_amount = np.bincount(inverse, weights=known, minlength=len(uniq))
+        return {
+            labels(int(k)): {"案件数": int(c), "有金额的案件数": int(w), "涉案金额总和": float(t)}
+            for k, c, w, t in zip(uniq, counts, with_amount, totals)
+        }
+
+    def records(self, rows: np.ndarray, fields: Iterable[str] = CASE_FIELDS) -> list[dict]:
+        """rows 的案件列表, 逐列转换成 Python 值再组装: 涉案金额 (元, 没有为 None)、日期 (没有为 "") ..."""
+        fields = list(fields)
+        columns = []
+        for field in fields:
+            if field == "案号":
+                values = self.case_no[rows].tolist()
+            elif field == "涉案金额":
+                amount = self.amount[rows]
+                values = np.where(np.isnan(amount), None, amount).tolist()
+            elif field == "日期":
+                values = [d if d != "NaT" else "" for d in np.datetime_as_string(self.date[rows]).tolist()]
+            elif field == "年份":
+                values = [y or None for y in self.year[rows].tolist()]
+            elif field == "角色":
+                values = [ROLE_NAMES[r] for r in self.role[rows].tolist()]
+            elif field == "案由":
+                values = [self.causes[c] for c in self.cause[rows].tolist()]
+            else:
+                raise KeyError(field)
+            columns.append(values)
+        return [dict(zip(fields, values)) for values in zip(*columns)] if fields else [{} for _ in rows]
+
+
+_docs: "weakref.WeakKeyDictionary[Any, LegalDocs]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def legal_docs(tables: Any) -> LegalDocs:
+    """tables (`apis.Tables` / `store.Store`) 的 legal_doc 表的列式数据, 每个 tables 构建一次"""
+    with _lock:
+        docs = _docs.get(tables)
+        if docs is None:
+            docs = _docs[tables] = LegalDocs(tables.rows("legal_doc"))
+        return docs
@@ -0,0 +1,84 @@
+"""裁判文书统计的基准测试: API_6 取回全部文书后逐行解析过滤 + API_18 求和 vs API_24 (列式数组上的向量运算)
+
+数据由 store_benchmark.make_data 生成 (legal_doc --rows 行, 关联公司取自 --companies 家公司).
+每个查询: 某公司作为被告、某一年、涉案金额在 (10万, 500万) 之间的案件数与金额总和, 外加按案由分组.
+两种方式的结果逐一比对.
+
+用法:
+    python examples/llm_compiler/aggregate_benchmark.py --rows 10000 100000 --companies 200
+"""
+
+import argparse
+import math
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from aggregate import legal_docs, parse_amount
+from apis import ApiSet
+from store import Store, build
+from store_benchmark import make_data
+
+
+def by_rows(apis: ApiSet, company: str, year: int) -> tuple[int, float, dict]:
+    """逐行方式: 文书整行取回, 每次查询都重新解析文本"""
+    cases = [
+        doc for doc in apis.call("API_6", {"关联公司": company})
+        if company in doc["被告"] and doc["案号"].startswith(f"({year})")
+        and 1e5 < parse_amount(doc["涉案金额"]) < 5e6  # NaN 的比较为 False
+    ]
+    total = apis.call("API_18", {"nums": [doc["涉案金额"] for doc in cases]})
+    groups: dict[str, float] = {}
+    for doc in cases:
+        groups[doc["案由"]] = groups.get(doc["案由"], 0.0) + parse_amount(doc["涉案金额"])
+    return len(cases), total, groups
+
+
+def by_columns(apis: ApiSet, company: str, year: int) -> tuple[int, float, dict]:
+    stats = apis.call("API_24", {"关联公司": company, "角色": "被告", "年份": year,
+                                 "金额大于": "10万", "金额小于": "500万", "分组": "案由", "need_fields": ["案号"]})
+    return stats["案件数"], stats["涉案金额总和"], {k: v["涉案金额总和"] for k, v in stats["分组"].items()}
+
+
+def measure(func, apis: ApiSet, queries: list[tuple[str, int]]) -> tuple[float, list]:
+    """ms/次"""
+    start = time.perf_counter()
+    results = [func(apis, company, year) for company, year in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e3, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="legal_doc 的行数")
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'cases/co':>9} {'load s':>7} {'rows ms':>8} {'columns ms':>11} {'speedup':>8}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            make_data(data_dir, rows, args.companies)
+            build(data_dir, data_dir / "store.sqlite")
+            store = Store(data_dir / "store.sqlite")
+            apis = ApiSet(store, latency=0)
+            start = time.perf_counter()
+            legal_docs(store)  # 首次使用时解析整张表
+            load_time = time.perf_counter() - start
+
+            rng = random.Random(1)
+            queries = [(f"虚构公司{rng.randrange(args.companies):05d}有限公司", 2020) for _ in range(args.queries)]
+            rows_ms, expected = measure(by_rows, apis, queries)
+            columns_ms, actual = measure(by_columns, apis, queries)
+            for (n1, t1, g1), (n2, t2, g2) in zip(expected, actual):
+                assert n1 == n2 and math.isclose(t1, t2) and g1.keys() == g2.keys(), (n1, t1, n2, t2)
+            print(f"{rows:>8} {rows // args.companies:>9} {load_time:>7.2f} {rows_ms:>8.2f} {columns_ms:>11.2f}"
+                  f" {rows_ms / columns_ms:>7.0f}x")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
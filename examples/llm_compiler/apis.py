@@ -0,0 +1,526 @@
+"""赛题 API (API_0 ~ API_23) 的本地实现, 以及裁判文书统计 API_24、实体名称解析 API_25
+
+原赛题的 API 是远程接口; 这里按 data_description.md 中的表结构在本地实现, 数据放在数据目录下,
+每张表一个文件, 文件名为表名 (`company_info.jsonl` 或 `company_info.csv`, 每行一条记录).
+数据目录由 LLM_COMPILER_DATA_DIR 指定, 默认为本目录下的 data/ (赛题数据, 不随仓库提供),
+不存在时使用 sample_data/ (虚构的小数据集, 用于离线演示).
+LLM_COMPILER_API_LATENCY (秒) 给每次调用加上固定延迟, 用于模拟原赛题远程接口的耗时.
+
+- API_0 ~ API_16: 按主键查询整行 (数据存储与索引见 store.py) / 按 where 条件查询多行, 可以用 need_fields 只返回部分字段;
+  查无结果时抛出 `ApiError` (交给规划器重新规划, 例如改用公司简称查询); where 条件查询没有结果时返回空列表.
+  按单列键查询的 API 的键可以是列表, 一次取回所有键的结果 (批量查询, 见 `KeyLookup`)
+- API_17 / API_18: 排序、算术, 金额文本解析后用 NumPy 计算
+- API_19 ~ API_23: 写文书, 返回文书文本
+- API_24: 一家公司的裁判文书按角色/年份/金额过滤后的计数、涉案金额求和、分组 (赛题之外新增, 只查 legal_doc 一张表;
+  文本列在首次使用时解析成 NumPy 数组, 见 aggregate.py), 代替 API_6 取回全部文书后逐项调用 API_18
+- API_25: 实体名称解析 (赛题之外新增, 见 resolve.py): 简称、曾用名、代码、部分地址 -> 规范名称;
+  按名称查询的 API 查无结果时, 错误信息中也附上相近的规范名称, 重新规划时可以直接使用
+- 其余赛题 API 各只做一件事, 不提供组合多个赛题 API 的工具 (赛题限制); API_24、API_25 是上面说明的新增 API
+
+用法:
+    apis = ApiSet()                  # 或 ApiSet(Tables(data_dir)): 不建索引, 直接读表文件
+    apis.call("API_2", {"统一社会信用代码": "91000000MA00000001"})
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from aggregate import CASE_FIELDS, GROUP_KEYS, ROLES, SORT_KEYS, legal_docs, parse_amount, parse_amounts, parse_date
+from resolve import KINDS, entity_index, suggest
+from store import Store, default_data_dir, open_store, read_table
+
+class ApiError(Exception):
+    """参数错误或查无结果, 作为失败信息交给规划器"""
+
+
+class Tables:
+    """按表名读取数据目录下的记录, 首次访问时加载, 之后常驻内存; 查询时逐行比较, 不建索引
+
+    数据量大时用 `store.Store` (SQLite + 索引), 两者接口相同
+    """
+
+    def __init__(self, data_dir: str | Path | None = None):
+        self.data_dir = Path(data_dir) if data_dir is not None else default_data_dir()
+        self._tables: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+
+    def rows(self, table: str) -> list[dict]:
+        with self._lock:
+            if table not in self._tables:
+                self._tables[table] = read_table(self.data_dir, table)
+            return self._tables[table]
+
+    def select(self, table: str, conds: Mapping[str, Any]) -> list[dict]:
+        return [row for row in self.rows(table) if all(row.get(k) == v for k, v in conds.items())]
+
+    def select_many(self, table: str, column: str, values: Iterable[Any]) -> dict[Any, list[dict]]:
+        """一次扫描取回 column 等于 values 中任一值的行, 按值分组"""
+        wanted = set(values)
+        found: dict[Any, list[dict]] = {}
+        for row in self.rows(table):
+            if (value := row.get(column)) in wanted:
+                found.setdefault(value, []).append(row)
+        return found
+
+
+@dataclass(frozen=True)
+class ApiSpec:
+    name: str
+    description: str
+    params: dict[str, str]  # 参数名 -> 说明, 规划器的提示词由此生成
+    func: Callable[..., Any]  # func(tables, **args)
+
+
+def _project(row: dict, need_fields: Iterable[str] | None) -> dict:
+    if not need_fields:
+        return dict(row)
+    if unknown := [f for f in need_fields if f not in row]:
+        raise ApiError(f"unknown fields: {', '.join(unknown)}")
+    return {f: row[f] for f in need_fields}
+
+
+def _conditions(args: dict, keys: Iterable[str], *, exactly_one: bool = False) -> dict:
+    conds = {k: v for k, v in args.items() if k in keys and v not in (None, "")}
+    if not conds:
+        raise ApiError(f"需要参数: {' / '.join(keys)}")
+    if exactly_one and len(conds) > 1:
+        raise ApiError(f"只能给出一个参数: {' / '.join(keys)}")
+    return conds
+
+
+def _get_one(tables: Tables, table: str, conds: dict, need_fields: list[str] | None) -> dict:
+    rows = tables.select(table, conds)
+    if not rows:
+        raise ApiError(f"{table} 中没有 {json.dumps(conds, ensure_ascii=False)} 的记录")
+    return _project(rows[0], need_fields)
+
+
+def _key_value(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ApiError(f"invalid key {value!r}")
+
+
+class KeyLookup:
+    """按单列键查询 (API_0 ~ API_11, API_14 ~ API_16)
+
+    键可以是一个值, 也可以是一组值 (批量查询, 一次访问数据源取回): 此时返回与之等长的列表,
+    主键查询的每项为一行或 None (查无结果), where 条件查询 (many=True) 的每项为行列表.
+    `batch` 把同一 API 的多次单键调用合并成一次查询, 供调度器与 `loader.BatchLoader` 使用.
+    """
+
+    def __init__(self, table: str, *keys: str, many: bool = False, fields: tuple[str, ...] | None = None):
+        self.table = table
+        self.keys = keys
+        self.many = many
+        self.fields = fields  # 未给出 need_fields 时返回的字段, None 表示整行
+
+    def parse(self, args: dict) -> tuple[str, str | list[str], list[str] | None]:
+        """返回 (键列, 键值, need_fields)"""
+        args = dict(args)
+        need_fields = args.pop("need_fields", None) or self.fields
+        if unknown := [k for k in args if k not in self.keys]:
+            raise ApiError(f"unexpected arguments: {', '.join(unknown)}")
+        ((column, value),) = _conditions(args, self.keys, exactly_one=True).items()
+        value = [_key_value(v) for v in value] if isinstance(value, list) else _key_value(value)
+        return column, value, need_fields
+
+    def _result(
+        self, tables: Tables, column: str, value: str, rows: list[dict], need_fields: list[str] | None
+    ) -> Any:
+        if self.many:
+            return [_project(row, need_fields) for row in rows]
+        if not rows:
+            message = f"{self.table} 中没有 {json.dumps({column: value}, ensure_ascii=False)} 的记录"
+            if hint := suggest(tables, self.table, column, value):
+                message += f"; {hint}"
+            raise ApiError(message)
+        return _project(rows[0], need_fields)
+
+    def _list_result(
+        self, tables: Tables, column: str, values: list[str], found: dict[str, list[dict]], need_fields: list[str] | None
+    ) -> list:
+        if self.many:
+            return [self._result(tables, column, v, found.get(v, []), need_fields) for v in values]
+        return [_project(found[v][0], need_fields) if found.get(v) else None for v in values]
+
+    def __call__(self, tables: Tables, **args) -> Any:
+        column, value, need_fields = self.parse(args)
+        if not isinstance(value, list):
+            return self._result(tables, column, value, tables.select(self.table, {column: value}), need_fields)
+        return self._list_result(tables, column, value, tables.select_many(self.table, column, value), need_fields)
+
+    def batch(self, tables: Tables, calls: list[dict]) -> list[tuple[Any, str | None]]:
+        """多次调用按键列分组, 每组一次 select_many; 返回每次调用的 (结果, 错误信息)
+        键为一组值的调用 (如 "$1[*].案号") 与单键调用合并查询, 结果与单独调用时相同"""
+        parsed: list[tuple[str, str | list[str], list[str] | None] | ApiError] = []
+        groups: dict[str, set[str]] = {}
+        for args in calls:
+            try:
+                column, value, need_fields = self.parse(args)
+            except ApiError as e:
+                parsed.append(e)
+                continue
+            parsed.append((column, value, need_fields))
+            groups.setdefault(column, set()).update(value if isinstance(value, list) else [value])
+        found = {column: tables.select_many(self.table, column, list(values)) for column, values in groups.items()}
+        results = []
+        for item in parsed:
+            if isinstance(item, ApiError):
+                results.append((None, str(item)))
+                continue
+            column, value, need_fields = item
+            try:
+                if isinstance(value, list):
+                    results.append((self._list_result(tables, column, value, found[column], need_fields), None))
+                    continue
+                results.append((self._result(tables, column, value, found[column].get(value, []), need_fields), None))
+            except ApiError as e:
+                results.append((None, str(e)))
+        return results
+
+
+def _resolve(tables: Tables, 名称: str, 类型: str | None = None, limit: int = 5, 最大编辑距离: int = 0) -> list[dict]:
+    if 类型 not in (None, "") and 类型 not in KINDS:
+        raise ApiError(f"类型 must be one of {', '.join(KINDS)}")
+    if not isinstance(名称, str) or not 名称.strip():
+        raise ApiError("名称 must be a non-empty string")
+    try:
+        limit, max_edits = int(limit), int(最大编辑距离 or 0)
+    except (TypeError, ValueError):
+        raise ApiError("limit / 最大编辑距离 must be integers") from None
+    matches = entity_index(tables).resolve(名称, kind=类型 or None, limit=limit, max_edits=min(max_edits, 2))
+    return [m.to_dict() for m in matches]
+
+
+def _get_address_code(tables: Tables, need_fields: list[str] | None = None, **args) -> dict:
+    if "区县区划代码" in args:
+        return _get_one(tables, "addr_code", {"区县区划代码": args["区县区划代码"]}, need_fields)
+    return _get_one(tables, "addr_code", _conditions(args, ("省份", "城市", "区县")), need_fields)
+
+
+def _get_temp_info(tables: Tables, 省份: str, 城市: str, 日期: str, need_fields: list[str] | None = None) -> dict:
+    return _get_one(tables, "temp_info", {"省份": 省份, "城市": 城市, "日期": 日期}, need_fields)
+
+
+def _number(value: Any) -> float:
+    """数字或 "12.5"、"3万"、"1.2亿元" 这样的文本"""
+    x = parse_amount(value)
+    if math.isnan(x):
+        raise ApiError(f"not a number: {value!r}")
+    return x
+
+
+def _numbers(values: list) -> np.ndarray:
+    numbers = parse_amounts(values)
+    if (bad := np.flatnonzero(np.isnan(numbers))).size:
+        raise ApiError(f"not a number: {values[bad[0]]!r}")
+    return numbers
+
+
+def _rank(tables: Tables, keys: list, values: list, is_desc: bool = False) -> list:
+    """按 values 对 keys 排序 (稳定排序, 相等的值保持原顺序)"""
+    if len(keys) != len(values):
+        raise ApiError("keys and values must have the same length")
+    numbers = _numbers(values)
+    order = np.argsort(-numbers if is_desc else numbers, kind="stable")
+    return [keys[i] for i in order]
+
+
+_ARITHMETIC = {
+    "sum": np.sum,
+    "count": len,
+    "max": np.max,
+    "min": np.min,
+    "mean": np.mean,
+}
+
+
+def _calculate(tables: Tables, nums: list, op: str = "sum") -> float:
+    if op not in _ARITHMETIC:
+        raise ApiError(f"op must be one of {', '.join(_ARITHMETIC)}")
+    if op == "count":
+        return len(nums)
+    numbers = _numbers(nums)
+    if not numbers.size and op != "sum":
+        raise ApiError(f"{op} of an empty list")
+    return float(_ARITHMETIC[op](numbers))
+
+
+def _date(value: Any) -> str | None:
+    if value in (None, ""):
+        return None
+    date = parse_date(value)
+    if np.isnat(date):
+        raise ApiError(f"invalid date: {value!r}")
+    return str(date)
+
+
+def _is_company_name(tables: Tables, name: str) -> bool:
+    """name 是否为某家公司的规范名称 (公司存在但没有裁判文书时, 统计结果就是 0 件)"""
+    return any(m.name == name for m in entity_index(tables).resolve(name, kind="公司", limit=1))
+
+
+def _legal_doc_stats(
+    tables: Tables,
+    关联公司: str,
+    角色: str | None = None,
+    年份: int | str | None = None,
+    日期起: str | None = None,
+    日期止: str | None = None,
+    金额大于: Any = None,
+    金额小于: Any = None,
+    有金额: bool = False,
+    排序: str | None = None,
+    降序: bool = False,
+    分组: str | None = None,
+    need_fields: list[str] | None = None,
+) -> dict:
+    if 角色 not in (None, "") and 角色 not in ROLES:
+        raise ApiError(f"角色 must be one of {', '.join(ROLES)}")
+    if 排序 not in (None, "") and 排序 not in SORT_KEYS:
+        raise ApiError(f"排序 must be one of {', '.join(SORT_KEYS)}")
+    if 分组 not in (None, "") and 分组 not in GROUP_KEYS:
+        raise ApiError(f"分组 must be one of {', '.join(GROUP_KEYS)}")
+    if unknown := [f for f in need_fields or () if f not in CASE_FIELDS]:
+        raise ApiError(f"unknown fields: {', '.join(unknown)}")
+    try:
+        year = int(年份) if 年份 not in (None, "") else None
+    except ValueError:
+        raise ApiError(f"invalid 年份: {年份!r}") from None
+    docs = legal_docs(tables)
+    if not len(docs.company_rows(关联公司)) and not _is_company_name(tables, 关联公司):
+        # 名称写错 (简称、错字) 时不返回 0 件, 而是像按名称查询的 API 一样报错并附上相近的名称
+        message = f"legal_doc 中没有 {json.dumps({'关联公司': 关联公司}, ensure_ascii=False)} 的记录"
+        if hint := suggest(tables, "legal_doc", "关联公司", 关联公司):
+            message += f"; {hint}"
+        raise ApiError(message)
+    result = docs.query(
+        关联公司,
+        role=ROLES.get(角色 or "", 0),
+        year=year,
+        date_from=_date(日期起),
+        date_to=_date(日期止),
+        amount_gt=_number(金额大于) if 金额大于 not in (None, "") else None,
+        amount_lt=_number(金额小于) if 金额小于 not in (None, "") else None,
+        with_amount=bool(有金额),
+        sort_by=排序 or None,
+        desc=bool(降序),
+        group_by=分组 or None,
+    )
+    cases = docs.records(result.rows, need_fields or CASE_FIELDS)
+    stats = {
+        "关联公司": 关联公司,
+        "案件数": len(cases),
+        "有金额的案件数": result.with_amount,
+        "涉案金额总和": result.total,
+        "案件": cases,
+    }
+    if result.groups is not None:
+        stats["分组"] = result.groups
+    return stats
+
+
+def _render(value: Any) -> str:
+    if isinstance(value, dict):
+        return "; ".join(f"{k}: {v}" for k, v in value.items())
+    return str(value)
+
+
+def _report(tables: Tables, title: str, items: list[dict]) -> str:
+    lines = [f"# {title}", ""]
+    for i, item in enumerate(items, 1):
+        lines.append(f"## {i}")
+        lines.extend(f"- {k}: {v}" for k, v in item.items())
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _complaint(kind: str) -> Callable[..., str]:
+    def api(
+        tables: Tables,
+        原告: dict,
+        被告: dict,
+        诉讼请求: str,
+        事实和理由: str,
+        法院名称: str,
+        起诉日期: str,
+        原告委托诉讼代理人: dict | None = None,
+        被告委托诉讼代理人: dict | None = None,
+        证据: str = "",
+    ) -> str:
+        lines = ["民事起诉状", f"({kind})", f"原告: {_render(原告)}"]
+        if 原告委托诉讼代理人:
+            lines.append(f"原告委托诉讼代理人: {_render(原告委托诉讼代理人)}")
+        lines.append(f"被告: {_render(被告)}")
+        if 被告委托诉讼代理人:
+            lines.append(f"被告委托诉讼代理人: {_render(被告委托诉讼代理人)}")
+        lines += [f"诉讼请求: {诉讼请求}", f"事实和理由: {事实和理由}"]
+        if 证据:
+            lines.append(f"证据: {证据}")
+        lines += ["此致", 法院名称, "起诉人: " + str(原告.get("姓名") or 原告.get("名称") or ""), f"日期: {起诉日期}"]
+        return "\n".join(lines)
+
+    return api
+
+
+_NEED_FIELDS = "可选, list, 只返回这些字段"
+_PARTY = "dict, 公民: 姓名/性别/生日/民族/工作单位/地址/联系方式; 公司: 名称/地址/法定代表人/联系方式"
+_COMPLAINT_PARAMS = {
+    "原告": _PARTY,
+    "被告": _PARTY,
+    "原告委托诉讼代理人": "可选, dict: 律师事务所名称/地址/联系方式",
+    "被告委托诉讼代理人": "可选, dict: 律师事务所名称/地址/联系方式",
+    "诉讼请求": "str",
+    "事实和理由": "str",
+    "证据": "可选, str",
+    "法院名称": "str",
+    "起诉日期": "str, YYYY-MM-DD",
+}
+
+API_SPECS: list[ApiSpec] = [
+    ApiSpec("API_0", "上市公司基本信息 (CompanyInfo), 按 公司名称 / 公司简称 / 公司代码 之一查询整行",
+            {"公司名称|公司简称|公司代码": "三者给出其一", "need_fields": _NEED_FIELDS},
+            KeyLookup("company_info", "公司名称", "公司简称", "公司代码")),
+    ApiSpec("API_1", "公司工商注册信息 (CompanyRegister), 按公司名称查询整行",
+            {"公司名称": "公司全称", "need_fields": _NEED_FIELDS}, KeyLookup("company_register", "公司名称")),
+    ApiSpec("API_2", "按统一社会信用代码查询公司名称, 返回 {\"公司名称\": ...}",
+            {"统一社会信用代码": "str"}, KeyLookup("company_register", "统一社会信用代码", fields=("公司名称",))),
+    ApiSpec("API_3", "子公司信息 (SubCompanyInfo): 按子公司名称查询其母公司 (关联上市公司全称)、参股比例、投资金额",
+            {"公司名称": "子公司全称", "need_fields": _NEED_FIELDS}, KeyLookup("sub_company_info", "公司名称")),
+    ApiSpec("API_4", "按母公司全称查询其全部子公司, 返回列表",
+            {"关联上市公司全称": "母公司全称", "need_fields": _NEED_FIELDS},
+            KeyLookup("sub_company_info", "关联上市公司全称", many=True)),
+    ApiSpec("API_5", "裁判文书 (LegalDoc), 按案号查询整行; 字段: 关联公司/标题/案号/文书类型/原告/被告/"
+            "原告律师事务所/被告律师事务所/案由/涉案金额/判决结果/日期/文件名",
+            {"案号": "如 (2019)沪0115民初61975号", "need_fields": _NEED_FIELDS}, KeyLookup("legal_doc", "案号")),
+    ApiSpec("API_6", "按关联公司查询其全部裁判文书, 返回列表 (关联公司可能是原告、被告或都不是, 需要再按原告/被告过滤)",
+            {"关联公司": "公司全称", "need_fields": _NEED_FIELDS}, KeyLookup("legal_doc", "关联公司", many=True)),
+    ApiSpec("API_7", "法院基本信息 (CourtInfo): 法院负责人/成立日期/法院地址/法院联系电话/法院官网",
+            {"法院名称": "str", "need_fields": _NEED_FIELDS}, KeyLookup("court_info", "法院名称")),
+    ApiSpec("API_8", "法院代字表 (CourtCode), 按法院名称或法院代字 (案号中的 沪0115 这类部分) 查询: 法院名称/行政级别/法院级别/法院代字/区划代码/级别",
+            {"法院名称|法院代字": "二者给出其一", "need_fields": _NEED_FIELDS},
+            KeyLookup("court_code", "法院名称", "法院代字")),
+    ApiSpec("API_9", "律师事务所信息 (LawfirmInfo): 唯一编码/负责人/注册资本/成立日期/地址/通讯电话/通讯邮箱/登记机关",
+            {"律师事务所名称": "str", "need_fields": _NEED_FIELDS}, KeyLookup("lawfirm_info", "律师事务所名称")),
+    ApiSpec("API_10", "律师事务所业务数据 (LawfirmLog): 业务量排名/服务已上市公司/违规事件/立案调查",
+            {"律师事务所名称": "str", "need_fields": _NEED_FIELDS}, KeyLookup("lawfirm_log", "律师事务所名称")),
+    ApiSpec("API_11", "按地址查询省份/城市/区县",
+            {"地址": "str", "need_fields": _NEED_FIELDS}, KeyLookup("addr_info", "地址")),
+    ApiSpec("API_12", "区划代码 (AddrCode): 按 省份+城市+区县 或 区县区划代码 查询 城市区划代码/区县区划代码",
+            {"省份": "str", "城市": "str", "区县": "str", "区县区划代码": "可选, 给出时忽略其余条件",
+             "need_fields": _NEED_FIELDS},
+            _get_address_code),
+    ApiSpec("API_13", "天气 (TempInfo), 按 日期+省份+城市 查询: 天气/最高温度/最低温度/湿度",
+            {"日期": "str, 如 2020年1月1日", "省份": "str", "城市": "str", "need_fields": _NEED_FIELDS},
+            _get_temp_info),
+    ApiSpec("API_14", "裁判文书摘要 (LegalAbstract), 按案号查询: 文件名/案号/文本摘要",
+            {"案号": "str", "need_fields": _NEED_FIELDS}, KeyLookup("legal_abstract", "案号")),
+    ApiSpec("API_15", "限制高消费信息 (XzgxfInfo), 按案号查询: 限制高消费企业名称/法定代表人/申请人/涉案金额/执行法院/立案日期/限高发布日期",
+            {"案号": "str", "need_fields": _NEED_FIELDS}, KeyLookup("xzgxf_info", "案号")),
+    ApiSpec("API_16", "按限制高消费企业名称查询全部限制高消费记录, 返回列表",
+            {"限制高消费企业名称": "公司全称", "need_fields": _NEED_FIELDS},
+            KeyLookup("xzgxf_info", "限制高消费企业名称", many=True)),
+    ApiSpec("API_17", "排序: 按 values (数字或 \"3万\" 这类金额) 对 keys 排序, 返回排序后的 keys",
+            {"keys": "list", "values": "list, 与 keys 等长", "is_desc": "可选, bool, 是否降序"}, _rank),
+    ApiSpec("API_18", "算术: 对一组数字 (或金额文本) 求 sum/count/max/min/mean",
+            {"nums": "list", "op": "可选, sum|count|max|min|mean, 默认 sum"}, _calculate),
+    ApiSpec("API_19", "整理报告: 把若干条记录写成一份报告, 返回报告文本",
+            {"title": "str", "items": "list[dict]"}, _report),
+    ApiSpec("API_20", "写民事起诉状: 公民起诉公民", _COMPLAINT_PARAMS, _complaint("公民起诉公民")),
+    ApiSpec("API_21", "写民事起诉状: 公司起诉公民", _COMPLAINT_PARAMS, _complaint("公司起诉公民")),
+    ApiSpec("API_22", "写民事起诉状: 公民起诉公司", _COMPLAINT_PARAMS, _complaint("公民起诉公司")),
+    ApiSpec("API_23", "写民事起诉状: 公司起诉公司", _COMPLAINT_PARAMS, _complaint("公司起诉公司")),
+    ApiSpec("API_24", "裁判文书统计: 按关联公司取其全部案件, 按角色/年份/日期/涉案金额过滤, 一次返回 案件数、有金额的案件数、"
+            "涉案金额总和 (元) 及案件列表 (案号/涉案金额 (元)/日期/年份/角色/案由), 可按年份/角色/案由分组统计",
+            {"关联公司": "公司全称", "角色": "可选, 原告|被告", "年份": "可选, int, 案号中的年份 (立案/起诉年份)",
+             "日期起": "可选, YYYY-MM-DD, 含当日", "日期止": "可选, YYYY-MM-DD, 含当日",
+             "金额大于": "可选, 数字或 \"1万\" 这类金额", "金额小于": "可选, 同上", "有金额": "可选, bool, 只保留有涉案金额的案件",
+             "排序": "可选, 涉案金额|日期|案号", "降序": "可选, bool", "分组": "可选, 年份|角色|案由",
+             "need_fields": "可选, list, 案件列表只返回这些字段"},
+            _legal_doc_stats),
+    ApiSpec("API_25", "实体名称解析: 把问题中公司 (全称/简称/曾用名/公司代码/统一社会信用代码)、法院 (名称/法院代字)、"
+            "律师事务所、地址 (可以只有一部分) 的写法映射到数据中的规范名称, 按得分从高到低返回候选 "
+            "[{名称, 类型, 匹配字段, 匹配文本, 得分}]; 名称写法不确定时先用它得到规范名称再查询",
+            {"名称": "str", "类型": f"可选, {'|'.join(KINDS)}", "limit": "可选, int, 默认 5",
+             "最大编辑距离": "可选, int (0~2), 大于 0 时还查找有错字的名称, 较慢"},
+            _resolve),
+]
+
+
+class ApiSet:
+    """API 名称 -> 实现; 线程安全, 供调度器并发调用
+
+    tables 默认为 `open_store()`: 数据目录对应的 SQLite 文件, 不存在或过期时先构建.
+    实体名称索引 (API_25 与查无结果时的相近名称) 在创建时构建, 而不是在第一次查询时 (10 万家公司约需数秒).
+    round_trips 统计访问数据源的次数 (原赛题中即网络往返次数): call 每次一次, call_batch 对可批量的 API 只算一次
+    """
+
+    def __init__(
+        self, tables: Tables | Store | None = None, specs: Iterable[ApiSpec] = API_SPECS, latency: float | None = None
+    ):
+        self.tables = tables if tables is not None else open_store()
+        entity_index(self.tables)
+        self.specs = {spec.name: spec for spec in specs}
+        self.latency = latency if latency is not None else float(os.environ.get("LLM_COMPILER_API_LATENCY") or 0)
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.specs
+
+    def describe(self) -> str:
+        """API 说明, 用于规划器的提示词"""
+        lines = []
+        for spec in self.specs.values():
+            params = ", ".join(f"{k} ({v})" for k, v in spec.params.items())
+            lines.append(f"- {spec.name}: {spec.description}\n  参数: {params}")
+        return "\n".join(lines)
+
+    def batchable(self, name: str) -> bool:
+        return name in self.specs and isinstance(self.specs[name].func, KeyLookup)
+
+    def _round_trip(self) -> None:
+        with self._lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def call(self, name: str, args: dict) -> Any:
+        if name not in self.specs:
+            raise ApiError(f"unknown api {name!r}")
+        if not isinstance(args, dict):
+            raise ApiError("args must be an object")
+        self._round_trip()
+        try:
+            return self.specs[name].func(self.tables, **args)
+        except TypeError as e:
+            # 缺少或多出参数
+            raise ApiError(f"{name}: {e}") from None
+
+    def call_batch(self, name: str, calls: list[dict]) -> list[tuple[Any, str | None]]:
+        """同一 API 的多次调用, 返回每次调用的 (结果, 错误信息);
+        可批量的 API (`KeyLookup`) 合并成一次查询, 其余逐个调用"""
+        if not self.batchable(name):
+            results = []
+            for args in calls:
+                try:
+                    results.append((self.call(name, args), None))
+                except ApiError as e:
+                    results.append((None, str(e)))
+            return results
+        if bad := [args for args in calls if not isinstance(args, dict)]:
+            raise ApiError(f"args must be an object: {bad[0]!r}")
+        self._round_trip()
+        return self.specs[name].func.batch(self.tables, calls)
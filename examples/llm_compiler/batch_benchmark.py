@@ -0,0 +1,93 @@
+"""扇出查询的基准测试: 逐个调用 vs foreach 批量查询 vs 再加上 BatchLoader 合并
+
+模拟 "某公司涉及的各案件的原告的公司代码分别是" 这类题目的计划 (数据由 store_benchmark.make_data 生成):
+    1. API_0  按公司简称查公司名称
+    2. API_6  查该公司的全部文书                  (约 rows / companies 条)
+    3. API_5  foreach 案号: 查每个案件的原告
+    4. API_0  foreach 原告: 查公司代码
+    5. API_5  案号为 "$2[*].案号" 的一次批量查询: 查每个案件的被告 (键为一组值的调用经 BatchLoader 时同样合并)
+--questions 道这样的题同时执行 (共用一个调度器), 每次访问数据源附加 --latency 秒的延迟 (模拟网络往返),
+统计数据源访问次数 (往返次数) 与总耗时.
+
+三种方式:
+- per-call: 每个调用一次往返 (foreach 的各项并行执行)
+- batched: foreach 调用可批量的 API 时合并成一次 call_batch
+- batched+loader: 另外用 BatchLoader 合并不同题目同时发起的单键调用 (步骤 1、2)
+
+用法:
+    python examples/llm_compiler/batch_benchmark.py --rows 20000 --questions 8 --latency 0.05
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from apis import ApiSet
+from executor import Scheduler
+from loader import BatchLoader
+from planner import Task
+from store import Store, build
+from store_benchmark import make_data
+
+
+def make_plan(short_name: str) -> list[Task]:
+    return [Task.from_dict(t) for t in [
+        {"id": 1, "api": "API_0", "args": {"公司简称": short_name, "need_fields": ["公司名称"]}},
+        {"id": 2, "api": "API_6", "args": {"关联公司": "$1.公司名称", "need_fields": ["案号"]}},
+        {"id": 3, "api": "API_5", "foreach": "$2[*].案号", "args": {"案号": "$item", "need_fields": ["原告"]}},
+        {"id": 4, "api": "API_0", "foreach": "$3[*].原告", "args": {"公司名称": "$item", "need_fields": ["公司代码"]}},
+        {"id": 5, "api": "API_5", "args": {"案号": "$2[*].案号", "need_fields": ["被告"]}},
+    ]]
+
+
+def run(store: Store, plans: list[list[Task]], latency: float, batch_foreach: bool, use_loader: bool):
+    apis = ApiSet(store, latency=latency)
+    loader = BatchLoader(apis, window=0.002) if use_loader else None
+    scheduler = Scheduler(apis, max_workers=64, loader=loader, batch_foreach=batch_foreach)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(plans)) as pool:
+        executions = list(pool.map(scheduler.run, plans))
+    elapsed = time.perf_counter() - start
+    scheduler.close()
+    assert all(e.error is None for e in executions), [e.error for e in executions]
+    return sum(e.calls for e in executions), apis.round_trips, elapsed, [e.results for e in executions]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="legal_doc 的行数")
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=8, help="同时执行的题数")
+    parser.add_argument("--latency", type=float, default=0.05, help="每次访问数据源的延迟 (秒)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        make_data(data_dir, args.rows, args.companies)
+        build(data_dir, data_dir / "store.sqlite")
+        store = Store(data_dir / "store.sqlite")
+        rng = random.Random(0)
+        plans = [make_plan(f"虚构{rng.randrange(args.companies):05d}") for _ in range(args.questions)]
+
+        print(f"{'mode':<16} {'calls':>6} {'round trips':>12} {'seconds':>8}")
+        expected = None
+        for mode, batch_foreach, use_loader in [
+            ("per-call", False, False),
+            ("batched", True, False),
+            ("batched+loader", True, True),
+        ]:
+            calls, round_trips, elapsed, results = run(store, plans, args.latency, batch_foreach, use_loader)
+            # 三种方式的结果应当完全一致
+            assert expected is None or results == expected, mode
+            expected = results
+            print(f"{mode:<16} {calls:>6} {round_trips:>12} {elapsed:>8.2f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
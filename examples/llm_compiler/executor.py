@@ -0,0 +1,187 @@
+"""计划的调度执行: 依赖就绪的调用立即并行执行, 结果直接代入后续调用的参数
+
+- 任务的所有依赖完成后立即提交到线程池, 不按层等待: 一条依赖链的快慢不影响其它链
+- foreach 任务展开成多个调用: 可批量的 API (按键查询) 合并成一次 `ApiSet.call_batch`, 其余同时提交;
+  全部完成后按原顺序组成该任务的结果
+- 给出 loader (`loader.BatchLoader`) 时, 单个调用经它执行, 不同任务、不同题目中同时发起的同一 API 的调用会被合并
+- 某个任务失败 (API 报错、引用的字段不存在) 后不再提交新任务; 已在执行的调用执行完,
+  其结果保留给重新规划使用, 未开始的调用取消
+- 统计: 实际调用次数 (即串行执行时的调用次数)、提交的请求数 (批量调用算一次)、关键路径深度、
+  各请求耗时之和 (串行耗时) 与实际耗时
+
+用法:
+    scheduler = Scheduler(ApiSet())
+    execution = scheduler.run(tasks)
+    execution.results, execution.error, execution.calls, execution.depth
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any
+
+from apis import ApiError, ApiSet
+from loader import BatchLoader
+from planner import Task, UnresolvedReference, critical_path, resolve
+
+
+@dataclass
+class Execution:
+    results: dict[int, Any] = field(default_factory=dict)
+    depth: int = 0  # 已开始执行的任务 (包括失败的) 的最大层数, 即这次执行中 API 调用的轮数
+    error: str | None = None  # 第一个失败任务的错误信息
+    failed: int | None = None  # 第一个失败任务的 id
+    calls: int = 0
+    requests: int = 0  # 提交的请求数, 合并成一次的 foreach 调用算一次
+    serial_time: float = 0.0  # 各请求耗时之和
+    wall_time: float = 0.0
+
+
+class _Running:
+    """一个任务中还未完成的请求"""
+
+    def __init__(self, task: Task, requests: int, calls: int):
+        self.task = task
+        self.calls = calls
+        self.values: list[Any] = [None] * requests
+        self.remaining = requests
+
+
+class Scheduler:
+    """
+    Args:
+        apis: API 实现
+        max_workers: 同时执行的调用数上限 (所有题目共用)
+        loader: 合并并发单键调用的 `BatchLoader`, None 表示直接调用
+        batch_foreach: foreach 调用可批量的 API 时是否合并成一次请求
+    """
+
+    def __init__(
+        self, apis: ApiSet, max_workers: int = 16, loader: BatchLoader | None = None, batch_foreach: bool = True
+    ):
+        self.apis = apis
+        self.loader = loader
+        self.batch_foreach = batch_foreach
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self._lock = threading.Lock()
+        self.total_calls = 0
+
+    def _call(self, api: str, args: dict) -> tuple[Any, float, str | None]:
+        """返回 (结果, 耗时, 错误信息)"""
+        start = time.perf_counter()
+        value, error = None, None
+        try:
+            value = (self.loader or self.apis).call(api, args)
+        except ApiError as e:
+            error = str(e)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return value, time.perf_counter() - start, error
+
+    def _call_batch(self, api: str, calls: list[dict]) -> tuple[list[Any], float, str | None]:
+        """一次批量请求; 任一调用出错时返回第一个错误"""
+        start = time.perf_counter()
+        values, error = [], None
+        try:
+            results = self.apis.call_batch(api, calls)
+            values = [value for value, _ in results]
+            error = next((f"item {i}: {e}" for i, (_, e) in enumerate(results) if e is not None), None)
+        except ApiError as e:
+            error = str(e)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return values, time.perf_counter() - start, error
+
+    def _submit(self, task: Task, results: dict[int, Any]) -> tuple[list[tuple[Future, int | None]], int]:
+        """返回 ([(future, 在任务结果中的下标, None 表示整个结果)], 调用次数);
+        引用无法解析时抛出 UnresolvedReference"""
+        if task.foreach is None:
+            args = resolve(task.args, results)
+            return [(self._executor.submit(self._call, task.api, args), 0)], 1
+        items = resolve(task.foreach, results)
+        if not isinstance(items, list):
+            raise UnresolvedReference(f"foreach {task.foreach} is not a list")
+        calls = [resolve(task.args, results, item) for item in items]
+        if self.batch_foreach and len(calls) > 1 and self.apis.batchable(task.api):
+            return [(self._executor.submit(self._call_batch, task.api, calls), None)], len(calls)
+        return [(self._executor.submit(self._call, task.api, args), i) for i, args in enumerate(calls)], len(calls)
+
+    def run(self, tasks: list[Task], results: dict[int, Any] | None = None) -> Execution:
+        """tasks 须已按依赖顺序排列; results 为此前 (重新规划之前) 已完成任务的结果"""
+        start = time.perf_counter()
+        execution = Execution(dict(results or {}))
+        levels = critical_path(tasks)
+        waiting = {t.id: {d for d in t.deps if d not in execution.results} for t in tasks}
+        dependents: dict[int, list[Task]] = {}
+        for task in tasks:
+            for d in waiting[task.id]:
+                dependents.setdefault(d, []).append(task)
+        futures: dict[Future, tuple[_Running, int | None]] = {}
+
+        def finish(task: Task, value: Any) -> list[Task]:
+            execution.results[task.id] = value
+            ready = []
+            for dependent in dependents.get(task.id, ()):
+                waiting[dependent.id].discard(task.id)
+                if not waiting[dependent.id]:
+                    ready.append(dependent)
+            return ready
+
+        def fail(task: Task, error: str) -> None:
+            if execution.error is None:
+                execution.error, execution.failed = f"task {task.id} ({task.api}): {error}", task.id
+                # 还没开始的请求不再执行, 也不计入调用次数
+                for future, (running, index) in futures.items():
+                    if future.cancel():
+                        execution.requests -= 1
+                        execution.calls -= running.calls if index is None else 1
+
+        def launch(ready: list[Task]) -> None:
+            while ready and execution.error is None:
+                task = ready.pop()
+                execution.depth = max(execution.depth, levels[task.id])
+                try:
+                    submitted, calls = self._submit(task, execution.results)
+                except UnresolvedReference as e:
+                    fail(task, str(e))
+                    return
+                if not submitted:  # foreach 的列表为空
+                    ready.extend(finish(task, []))
+                    continue
+                running = _Running(task, len(submitted), calls)
+                execution.calls += calls
+                execution.requests += len(submitted)
+                for future, index in submitted:
+                    futures[future] = (running, index)
+
+        launch([t for t in reversed(tasks) if not waiting[t.id]])
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            ready: list[Task] = []
+            for future in done:
+                running, index = futures.pop(future)
+                if future.cancelled():
+                    continue
+                value, elapsed, error = future.result()
+                execution.serial_time += elapsed
+                if error is not None:
+                    fail(running.task, error)
+                    continue
+                if index is None:
+                    running.values = value
+                else:
+                    running.values[index] = value
+                running.remaining -= 1
+                if running.remaining == 0:
+                    value = running.values if running.task.foreach is not None else running.values[0]
+                    ready.extend(finish(running.task, value))
+            launch(ready)
+
+        execution.wall_time = time.perf_counter() - start
+        with self._lock:
+            self.total_calls += execution.calls
+        return execution
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
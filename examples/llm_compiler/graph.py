@@ -0,0 +1,174 @@
+# LLMCompiler 风格的法律数据查询: 规划一次, 并行执行, 失败时才重新规划
+
+r"""
+plan -> execute -> join
+ ^  \       |
+ |   v      v
+ +--- replan (执行失败 / 计划无法解析)
+
+- plan: LLM 一次给出整道题的 API 调用 DAG (格式见 planner.py)
+- execute: 调度器并行执行依赖就绪的调用, 结果直接代入后续调用的参数 (见 executor.py), 不经过 LLM
+- 执行失败 (查无结果、字段不存在等) 或计划无法解析时把已有结果和错误交给 LLM 重新规划剩余部分, 最多 MAX_REPLANS 次
+- join: LLM 根据全部调用结果回答问题 (过滤、计数等推理在这里完成)
+
+一道题的 LLM 调用次数为 2 + 重新规划次数, 与 API 调用次数无关;
+API 的耗时取决于关键路径深度 (depth), 而不是调用次数 (calls).
+
+用法:
+    LLM_BACKEND=mock python examples/llm_compiler/graph.py
+    批量运行 question_c.json 见 run_questions.py
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, TypedDict
+
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage, SystemMessage
+from langgraph.graph import END, START, StateGraph
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 使 examples/common 可导入
+from common.llm import create_chat_model
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from apis import ApiSet
+from executor import Scheduler
+from loader import BatchLoader
+from planner import (
+    JOIN_PROMPT,
+    JOIN_REQUEST,
+    PLAN_REQUEST,
+    PLANNER_PROMPT,
+    REPLAN_REQUEST,
+    PlanError,
+    Task,
+    format_results,
+    parse_plan,
+)
+load_dotenv()
+
+provider = "WILDCARD"
+model = "gpt-5-mini"
+llm = create_chat_model(provider, model)
+
+MAX_REPLANS = 2
+
+apis = ApiSet()
+# 同时发起的同一 API 的单键调用 (不同任务、同时回答的不同题目) 在 2ms 内合并成一次查询
+loader = BatchLoader(apis, window=0.002)
+scheduler = Scheduler(apis, loader=loader)
+planner_prompt = PLANNER_PROMPT.format(apis=apis.describe())
+
+
+class CompilerState(TypedDict, total=False):
+    question: str
+    tasks: list[dict]  # 所有规划过的任务 (Task.to_dict), 包括重新规划的
+    pending: list[dict]  # 本轮计划中待执行的任务
+    results: dict[int, Any]  # 任务 id -> 结果
+    error: str | None
+    invalid_plan: bool  # 最近一次规划的输出无法解析
+    replans: int
+    calls: int  # API 调用次数
+    requests: int  # 调度器提交的请求数, 合并成一次的 foreach 调用算一次
+    depth: int  # API 调用的轮数: 各次执行的关键路径深度之和
+    api_time: float  # 各 API 调用耗时之和
+    api_wall_time: float  # API 执行阶段的实际耗时
+    answer: str
+
+
+def plan(state: CompilerState):
+    tasks = [Task.from_dict(t) for t in state.get("tasks", [])]
+    results = state.get("results", {})
+    if state.get("error") is None:
+        request = PLAN_REQUEST.format(question=state["question"])
+    else:
+        request = REPLAN_REQUEST.format(
+            question=state["question"],
+            done=format_results(tasks, results),
+            error=state["error"],
+            next_id=max((t.id for t in tasks), default=0) + 1,
+        )
+    response = llm.invoke([SystemMessage(planner_prompt), HumanMessage(request)])
+    try:
+        new_tasks = parse_plan(response.content, apis, done=[t.id for t in tasks])
+    except PlanError as e:
+        # 计划无法解析时交给 replan 重新规划; 保留之前的执行错误, 重新规划时 LLM 仍能看到
+        error = f"invalid plan: {e}" if state.get("error") is None else f"{state['error']}; invalid plan: {e}"
+        return {"pending": [], "error": error, "invalid_plan": True}
+    # 重新规划时, 失败任务及其之后未执行的任务被新计划取代
+    kept = [t.to_dict() for t in tasks if t.id in results]
+    # error 保留到新计划执行时由 execute 更新: 重新规划给出空计划时, join 与输出仍能看到未解决的错误
+    return {"tasks": kept + [t.to_dict() for t in new_tasks], "pending": [t.to_dict() for t in new_tasks], "invalid_plan": False}
+
+
+def execute(state: CompilerState):
+    tasks = [Task.from_dict(t) for t in state["pending"]]
+    execution = scheduler.run(tasks, state.get("results"))
+    return {
+        "results": execution.results,
+        "error": execution.error,
+        "calls": state.get("calls", 0) + execution.calls,
+        "requests": state.get("requests", 0) + execution.requests,
+        "depth": state.get("depth", 0) + execution.depth,
+        "api_time": state.get("api_time", 0.0) + execution.serial_time,
+        "api_wall_time": state.get("api_wall_time", 0.0) + execution.wall_time,
+    }
+
+
+def after_plan(state: CompilerState) -> str:
+    if state["pending"]:
+        return "execute"
+    if state.get("invalid_plan") and state.get("replans", 0) < MAX_REPLANS:
+        return "replan"
+    return "join"
+
+
+def after_execute(state: CompilerState) -> str:
+    if state.get("error") is not None and state.get("replans", 0) < MAX_REPLANS:
+        return "replan"
+    return "join"
+
+
+def replan(state: CompilerState):
+    return {"replans": state.get("replans", 0) + 1}
+
+
+def join(state: CompilerState):
+    tasks = [Task.from_dict(t) for t in state.get("tasks", [])]
+    results = format_results(tasks, state.get("results", {}))
+    if state.get("error"):
+        results += f"\n\n未完成: {state['error']}"
+    response = llm.invoke([
+        SystemMessage(JOIN_PROMPT),
+        HumanMessage(JOIN_REQUEST.format(question=state["question"], results=results)),
+    ])
+    return {"answer": response.content}
+
+
+builder = StateGraph(CompilerState)
+builder.add_node("plan", plan)
+builder.add_node("execute", execute)
+builder.add_node("replan", replan)
+builder.add_node("join", join)
+builder.add_edge(START, "plan")
+builder.add_conditional_edges("plan", after_plan, {"execute": "execute", "replan": "replan", "join": "join"})
+builder.add_conditional_edges("execute", after_execute, {"replan": "replan", "join": "join"})
+builder.add_edge("replan", "plan")
+builder.add_edge("join", END)
+graph = builder.compile()
+
+
+if __name__ == "__main__":
+    question = " ".join(sys.argv[1:]) or (
+        "统一社会信用代码为91000000MA00000001的公司的法定代表人是谁? 它涉及哪些案件? "
+        "各案件的摘要是? 原告委托的律师事务所负责人分别是?"
+    )
+    state = graph.invoke({"question": question})
+    for task in state.get("tasks", []):
+        print(json.dumps(task, ensure_ascii=False))
+    print(f"\n{state['answer']}\n")
+    print(
+        f"calls={state.get('calls', 0)} requests={state.get('requests', 0)} depth={state.get('depth', 0)} "
+        f"replans={state.get('replans', 0)} "
+        f"api_time={state.get('api_time', 0.0) * 1e3:.1f}ms api_wall_time={state.get('api_wall_time', 0.0) * 1e3:.1f}ms"
+    )
@@ -0,0 +1,99 @@
+"""DataLoader: 把短时间内对同一 API 的并发单键调用合并成一次批量查询
+
+调度器中互不依赖的任务、同时回答的多道题, 常常在几毫秒内各自发起同一个 API 的单键查询
+(例如若干题都要查 API_9 律师事务所信息). 原赛题中每次调用都是一次网络往返.
+
+`BatchLoader.call(api, args)` 与 `ApiSet.call` 用法相同:
+- 可批量的 API (`apis.KeyLookup`): 第一个调用者等待 window 秒 (或攒够 max_batch 个调用),
+  期间到达的同一 API 的调用排队, 之后由它通过 `ApiSet.call_batch` 一次执行, 结果分发给各调用者
+  (键为一组值的调用, 如 {"案号": "$1[*].案号"}, 也一起合并, 返回与单独调用时相同的列表)
+- 其余 API 直接调用
+
+等待窗口会给每个调用增加至多 window 的延迟, 应远小于一次往返的耗时.
+
+用法:
+    loader = BatchLoader(apis, window=0.002)
+    loader.call("API_9", {"律师事务所名称": "..."})   # 在多个线程中并发调用
+    print(loader.stats)
+"""
+
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any
+
+from apis import ApiError, ApiSet
+
+
+@dataclass
+class LoaderStats:
+    calls: int = 0  # 经过合并的调用数
+    batches: int = 0  # 实际执行的批量查询数
+    max_batch: int = 0
+
+    def __str__(self) -> str:
+        avg = self.calls / self.batches if self.batches else 0.0
+        return f"loader: {self.calls} calls in {self.batches} batches (avg {avg:.1f}, max {self.max_batch})"
+
+
+class _Batch:
+    def __init__(self):
+        self.calls: list[tuple[dict, Future]] = []
+        self.full = threading.Event()
+
+
+class BatchLoader:
+    """
+    Args:
+        apis: API 实现
+        window: 第一个调用到达后等待其它调用的时间 (秒)
+        max_batch: 一批最多合并的调用数, 攒够后立即执行
+    """
+
+    def __init__(self, apis: ApiSet, window: float = 0.002, max_batch: int = 100):
+        self.apis = apis
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = LoaderStats()
+        self._pending: dict[str, _Batch] = {}
+        self._lock = threading.Lock()
+
+    def call(self, name: str, args: dict) -> Any:
+        if not self.apis.batchable(name):
+            return self.apis.call(name, args)
+        future: Future = Future()
+        with self._lock:
+            batch = self._pending.get(name)
+            leader = batch is None
+            if leader:
+                batch = self._pending[name] = _Batch()
+            batch.calls.append((args, future))
+            if len(batch.calls) >= self.max_batch:
+                batch.full.set()
+                # 之后到达的调用开始新的一批
+                del self._pending[name]
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._pending.get(name) is batch:
+                    del self._pending[name]
+            self._run(name, batch)
+        value, error = future.result()
+        if error is not None:
+            raise ApiError(error)
+        return value
+
+    def _run(self, name: str, batch: _Batch) -> None:
+        calls = [args for args, _ in batch.calls]
+        try:
+            results = self.apis.call_batch(name, calls)
+        except ApiError as e:
+            results = [(None, str(e))] * len(calls)
+        except Exception as e:
+            results = [(None, f"{type(e).__name__}: {e}")] * len(calls)
+        with self._lock:
+            self.stats.calls += len(calls)
+            self.stats.batches += 1
+            self.stats.max_batch = max(self.stats.max_batch, len(calls))
+        for (_, future), result in zip(batch.calls, results):
+            future.set_result(result)
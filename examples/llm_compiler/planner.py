@@ -0,0 +1,233 @@
+"""LLMCompiler 风格的调用计划: LLM 一次给出整道题的 API 调用 DAG, 由调度器并行执行
+
+逐步调用 (ReAct) 时每个 API 调用都要一次 LLM 往返; 而大多数题目的调用链在看到问题时就能确定,
+只是后面的参数要用前面的结果. 计划中用引用表示这种依赖:
+
+    [
+      {"id": 1, "api": "API_2", "args": {"统一社会信用代码": "91000000MA00000001"}},
+      {"id": 2, "api": "API_1", "args": {"公司名称": "$1.公司名称", "need_fields": ["法定代表人"]}},
+      {"id": 3, "api": "API_6", "args": {"关联公司": "$1.公司名称", "need_fields": ["案号", "原告律师事务所"]}},
+      {"id": 4, "api": "API_14", "foreach": "$3[*].案号", "args": {"案号": "$item"}}
+    ]
+
+- `$N` 引用任务 N 的结果, 之后可以跟字段 (`.公司名称`)、下标 (`[0]`)、对列表逐项取字段 (`[*].案号`)
+- `foreach`: 对列表中的每一项调用一次 API, `$item` 为当前项; 这些调用彼此独立, 并行执行
+- 参数整体是一个引用时保持原类型 (列表、数字), 否则按文本替换
+- 依赖关系由引用推出, 任务 2、3 只依赖任务 1, 可以同时执行; 关键路径深度为 3, 而串行调用次数为 3 + len($3)
+
+本模块只负责提示词、解析与校验; 执行见 executor.py.
+"""
+
+import json
+import re
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from apis import ApiSet
+
+_FIELD = r"\.[^\s.\[\]$\"'，,。、；;：:？?）)]+"
+REFERENCE = re.compile(rf"\$(\d+|item)((?:{_FIELD}|\[(?:\d+|\*)\])*)")
+_STEP = re.compile(rf"{_FIELD}|\[(?:\d+|\*)\]")
+
+
+class PlanError(ValueError):
+    """计划无法解析或不合法"""
+
+
+class UnresolvedReference(LookupError):
+    """引用的结果中没有对应的字段或下标"""
+
+
+@dataclass
+class Task:
+    id: int
+    api: str
+    args: dict
+    foreach: str | None = None
+    deps: tuple[int, ...] = field(default=())
+
+    def to_dict(self) -> dict:
+        data = {"id": self.id, "api": self.api, "args": self.args}
+        if self.foreach is not None:
+            data["foreach"] = self.foreach
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Task":
+        task = cls(data["id"], data["api"], data.get("args") or {}, data.get("foreach"))
+        task.deps = tuple(sorted(references([task.args, task.foreach])))
+        return task
+
+
+def references(value: Any) -> set[int]:
+    """value 中引用的任务 id"""
+    if isinstance(value, str):
+        return {int(m[1]) for m in REFERENCE.finditer(value) if m[1] != "item"}
+    if isinstance(value, Mapping):
+        return set().union(*map(references, value.values())) if value else set()
+    if isinstance(value, (list, tuple)):
+        return set().union(*map(references, value)) if value else set()
+    return set()
+
+
+def _walk(value: Any, steps: list[str]) -> Any:
+    for i, step in enumerate(steps):
+        if step == "[*]":
+            if not isinstance(value, list):
+                raise UnresolvedReference(f"[*] applied to {type(value).__name__}")
+            # 之后的字段作用于每一项
+            return [_walk(item, steps[i + 1:]) for item in value]
+        if step.startswith("["):
+            index = int(step[1:-1])
+            if not isinstance(value, list) or index >= len(value):
+                raise UnresolvedReference(f"index {step} out of range")
+            value = value[index]
+        else:
+            key = step[1:]
+            if not isinstance(value, Mapping) or key not in value:
+                raise UnresolvedReference(f"no field {key!r}")
+            value = value[key]
+    return value
+
+
+_MISSING = object()
+
+
+def resolve(value: Any, results: Mapping[int, Any], item: Any = _MISSING) -> Any:
+    """把 value 中的引用替换成结果"""
+    if isinstance(value, str):
+        def lookup(m: re.Match) -> Any:
+            if m[1] == "item":
+                if item is _MISSING:
+                    raise UnresolvedReference("$item used outside foreach")
+                base = item
+            else:
+                if int(m[1]) not in results:
+                    raise UnresolvedReference(f"task {m[1]} has no result")
+                base = results[int(m[1])]
+            try:
+                return _walk(base, _STEP.findall(m[2]))
+            except UnresolvedReference as e:
+                raise UnresolvedReference(f"{m[0]}: {e}") from None
+
+        if (m := REFERENCE.fullmatch(value)) is not None:
+            return lookup(m)
+        return REFERENCE.sub(lambda m: _text(lookup(m)), value)
+    if isinstance(value, Mapping):
+        return {k: resolve(v, results, item) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve(v, results, item) for v in value]
+    return value
+
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def _extract_json(text: str) -> Any:
+    """从回复中取出 JSON 数组, 允许外面包着 ```json 代码块或说明文字"""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        raise PlanError("no JSON array in the response")
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise PlanError(f"invalid JSON: {e}") from None
+
+
+def parse_plan(text: str, apis: ApiSet, done: Iterable[int] = ()) -> list[Task]:
+    """解析并校验计划; done 为此前已执行完成的任务 id, 重新规划时新任务可以引用它们"""
+    data = _extract_json(text)
+    if not isinstance(data, list):
+        raise PlanError("plan must be a JSON array")
+    done = set(done)
+    tasks: list[Task] = []
+    seen: set[int] = set()
+    for item in data:
+        if not isinstance(item, dict) or not isinstance(item.get("id"), int) or "api" not in item:
+            raise PlanError(f"invalid task: {json.dumps(item, ensure_ascii=False)}")
+        task = Task.from_dict(item)
+        if task.id in seen or task.id in done:
+            raise PlanError(f"duplicate task id {task.id}")
+        if task.api not in apis:
+            raise PlanError(f"task {task.id}: unknown api {task.api!r}")
+        if not isinstance(task.args, dict):
+            raise PlanError(f"task {task.id}: args must be an object")
+        if task.foreach is not None and not isinstance(task.foreach, str):
+            raise PlanError(f"task {task.id}: foreach must be a reference")
+        # 只能引用排在前面的任务, 保证无环
+        if missing := [d for d in task.deps if d not in seen and d not in done]:
+            raise PlanError(f"task {task.id} depends on unknown or later tasks {missing}")
+        seen.add(task.id)
+        tasks.append(task)
+    return tasks
+
+
+def critical_path(tasks: Iterable[Task]) -> dict[int, int]:
+    """每个任务所在的层数: 1 + 所依赖任务的最大层数; 依赖此前已完成的任务 (重新规划时) 不计层数"""
+    levels: dict[int, int] = {}
+    for task in tasks:  # 已按依赖顺序排列
+        levels[task.id] = 1 + max((levels.get(d, 0) for d in task.deps), default=0)
+    return levels
+
+
+PLANNER_PROMPT = """你是法律数据查询的规划器. 根据用户问题, 一次性给出完成查询需要的全部 API 调用计划.
+
+可用 API:
+{apis}
+
+计划格式: 只输出一个 JSON 数组, 每个元素是一个任务:
+  {{"id": 整数, "api": "API_x", "args": {{参数}}, "foreach": 可选}}
+- 参数中可以用 $N 引用任务 N 的结果, 后面可以接 .字段、[下标]、[*].字段 (对列表逐项取字段)
+- foreach 为一个列表引用, 对其中每一项调用一次 API, args 中用 $item (或 $item.字段) 表示当前项
+- 按单个键查询的 API 的键也可以直接给一个列表 (如 {{"案号": "$2[*].案号"}}), 一次调用返回等长的结果列表, 查无结果的项为 null
+- 任务只能引用 id 更小的任务; 互不依赖的任务会并行执行, 尽量减少依赖链的长度
+- 需要的字段用 need_fields 指定, 不要取回用不到的字段
+- 过滤、比较、计数等推理由之后的回答步骤完成, 计划中只包含 API 调用;
+  但一家公司的案件按原告/被告、年份、涉案金额范围过滤后的计数与金额求和, 直接用 API_24 一次得到
+- 问题中的公司 / 法院 / 律师事务所 / 地址不是完整名称 (简称、曾用名、只有部分地址) 时, 先用 API_25 得到规范名称;
+  按名称查询无结果时, 错误信息会给出相近的规范名称, 重新规划时直接使用
+- 不要合并或虚构 API
+
+示例:
+问题: 统一社会信用代码为91000000MA00000001的公司涉及哪些案件? 各案件的摘要是?
+[
+  {{"id": 1, "api": "API_2", "args": {{"统一社会信用代码": "91000000MA00000001"}}}},
+  {{"id": 2, "api": "API_6", "args": {{"关联公司": "$1.公司名称", "need_fields": ["案号"]}}}},
+  {{"id": 3, "api": "API_14", "foreach": "$2[*].案号", "args": {{"案号": "$item", "need_fields": ["文本摘要"]}}}}
+]"""
+
+PLAN_REQUEST = "问题: {question}\n请输出调用计划."
+
+REPLAN_REQUEST = """问题: {question}
+
+已执行的任务及结果:
+{done}
+
+执行失败: {error}
+
+请输出新的调用计划, 只包含还需要执行的任务. 新任务的 id 从 {next_id} 开始, 可以用 $N 引用上面已有结果的任务."""
+
+JOIN_PROMPT = """你是法律数据查询助手. 根据 API 调用结果回答用户问题.
+- 只使用调用结果中的信息, 结果中没有的内容如实说明
+- 需要过滤、计数、比较的在这里完成
+- 回答简洁, 直接给出答案"""
+
+JOIN_REQUEST = "问题: {question}\n\nAPI 调用结果:\n{results}\n\n请回答."
+
+
+def format_results(tasks: Iterable[Task], results: Mapping[int, Any], max_chars: int = 2000) -> str:
+    """任务及其结果, 每个结果最多 max_chars 个字符"""
+    lines = []
+    for task in tasks:
+        if task.id not in results:
+            continue
+        text = json.dumps(results[task.id], ensure_ascii=False)
+        if len(text) > max_chars:
+            text = text[:max_chars] + f"... (共 {len(text)} 字符)"
+        lines.append(f"${task.id} = {task.api} {json.dumps(task.args, ensure_ascii=False)}")
+        if task.foreach:
+            lines[-1] += f" foreach {task.foreach}"
+        lines.append(f"  -> {text}")
+    return "\n".join(lines) or "(无)"
@@ -0,0 +1,370 @@
+"""实体名称解析: 把问题中的公司 / 法院 / 律师事务所 / 地址的写法映射到数据中的规范名称
+
+按主键查询的 API 要求名称完全一致, 而问题中常常是简称、曾用名、信用代码、省略了省份的地址
+(如 "保定市天威西路2222号"), 或者有全角/半角、空格的差异; 查无结果后只能交给 LLM 重新规划再猜一次.
+
+`EntityIndex` 对各表的名称列及别名列 (简称、曾用名、曾用简称、公司代码、统一社会信用代码、法院代字 ...)
+建索引, 一次查询返回按得分排序的规范名称:
+- 规范化: NFKC (全角转半角)、小写、去掉空白, 全角括号统一为半角
+- 完全一致: 字典查找, 得分 1
+- 前缀: 排序后的词条数组上二分查找前缀范围 (作用相当于 trie, 但不需要逐字符的节点对象)
+- 字符二元组 (bigram) 倒排索引: 候选只从最少见的几个 bigram 的倒排表中产生 ("有限"、"公司" 这类几乎每个词条都有的跳过),
+  再用全部 bigram 的 (有序) 倒排表二分查找得到重合数 (很常见的 bigram 查位图), 向量化计分:
+  (查询被词条包含的比例 + Dice 系数) / 2,
+  部分地址、多字少字都能命中
+- 可选的 BK 树 (编辑距离): 输错一两个字的短名称 (简称等) bigram 重合少, 用编辑距离兜底; 首次使用时构建
+
+内存: 名称与词条用 sys.intern 去重; bigram 编码成整数, 倒排表是一个 int32 数组加有序的 bigram 编码与偏移 (CSR),
+构建时整体排序而不是逐个追加; 词条的属性都是 NumPy 数组. 倒排表长于词条数 / DENSE_POSTINGS 的 bigram 另存一份位图
+(每个词条 1 bit, 不大于倒排表本身), 在这些长倒排表上二分查找是查询的主要耗时.
+
+用法:
+    index = entity_index(tables)           # 每个 Tables / Store 构建一次
+    index.resolve("保定市天威西路2222号", kind="地址")
+    suggest(tables, "company_info", "公司名称", "示例科技")   # API 查无结果时附在错误信息中的相近名称
+"""
+
+import re
+import sys
+import threading
+import unicodedata
+import weakref
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+# 实体类型 -> [(表, 规范名称列, 别名列)]
+ENTITY_SOURCES: dict[str, list[tuple[str, str, tuple[str, ...]]]] = {
+    "公司": [
+        ("company_info", "公司名称", ("公司简称", "曾用简称", "公司代码", "英文名称")),
+        ("company_register", "公司名称", ("统一社会信用代码", "曾用名")),
+        ("sub_company_info", "公司名称", ()),
+    ],
+    "法院": [("court_info", "法院名称", ()), ("court_code", "法院名称", ("法院代字",))],
+    "律师事务所": [("lawfirm_info", "律师事务所名称", ()), ("lawfirm_log", "律师事务所名称", ())],
+    "地址": [("addr_info", "地址", ())],
+}
+KINDS = tuple(ENTITY_SOURCES)
+# 按名称查询的 (表, 列) -> 实体类型, 查无结果时据此给出相近的名称
+KEY_KINDS: dict[tuple[str, str], str] = {
+    (table, column): kind
+    for kind, sources in ENTITY_SOURCES.items()
+    for table, name, aliases in sources
+    for column in (name, *aliases)
+}
+KEY_KINDS.update({
+    ("sub_company_info", "关联上市公司全称"): "公司",
+    ("legal_doc", "关联公司"): "公司",
+    ("xzgxf_info", "限制高消费企业名称"): "公司",
+})
+
+CANDIDATE_POSTINGS = 1024  # 从最少见的 bigram 起取倒排表产生候选, 总长到此为止 ("有限"、"公司" 这类不用来产生候选)
+CANDIDATES = 64  # 每次查询保留的候选词条数
+DENSE_POSTINGS = 32  # 倒排表长于词条数 / 32 的 bigram 另存位图
+MIN_SCORE = 0.5
+# BK 树只收短词条 (简称、律所简称 ...): 长名称错一两个字仍有大部分 bigram 相同, 不需要编辑距离
+BK_MAX_LENGTH = 8
+
+_SPLIT = re.compile(r"[,，;；、\s]+|-?>")  # 曾用名可能有多个: "A,B"、"A->B"
+_SPLIT_COLUMNS = frozenset({"曾用名", "曾用简称"})
+_BRACKETS = str.maketrans({"（": "(", "）": ")", "〔": "(", "〕": ")", "【": "[", "】": "]"})
+
+
+def normalize(text: str) -> str:
+    return "".join(unicodedata.normalize("NFKC", str(text)).translate(_BRACKETS).lower().split())
+
+
+_UNIGRAM = (1 << 21) - 1  # 单字词条以该字本身为一元, 编码的低位为此值 (大于任何码位)
+
+
+def gram_codes(text: str) -> np.ndarray:
+    """规范化后文本的字符二元组, 编码为 int64 (前一字符 << 21 | 后一字符), 去重并排序"""
+    cp = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    if len(cp) == 1:
+        return (cp << 21) | _UNIGRAM
+    return np.unique((cp[:-1] << 21) | cp[1:])
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein 距离; 超过 limit 时提前返回 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+@dataclass(frozen=True)
+class Match:
+    name: str  # 规范名称
+    kind: str
+    field: str  # 命中的列, 如 公司简称
+    text: str  # 命中的词条原文
+    score: float
+
+    def to_dict(self) -> dict:
+        return {"名称": self.name, "类型": self.kind, "匹配字段": self.field, "匹配文本": self.text,
+                "得分": round(self.score, 3)}
+
+
+class BKTree:
+    """词条 (规范化后) 的 BK 树; 节点存词条下标, 子节点按与父节点的编辑距离索引"""
+
+    def __init__(self, terms: list[str], max_length: int = sys.maxsize):
+        self.terms = terms
+        self.children: list[dict[int, int]] = []  # 节点 -> {距离: 子节点}
+        self.nodes: list[int] = []  # 节点 -> 词条下标
+        for i, term in enumerate(terms):
+            if 0 < len(term) <= max_length:
+                self._add(i, term)
+
+    def _add(self, index: int, term: str) -> None:
+        self.nodes.append(index)
+        self.children.append({})
+        node = len(self.nodes) - 1
+        if node == 0:
+            return
+        parent = 0
+        while True:
+            d = edit_distance(term, self.terms[self.nodes[parent]], sys.maxsize)
+            child = self.children[parent].get(d)
+            if child is None:
+                self.children[parent][d] = node
+                return
+            parent = child
+
+    def search(self, term: str, max_distance: int) -> list[tuple[int, int]]:
+        """[(词条下标, 距离)], 距离 <= max_distance"""
+        if not self.nodes:
+            return []
+        found, stack = [], [0]
+        while stack:
+            node = stack.pop()
+            candidate = self.terms[self.nodes[node]]
+            # 按三角不等式只需访问距离在 [d - max, d + max] 的子树, 所以 d 要算出精确值, 不能按 max 截断
+            d = edit_distance(term, candidate, sys.maxsize)
+            if d <= max_distance:
+                found.append((self.nodes[node], d))
+            for distance, child in self.children[node].items():
+                if d - max_distance <= distance <= d + max_distance:
+                    stack.append(child)
+        return found
+
+
+class EntityIndex:
+    """
+    Args:
+        records: (实体类型, 规范名称, 列, 词条原文) 序列, 通常由 `from_tables` 生成
+    """
+
+    def __init__(self, records: Iterable[tuple[str, str, str, str]]):
+        names: dict[tuple[int, str], int] = {}
+        fields: dict[str, int] = {}
+        seen: set[tuple[int, str, int]] = set()
+        terms, raw, term_name, term_field = [], [], [], []
+        for kind, name, field, text in records:
+            term = normalize(text)
+            if not term or not name:
+                continue
+            key = (KINDS.index(kind), sys.intern(name))
+            name_id = names.setdefault(key, len(names))
+            if (name_id, term, field_id := fields.setdefault(field, len(fields))) in seen:
+                continue
+            seen.add((name_id, term, field_id))
+            terms.append(sys.intern(term))
+            raw.append(sys.intern(str(text)))
+            term_name.append(name_id)
+            term_field.append(field_id)
+        self.names = [name for _, name in names]
+        self.name_kind = np.array([kind for kind, _ in names], dtype=np.uint8)
+        self.fields = list(fields)
+        self.terms = terms
+        self.raw = raw
+        self.term_name = np.array(term_name, dtype=np.int32)
+        self.term_field = np.array(term_field, dtype=np.uint8)
+
+        # 完全一致与前缀: 按词条排序的下标, 二分查找
+        order = sorted(range(len(terms)), key=terms.__getitem__)
+        self._sorted = np.array(order, dtype=np.int32)
+        self._sorted_terms = [terms[i] for i in order]
+        # bigram 倒排表 (CSR): 所有词条拼接后一次算出全部 (bigram, 词条) 对, 按 bigram 排序去重;
+        # gram_codes 为有序的 bigram 编码, postings[offsets[k]:offsets[k + 1]] 为含第 k 个 bigram 的词条 (升序)
+        lengths = np.fromiter(map(len, terms), dtype=np.int64, count=len(terms))
+        cp = np.frombuffer("".join(terms).encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        owner = np.repeat(np.arange(len(terms), dtype=np.int64), lengths)
+        same = owner[:-1] == owner[1:]  # 相邻两个字符属于同一词条
+        single = np.flatnonzero(lengths == 1)
+        codes = np.concatenate([((cp[:-1] << 21) | cp[1:])[same], (cp[np.cumsum(lengths)[single] - 1] << 21) | _UNIGRAM])
+        owner = np.concatenate([owner[:-1][same], single])
+        order = np.lexsort((owner, codes))
+        codes, owner = codes[order], owner[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (owner[1:] != owner[:-1])
+        codes, owner = codes[keep], owner[keep]
+        first = np.flatnonzero(np.diff(codes, prepend=-1))
+        self.gram_count = np.bincount(owner, minlength=len(terms)).astype(np.uint16)
+        self._gram_codes = codes[first]
+        self._offsets = np.append(first, len(codes))
+        self._postings = owner.astype(np.int32)
+        self._dense: dict[int, np.ndarray] = {}  # bigram 下标 -> 位图 (np.packbits, little)
+        for k in np.flatnonzero(np.diff(self._offsets) > len(terms) // DENSE_POSTINGS).tolist():
+            bits = np.zeros(len(terms), dtype=bool)
+            bits[self._postings[self._offsets[k]:self._offsets[k + 1]]] = True
+            self._dense[k] = np.packbits(bits, bitorder="little")
+        self._bk_tree: BKTree | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_tables(cls, tables: Any) -> "EntityIndex":
+        """tables 为 `apis.Tables` 或 `store.Store` (需要 rows(table))"""
+
+        def records():
+            for kind, sources in ENTITY_SOURCES.items():
+                for table, name_column, aliases in sources:
+                    for row in tables.rows(table):
+                        name = str(row.get(name_column) or "")
+                        if not name:
+                            continue
+                        yield kind, name, name_column, name
+                        for column in aliases:
+                            value = str(row.get(column) or "")
+                            for text in _SPLIT.split(value) if column in _SPLIT_COLUMNS else (value,):
+                                yield kind, name, column, text
+
+        return cls(records())
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _postings_of(self, grams: np.ndarray) -> list[tuple[int, np.ndarray]]:
+        """各 bigram 的 (下标, 倒排表), 索引中没有的 bigram 略去"""
+        k = np.searchsorted(self._gram_codes, grams)
+        hit = k < len(self._gram_codes)
+        hit[hit] = self._gram_codes[k[hit]] == grams[hit]
+        return [(i, self._postings[self._offsets[i]:self._offsets[i + 1]]) for i in k[hit].tolist()]
+
+    def _exact(self, term: str) -> list[int]:
+        start = bisect_left(self._sorted_terms, term)
+        end = bisect_right(self._sorted_terms, term, lo=start)
+        return self._sorted[start:end].tolist()
+
+    def _prefix(self, term: str, limit: int) -> list[int]:
+        """以 term 开头 (不含与之相同) 的至多 limit 个词条"""
+        start = end = bisect_right(self._sorted_terms, term)
+        while end < len(self._sorted_terms) and end - start < limit and self._sorted_terms[end].startswith(term):
+            end += 1
+        return self._sorted[start:end].tolist()
+
+    def bk_tree(self) -> BKTree:
+        """首次调用时构建, 只包含不超过 BK_MAX_LENGTH 个字的词条 (纯 Python 计算编辑距离, 词条数万时需要数秒)"""
+        with self._lock:
+            if self._bk_tree is None:
+                self._bk_tree = BKTree(self.terms, BK_MAX_LENGTH)
+            return self._bk_tree
+
+    def _kind(self, term: int) -> int:
+        return int(self.name_kind[self.term_name[term]])
+
+    def _fuzzy(self, query: str, max_edits: int) -> dict[int, float]:
+        """词条下标 -> 得分, 均小于 1"""
+        scores: dict[int, float] = {}
+        for i in self._prefix(query, CANDIDATES):
+            # 词条以查询开头 (如公司名称的前几个字)
+            scores[i] = 0.5 + 0.4 * len(query) / len(self.terms[i])
+        grams = gram_codes(query)
+        postings = sorted(self._postings_of(grams), key=lambda kp: len(kp[1]))
+        if postings:
+            # 候选: 从最少见的 bigram 起, 取到倒排表总长达到 CANDIDATE_POSTINGS 为止
+            n, total = 0, 0
+            while n < len(postings) and (n == 0 or total + len(postings[n][1]) <= CANDIDATE_POSTINGS):
+                total += len(postings[n][1])
+                n += 1
+            candidates, overlap = np.unique(np.concatenate([p for _, p in postings[:n]]), return_counts=True)
+            # 加上其余 (常见的) bigram 的重合数: 有位图的查位图, 否则在有序的倒排表上二分查找
+            for k, p in postings[n:]:
+                if (bits := self._dense.get(k)) is not None:
+                    overlap += (bits[candidates >> 3] >> (candidates & 7)) & 1
+                else:
+                    overlap += p.take(np.searchsorted(p, candidates), mode="clip") == candidates
+            dice = 2 * overlap / (len(grams) + self.gram_count[candidates])
+            score = 0.9 * (overlap / len(grams) + dice) / 2
+            if len(candidates) > CANDIDATES:
+                top = np.argpartition(-score, CANDIDATES)[:CANDIDATES]
+                candidates, score = candidates[top], score[top]
+            for i, x in zip(candidates.tolist(), score.tolist()):
+                scores.setdefault(i, x)
+        if max_edits > 0:
+            for i, d in self.bk_tree().search(query, max_edits):
+                scores[i] = max(scores.get(i, 0.0), 0.9 * (1 - d / max(len(query), len(self.terms[i]))))
+        return scores
+
+    def resolve(self, text: str, kind: str | None = None, limit: int = 5, max_edits: int = 0,
+                min_score: float = MIN_SCORE) -> list[Match]:
+        """按得分从高到低返回至多 limit 个规范名称 (每个名称取得分最高的词条); max_edits > 0 时用 BK 树补充编辑距离相近的词条"""
+        query = normalize(text)
+        if not query:
+            return []
+        kind_id = KINDS.index(kind) if kind is not None else None
+        # 有完全一致的词条时只返回这些 (例如信用代码只差一位的其它公司不应作为候选), 得分都是 1, 每个名称取第一个词条
+        exact: dict[int, int] = {}
+        for i in self._exact(query):
+            if kind_id is None or self._kind(i) == kind_id:
+                exact.setdefault(int(self.term_name[i]), i)
+        if exact:
+            ranked = sorted(exact.items(), key=lambda item: self.names[item[0]])[:limit]
+            return [self._match(name_id, i, 1.0) for name_id, i in ranked]
+
+        scores = self._fuzzy(query, max_edits)
+        if not scores:
+            return []
+        terms = np.fromiter(scores, dtype=np.int64, count=len(scores))
+        values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        name_ids = self.term_name[terms]
+        keep = values >= min_score
+        if kind_id is not None:
+            keep &= self.name_kind[name_ids] == kind_id
+        terms, values, name_ids = terms[keep].tolist(), values[keep], name_ids[keep]
+        # 每个名称取得分最高的词条 (同分时取先出现的): 稳定排序后各名称第一次出现的位置
+        order = np.argsort(-values, kind="stable")
+        _, first = np.unique(name_ids[order], return_index=True)
+        best = [(float(values[j]), int(name_ids[j]), terms[j]) for j in order[first].tolist()]
+        ranked = sorted(best, key=lambda item: (-item[0], self.names[item[1]]))[:limit]
+        return [self._match(name_id, i, score) for score, name_id, i in ranked]
+
+    def _match(self, name_id: int, term: int, score: float) -> Match:
+        return Match(self.names[name_id], KINDS[self.name_kind[name_id]], self.fields[self.term_field[term]],
+                     self.raw[term], score)
+
+
+_indexes: "weakref.WeakKeyDictionary[Any, EntityIndex]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def entity_index(tables: Any) -> EntityIndex:
+    """tables (`apis.Tables` / `store.Store`) 的实体索引, 每个 tables 构建一次"""
+    with _lock:
+        index = _indexes.get(tables)
+        if index is None:
+            index = _indexes[tables] = EntityIndex.from_tables(tables)
+        return index
+
+
+def suggest(tables: Any, table: str, column: str, value: str, limit: int = 3) -> str:
+    """按 (表, 列) 查 value 无结果时, 相近的规范名称的提示文本; 该列不是实体名称或没有相近的名称时为空串"""
+    kind = KEY_KINDS.get((table, column))
+    if kind is None:
+        return ""
+    matches = entity_index(tables).resolve(value, kind=kind, limit=limit)
+    if not matches:
+        return ""
+    hints = [m.name if m.text == m.name else f"{m.name} ({m.field}: {m.text})" for m in matches]
+    return "相近的名称: " + "; ".join(hints)
@@ -0,0 +1,249 @@
+"""API_0 ~ API_16 的本地数据存储: 从数据目录的表文件构建 SQLite, 按查询键建索引
+
+`apis.Tables` 每次查询都逐行比较, 耗时与表的行数成正比 (legal_doc 这类表有数万行).
+`Store` 把数据目录中的表导入一个 SQLite 文件, 对各 API 的查询键建索引:
+- 主键: company_info.公司名称、legal_doc.案号、court_info.法院名称、addr_info.地址、addr_code.区县区划代码 ...
+- API_0 / API_8 的其它查询键: 公司简称、公司代码、法院代字; API_2 的统一社会信用代码
+- where 条件查询: sub_company_info.关联上市公司全称 (API_4)、legal_doc.关联公司 (API_6)、
+  xzgxf_info.限制高消费企业名称 (API_16); API_12 / API_13 的组合条件
+
+点查询走索引, 耗时与表的大小基本无关 (几十微秒); 每个线程一个只读连接, 调度器的并发调用互不阻塞.
+所有值按 Text 存储 (与表结构一致), 数字也转成文本, 查询 "300682" 与原始数据中的 300682 等价.
+
+SQLite 文件是数据目录的缓存: 记录了来源目录及各文件的大小、修改时间, `open_store` 发现不一致时重新构建.
+
+用法:
+    store = open_store()                       # 文件默认 .cache/llm_compiler.sqlite, 由 LLM_COMPILER_STORE 指定
+    store.select("legal_doc", {"关联公司": "示例科技股份有限公司"})
+    python examples/llm_compiler/store.py build [--data-dir DIR] [--path FILE]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Any
+
+# 表 -> 索引 (每个索引为一组列); 第一个为主键. 键不一定唯一 (赛题数据中有重复), 所以都是普通索引
+TABLE_INDEXES: dict[str, list[tuple[str, ...]]] = {
+    "company_info": [("公司名称",), ("公司简称",), ("公司代码",)],
+    "company_register": [("公司名称",), ("统一社会信用代码",)],
+    "sub_company_info": [("公司名称",), ("关联上市公司全称",)],
+    "legal_doc": [("案号",), ("关联公司",)],
+    "court_info": [("法院名称",)],
+    "court_code": [("法院名称",), ("法院代字",)],
+    "lawfirm_info": [("律师事务所名称",)],
+    "lawfirm_log": [("律师事务所名称",)],
+    "addr_info": [("地址",)],
+    "addr_code": [("区县区划代码",), ("省份", "城市", "区县")],
+    "temp_info": [("日期", "省份", "城市")],
+    "legal_abstract": [("案号",)],
+    "xzgxf_info": [("案号",), ("限制高消费企业名称",)],
+}
+
+DEFAULT_STORE_PATH = ".cache/llm_compiler.sqlite"
+MAX_PARAMS = 500  # select_many 每条 SQL 的键数
+MMAP_SIZE = 1 << 30  # 只读连接用 mmap 读取, 省去页缓存到 SQLite 缓存的拷贝
+HERE = Path(__file__).resolve().parent
+
+
+def default_data_dir() -> Path:
+    if path := os.environ.get("LLM_COMPILER_DATA_DIR"):
+        return Path(path)
+    data_dir = HERE / "data"
+    return data_dir if data_dir.is_dir() else HERE / "sample_data"
+
+
+def table_file(data_dir: Path, table: str) -> Path | None:
+    for suffix in (".jsonl", ".csv"):
+        if (path := data_dir / f"{table}{suffix}").exists():
+            return path
+    return None
+
+
+def read_table(data_dir: Path, table: str) -> list[dict]:
+    """读取 {table}.jsonl 或 {table}.csv, 文件不存在时返回空列表"""
+    path = table_file(data_dir, table)
+    if path is None:
+        return []
+    if path.suffix == ".jsonl":
+        with open(path, encoding="utf-8") as fr:
+            return [json.loads(line) for line in fr if line.strip()]
+    with open(path, encoding="utf-8-sig", newline="") as fr:
+        return list(csv.DictReader(fr))
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _fingerprint(data_dir: Path) -> dict:
+    """数据目录的来源信息, 用于判断 SQLite 文件是否过期"""
+    files = {}
+    for table in TABLE_INDEXES:
+        if (path := table_file(data_dir, table)) is not None:
+            stat = path.stat()
+            files[path.name] = [stat.st_size, stat.st_mtime_ns]
+    return {"data_dir": str(data_dir.resolve()), "files": files}
+
+
+def build(data_dir: Path, path: Path) -> None:
+    """从数据目录构建 SQLite 文件; 先写临时文件再替换, 构建过程中已打开的 Store 不受影响"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("CREATE TABLE _meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO _meta VALUES ('fingerprint', ?)", (json.dumps(_fingerprint(data_dir)),))
+        for table, indexes in TABLE_INDEXES.items():
+            rows = read_table(data_dir, table)
+            if not rows:
+                continue
+            # 列按首次出现的顺序, 索引列即使数据中没有也要建, 查询时才不会报错
+            columns = list(dict.fromkeys(k for row in rows for k in row))
+            columns += [c for index in indexes for c in index if c not in columns]
+            conn.execute(f"CREATE TABLE {_quote(table)} ({', '.join(f'{_quote(c)} TEXT' for c in columns)})")
+            conn.executemany(
+                f"INSERT INTO {_quote(table)} VALUES ({', '.join('?' * len(columns))})",
+                ([_text(row.get(c)) for c in columns] for row in rows),
+            )
+            for i, index in enumerate(indexes):
+                conn.execute(
+                    f"CREATE INDEX {_quote(f'{table}_{i}')} ON {_quote(table)} ({', '.join(map(_quote, index))})"
+                )
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+
+
+class Store:
+    """只读的 SQLite 数据存储, 与 `apis.Tables` 接口相同:
+    select(table, conds) -> [row, ...]; select_many(table, column, values) -> {value: [row, ...]}"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        conn = self._conn()
+        self.fingerprint = json.loads(conn.execute("SELECT value FROM _meta WHERE key = 'fingerprint'").fetchone()[0])
+        self.columns: dict[str, list[str]] = {}
+        tables = "SELECT name FROM sqlite_master WHERE type = 'table' AND name != '_meta' AND name NOT LIKE 'sqlite_%'"
+        for (table,) in conn.execute(tables):
+            self.columns[table] = [r[1] for r in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+        self._sql: dict[tuple[str, tuple[str, ...]], str] = {}
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only=ON")
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _query(self, table: str, keys: tuple[str, ...]) -> str:
+        sql = self._sql.get((table, keys))
+        if sql is None:
+            where = " AND ".join(f"{_quote(k)} = ?" for k in keys)
+            sql = f"SELECT * FROM {_quote(table)} WHERE {where} ORDER BY rowid"
+            self._sql[(table, keys)] = sql
+        return sql
+
+    def select(self, table: str, conds: Mapping[str, Any]) -> list[dict]:
+        """conds 为 {列: 值}, 各条件为相等比较; 表或列不存在时返回空列表"""
+        columns = self.columns.get(table)
+        if columns is None or any(k not in columns for k in conds):
+            return []
+        keys = tuple(conds)
+        cursor = self._conn().execute(self._query(table, keys), [_text(conds[k]) for k in keys])
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def select_many(self, table: str, column: str, values: Iterable[Any]) -> dict[str, list[dict]]:
+        """一次查询取回 column 等于 values 中任一值的行, 按值分组; 值的个数超过 SQLite 参数上限时分段查询"""
+        columns = self.columns.get(table)
+        values = list(dict.fromkeys(map(_text, values)))
+        if columns is None or column not in columns or not values:
+            return {}
+        index = columns.index(column)
+        found: dict[str, list[dict]] = {}
+        conn = self._conn()
+        for start in range(0, len(values), MAX_PARAMS):
+            chunk = values[start:start + MAX_PARAMS]
+            sql = f"SELECT * FROM {_quote(table)} WHERE {_quote(column)} IN ({', '.join('?' * len(chunk))}) ORDER BY rowid"
+            for row in conn.execute(sql, chunk):
+                found.setdefault(row[index], []).append(dict(zip(columns, row)))
+        return found
+
+    def rows(self, table: str) -> Iterator[dict]:
+        columns = self.columns.get(table)
+        if columns is None:
+            return iter(())
+        return (dict(zip(columns, row)) for row in self._conn().execute(f"SELECT * FROM {_quote(table)} ORDER BY rowid"))
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+def default_store_path() -> Path:
+    return Path(os.environ.get("LLM_COMPILER_STORE") or DEFAULT_STORE_PATH)
+
+
+def open_store(data_dir: str | Path | None = None, path: str | Path | None = None) -> Store:
+    """打开数据目录对应的 SQLite 文件, 不存在或数据已变化时先构建"""
+    data_dir = Path(data_dir) if data_dir is not None else default_data_dir()
+    path = Path(path) if path is not None else default_store_path()
+    if path.exists():
+        store = Store(path)
+        if store.fingerprint == _fingerprint(data_dir):
+            return store
+        store.close()
+    build(data_dir, path)
+    return Store(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--data-dir", help="数据目录, 默认 LLM_COMPILER_DATA_DIR 或 data/, 不存在时用 sample_data/")
+    parser.add_argument("--path", help=f"SQLite 文件, 默认 LLM_COMPILER_STORE 或 {DEFAULT_STORE_PATH}")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir) if args.data_dir else default_data_dir()
+    path = Path(args.path) if args.path else default_store_path()
+    start = time.perf_counter()
+    build(data_dir, path)
+    store = Store(path)
+    counts = {t: store._conn().execute(f"SELECT COUNT(*) FROM {_quote(t)}").fetchone()[0] for t in store.columns}
+    print(f"built {path} from {data_dir} in {time.perf_counter() - start:.2f}s")
+    for table, n in counts.items():
+        print(f"  {table:<18} {n:>8} rows")
+
+
+if __name__ == "__main__":
+    main()
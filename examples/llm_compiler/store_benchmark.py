@@ -0,0 +1,95 @@
+"""数据存储基准测试: 逐行比较 (apis.Tables) vs SQLite + 索引 (store.Store)
+
+生成 --rows 条虚构的 legal_doc / company_info / xzgxf_info 记录 (关联公司取自 --companies 家公司),
+分别用两种存储通过 `ApiSet.call` 查询:
+- API_5: 按案号 (主键) 查询
+- API_0: 按公司代码 (非主键的查询键) 查询
+- API_6: 按关联公司查询全部文书 (where 条件, 每家公司约 rows / companies 条)
+- API_16: 按限制高消费企业名称查询
+
+用法:
+    python examples/llm_compiler/store_benchmark.py --rows 10000 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from apis import ApiSet, Tables
+from store import Store, build
+
+
+def make_data(data_dir: Path, rows: int, companies: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    names = [f"虚构公司{i:05d}有限公司" for i in range(companies)]
+    with open(data_dir / "company_info.jsonl", "w", encoding="utf-8") as fw:
+        for i, name in enumerate(names):
+            fw.write(json.dumps({"公司名称": name, "公司简称": f"虚构{i:05d}", "公司代码": f"{900000 + i}"}, ensure_ascii=False) + "\n")
+    with open(data_dir / "legal_doc.jsonl", "w", encoding="utf-8") as fw:
+        for i in range(rows):
+            plaintiff, defendant = rng.sample(names, 2)
+            fw.write(json.dumps({
+                "关联公司": rng.choice((plaintiff, defendant)),
+                "案号": f"(2020)示{i % 100:02d}01民初{i}号",
+                "原告": plaintiff,
+                "被告": defendant,
+                "案由": "买卖合同纠纷",
+                "涉案金额": f"{rng.randint(1, 1000)}万",
+                "日期": f"2020-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            }, ensure_ascii=False) + "\n")
+    with open(data_dir / "xzgxf_info.jsonl", "w", encoding="utf-8") as fw:
+        for i in range(rows // 10):
+            fw.write(json.dumps({"限制高消费企业名称": rng.choice(names), "案号": f"(2022)示01执{i}号", "涉案金额": "1万"},
+                                ensure_ascii=False) + "\n")
+
+
+def measure(apis: ApiSet, calls: list[tuple[str, dict]]) -> float:
+    """µs/次"""
+    for api, args in calls[:10]:  # 预热: 加载表 / 打开连接
+        apis.call(api, args)
+    start = time.perf_counter()
+    for api, args in calls:
+        apis.call(api, args)
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000], help="legal_doc 的行数")
+    parser.add_argument("--companies", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200, help="每种查询的次数")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'build s':>8} {'api':>7} {'scan µs':>10} {'indexed µs':>11} {'speedup':>8}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            make_data(data_dir, rows, args.companies)
+            start = time.perf_counter()
+            build(data_dir, data_dir / "store.sqlite")
+            build_time = time.perf_counter() - start
+            store = Store(data_dir / "store.sqlite")
+            scan, indexed = ApiSet(Tables(data_dir), latency=0), ApiSet(store, latency=0)
+
+            rng = random.Random(1)
+            n = args.queries
+            workloads = {
+                "API_5": [("API_5", {"案号": f"(2020)示{(i := rng.randrange(rows)) % 100:02d}01民初{i}号"}) for _ in range(n)],
+                "API_0": [("API_0", {"公司代码": f"{900000 + rng.randrange(args.companies)}"}) for _ in range(n)],
+                "API_6": [("API_6", {"关联公司": f"虚构公司{rng.randrange(args.companies):05d}有限公司"}) for _ in range(n)],
+                "API_16": [("API_16", {"限制高消费企业名称": f"虚构公司{rng.randrange(args.companies):05d}有限公司"})
+                           for _ in range(n)],
+            }
+            for name, calls in workloads.items():
+                scan_us, indexed_us = measure(scan, calls), measure(indexed, calls)
+                print(f"{rows:>8} {build_time:>8.2f} {name:>7} {scan_us:>10.1f} {indexed_us:>11.1f} {scan_us / indexed_us:>7.0f}x")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
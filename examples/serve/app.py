@@ -0,0 +1,191 @@
+"""以 HTTP 服务的形式提供各示例 graph (Starlette + uvicorn)
+
+接口:
+    GET  /graphs                                  已加载的 graph
+    POST /graphs/{name}/invoke                    {"input": ..., "thread_id": ..., "config": ...}
+    POST /graphs/{name}/batch                     {"inputs": [...], "thread_ids": [...], "config": ...}
+    POST /graphs/{name}/stream                    同 invoke, 以 SSE 返回 messages (token) / updates 事件
+    GET  /graphs/{name}/threads/{thread_id}       会话的当前 state
+    GET  /metrics                                 Prometheus 格式的请求数与耗时直方图
+    GET  /healthz
+
+并发过高时返回 503 (带 Retry-After), 请求超时返回 504, 见 service.py.
+
+用法:
+    LLM_BACKEND=mock python examples/serve/app.py --port 8000
+    curl -N localhost:8000/graphs/chatbot/stream -d '{"input": {"messages": [{"role": "user", "content": "你好"}]}, "thread_id": "1"}'
+    python examples/serve/loadtest.py --conversations 200 --turns 5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 使 examples/common 可导入
+from service import GraphService, Overloaded, discover_graphs, dumps, load_graph
+from common.http_client import get_async_http_client
+
+
+class JSON(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content).encode("utf-8")
+
+
+def error_response(e: Exception) -> Response:
+    if isinstance(e, KeyError):
+        return JSON({"error": str(e.args[0])}, status_code=404)
+    if isinstance(e, ValueError):
+        return JSON({"error": str(e)}, status_code=400)
+    if isinstance(e, Overloaded):
+        return JSON({"error": f"overloaded: {e}"}, status_code=503, headers={"Retry-After": "1"})
+    if isinstance(e, TimeoutError):
+        return JSON({"error": "request timed out"}, status_code=504)
+    return JSON({"error": f"{type(e).__name__}: {e}"}, status_code=500)
+
+
+async def read_body(request: Request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise ValueError("request body must be JSON") from None
+    if not isinstance(body, dict):
+        raise ValueError("request body must be a JSON object")
+    return body
+
+
+def create_app(service: GraphService, executor_workers: int | None = None) -> Starlette:
+    async def list_graphs(request: Request) -> Response:
+        return JSON(service.info())
+
+    async def invoke(request: Request) -> Response:
+        try:
+            body = await read_body(request)
+            output = await service.invoke(
+                request.path_params["name"], body.get("input"), body.get("thread_id"), body.get("config")
+            )
+        except Exception as e:
+            return error_response(e)
+        return JSON({"output": output})
+
+    async def batch(request: Request) -> Response:
+        try:
+            body = await read_body(request)
+            if not isinstance(body.get("inputs"), list):
+                raise ValueError("inputs must be a list")
+            outputs = await service.batch(
+                request.path_params["name"], body["inputs"], body.get("thread_ids"), body.get("config")
+            )
+        except Exception as e:
+            return error_response(e)
+        return JSON({"outputs": outputs})
+
+    async def stream(request: Request) -> Response:
+        try:
+            body = await read_body(request)
+            events = service.stream(
+                request.path_params["name"],
+                body.get("input"),
+                body.get("thread_id"),
+                body.get("config"),
+                body.get("stream_mode", ["messages", "updates"]),
+            )
+            # 先取第一个事件: 参数错误/过载/排队超时等在开始流式输出前就能以正常的状态码返回
+            first = await anext(events, None)
+        except Exception as e:
+            return error_response(e)
+
+        async def sse():
+            try:
+                if first is not None:
+                    yield f"event: {first[0]}\ndata: {dumps(first[1])}\n\n"
+                    async for mode, chunk in events:
+                        yield f"event: {mode}\ndata: {dumps(chunk)}\n\n"
+                yield "event: end\ndata: null\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {dumps({'error': f'{type(e).__name__}: {e}'})}\n\n"
+            finally:
+                await events.aclose()
+
+        return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    async def get_state(request: Request) -> Response:
+        try:
+            state = await service.get_state(request.path_params["name"], request.path_params["thread_id"])
+        except Exception as e:
+            return error_response(e)
+        return JSON(state)
+
+    async def metrics(request: Request) -> Response:
+        if "summary" in request.query_params:
+            return JSON(service.metrics.summary())
+        return PlainTextResponse(service.metrics.render_prometheus(service.admission))
+
+    async def healthz(request: Request) -> Response:
+        return JSON({"status": "ok", "active": service.admission.active, "waiting": service.admission.waiting})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        # 节点里的同步 LLM 调用在默认线程池中执行, 默认线程数 (min(32, cpu+4)) 会成为并发瓶颈
+        executor = ThreadPoolExecutor(max_workers=executor_workers or service.admission.max_concurrency)
+        asyncio.get_running_loop().set_default_executor(executor)
+        yield
+        await get_async_http_client().aclose()
+        executor.shutdown(wait=False)
+
+    routes = [
+        Route("/graphs", list_graphs),
+        Route("/graphs/{name}/invoke", invoke, methods=["POST"]),
+        Route("/graphs/{name}/batch", batch, methods=["POST"]),
+        Route("/graphs/{name}/stream", stream, methods=["POST"]),
+        Route("/graphs/{name}/threads/{thread_id}", get_state),
+        Route("/metrics", metrics),
+        Route("/healthz", healthz),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--graphs", nargs="*", help="只加载这些 graph, 默认全部")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="同时运行的请求数")
+    parser.add_argument("--max-queue", type=int, default=1024, help="排队请求数上限, 超出返回 503")
+    parser.add_argument("--queue-timeout", type=float, default=10.0, help="排队超时(秒), 超时返回 503")
+    parser.add_argument("--request-timeout", type=float, default=300.0, help="请求超时(秒), 超时返回 504")
+    parser.add_argument("--batch-concurrency", type=int, default=16, help="单个 batch 请求内的并发数")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    paths = discover_graphs()
+    if args.graphs:
+        unknown = set(args.graphs) - set(paths)
+        if unknown:
+            parser.error(f"unknown graphs: {', '.join(sorted(unknown))}; available: {', '.join(paths)}")
+        paths = {name: paths[name] for name in args.graphs}
+    # graph 只在启动时加载一次
+    graphs = {name: load_graph(name, path) for name, path in paths.items()}
+    service = GraphService(
+        graphs,
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        queue_timeout=args.queue_timeout,
+        request_timeout=args.request_timeout,
+        batch_concurrency=args.batch_concurrency,
+    )
+    print(f"loaded graphs: {', '.join(graphs)}")
+    uvicorn.run(create_app(service), host=args.host, port=args.port, log_level="warning", backlog=4096, timeout_keep_alive=30)
+
+
+if __name__ == "__main__":
+    main()
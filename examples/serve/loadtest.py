@@ -0,0 +1,118 @@
+"""app.py 的压测: 并发进行多个多轮对话, 统计吞吐、延迟分位数与首 token 耗时
+
+每个对话使用独立的 thread_id, 对话内的各轮依次发送 (与真实用户一致), 不同对话之间并发.
+被拒绝 (503) 的请求按 Retry-After 重试, 计入 rejected.
+
+用法:
+    LLM_BACKEND=mock python examples/serve/app.py --graphs chatbot
+    python examples/serve/loadtest.py --conversations 200 --turns 5 --endpoint stream
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+def quantiles(values: list[float]) -> str:
+    if not values:
+        return "-"
+    if len(values) == 1:
+        return f"{values[0] * 1e3:.0f} ms"
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return f"p50 {q[49] * 1e3:.0f} ms, p90 {q[89] * 1e3:.0f} ms, p99 {q[98] * 1e3:.0f} ms"
+
+
+class LoadTest:
+    def __init__(self, url: str, graph: str, endpoint: str, max_retries: int):
+        self.url = url.rstrip("/")
+        self.graph = graph
+        self.endpoint = endpoint
+        self.max_retries = max_retries
+        self.latencies: list[float] = []
+        self.ttfts: list[float] = []
+        self.statuses: Counter = Counter()
+        self.rejected = 0
+
+    async def _invoke(self, client: httpx.AsyncClient, body: dict) -> int:
+        response = await client.post(f"{self.url}/graphs/{self.graph}/invoke", json=body)
+        return response.status_code
+
+    async def _stream(self, client: httpx.AsyncClient, body: dict, start: float) -> int:
+        async with client.stream("POST", f"{self.url}/graphs/{self.graph}/stream", json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return response.status_code
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif event == "messages" and line.startswith("data: ") and start is not None:
+                    self.ttfts.append(time.perf_counter() - start)
+                    start = None
+                elif event == "error" and line.startswith("data: "):
+                    return json.loads(line[len("data: "):]).get("error", "error")
+            return 200
+
+    async def turn(self, client: httpx.AsyncClient, thread_id: str, message: str) -> None:
+        body = {"input": {"messages": [{"role": "user", "content": message}]}, "thread_id": thread_id}
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self.endpoint == "stream":
+                    status = await self._stream(client, body, start)
+                else:
+                    status = await self._invoke(client, body)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if status != 503 or attempt == self.max_retries:
+                break
+            self.rejected += 1
+            await asyncio.sleep(1)
+        self.statuses[status] += 1
+        if status == 200:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def conversation(self, client: httpx.AsyncClient, index: int, turns: int, message: str) -> None:
+        thread_id = f"loadtest-{time.time_ns()}-{index}"
+        for turn in range(turns):
+            await self.turn(client, thread_id, f"{message} (第 {turn + 1} 轮)")
+
+    async def run(self, conversations: int, turns: int, message: str) -> None:
+        limits = httpx.Limits(max_connections=conversations, max_keepalive_connections=conversations)
+        async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(600, connect=30)) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(self.conversation(client, i, turns, message) for i in range(conversations)))
+            elapsed = time.perf_counter() - start
+
+            total = sum(self.statuses.values())
+            print(f"{conversations} conversations x {turns} turns, {self.endpoint}: {total} requests in {elapsed:.1f}s")
+            print(f"throughput: {len(self.latencies) / elapsed:.1f} req/s")
+            print(f"status: {dict(self.statuses)}, rejected then retried: {self.rejected}")
+            print(f"latency: {quantiles(self.latencies)}")
+            if self.endpoint == "stream":
+                print(f"TTFT: {quantiles(self.ttfts)}")
+            summary = (await client.get(f"{self.url}/metrics", params={"summary": ""})).json()
+            for key, value in summary.items():
+                print(f"server {key}: count {value['count']}, p50 {value['p50'] * 1e3:.0f} ms, p99 {value['p99'] * 1e3:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--graph", default="chatbot")
+    parser.add_argument("--endpoint", choices=["invoke", "stream"], default="stream")
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--message", default="你好, 请介绍一下你自己")
+    parser.add_argument("--max-retries", type=int, default=3, help="503 时的重试次数")
+    args = parser.parse_args()
+    asyncio.run(LoadTest(args.url, args.graph, args.endpoint, args.max_retries).run(args.conversations, args.turns, args.message))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""graph 服务的核心逻辑, 与 web 框架无关 (HTTP 路由见 app.py)
+
+- 启动时加载一次各示例中编译好的 `graph` (examples/*/graph.py, 以及 chatbot2)
+- invoke / batch / stream 三种调用方式, 有 checkpointer 的 graph 按 thread_id 区分会话
+- 背压: 同时运行的请求数有上限, 超出的请求排队; 队列也满了或排队超时则立即拒绝 (Overloaded -> 503),
+  而不是无限制地堆积请求拖垮整个进程
+- 同一个会话 (graph, thread_id) 的请求串行执行, 否则两轮对话会基于同一个 checkpoint 各自分叉
+- 请求超时: 包括排队时间在内, 超过 request_timeout 返回 TimeoutError (-> 504)
+- 每个接口的耗时直方图 (以及 stream 的首 token 耗时), 以 Prometheus 文本格式输出
+"""
+
+import asyncio
+import bisect
+import dataclasses
+import importlib.util
+import json
+import sys
+import time
+import weakref
+from collections import defaultdict
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1]
+# 除 examples/*/graph.py 之外额外加载的 graph
+EXTRA_GRAPHS = {"chatbot": EXAMPLES_DIR / "chatbot" / "chatbot2.py"}
+
+
+class Overloaded(Exception):
+    """并发与排队都已达到上限"""
+
+
+def discover_graphs() -> dict[str, Path]:
+    graphs = {path.parent.name: path for path in sorted(EXAMPLES_DIR.glob("*/graph.py"))}
+    return {**graphs, **EXTRA_GRAPHS}
+
+
+def load_graph(name: str, path: Path) -> Any:
+    # 各示例都通过 `import simulation` 这类方式导入同目录下的模块, 所以先把目录加入 sys.path;
+    # 模块名都是 graph, 用不同的名字注册以免互相覆盖
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(f"served_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module.graph
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, BaseMessage):
+        data = {"type": obj.type, "content": obj.content, "id": obj.id}
+        for key in ("name", "tool_calls", "tool_call_id"):
+            if value := getattr(obj, key, None):
+                data[key] = value
+        return data
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "tolist"):  # numpy, IntLogView
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, Sequence)) and not isinstance(obj, (str, bytes)):
+        return list(obj)
+    return str(obj)
+
+
+def dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+
+# ---------------- 指标 ----------------
+
+# 直方图的桶 (秒), 覆盖 mock LLM 的毫秒级到真实 LLM 的分钟级
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """按桶内线性插值估算分位数"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if cumulative + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.buckets[-1]
+
+
+class Metrics:
+    def __init__(self):
+        # (metric, endpoint, graph) -> histogram
+        self.histograms: dict[tuple[str, str, str], LatencyHistogram] = defaultdict(LatencyHistogram)
+        # (endpoint, graph, status) -> count
+        self.requests: dict[tuple[str, str, str], int] = defaultdict(int)
+
+    def observe(self, endpoint: str, graph: str, status: str, seconds: float) -> None:
+        self.histograms[("request_seconds", endpoint, graph)].observe(seconds)
+        self.requests[(endpoint, graph, status)] += 1
+
+    def observe_ttft(self, endpoint: str, graph: str, seconds: float) -> None:
+        self.histograms[("ttft_seconds", endpoint, graph)].observe(seconds)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            f"{metric}{{endpoint={endpoint},graph={graph}}}": {
+                "count": h.count,
+                "p50": h.quantile(0.5),
+                "p90": h.quantile(0.9),
+                "p99": h.quantile(0.99),
+            }
+            for (metric, endpoint, graph), h in sorted(self.histograms.items())
+        }
+
+    def render_prometheus(self, admission: "Admission") -> str:
+        lines = ["# TYPE graph_requests_total counter"]
+        for (endpoint, graph, status), n in sorted(self.requests.items()):
+            lines.append(f'graph_requests_total{{endpoint="{endpoint}",graph="{graph}",status="{status}"}} {n}')
+        for metric in ("request_seconds", "ttft_seconds"):
+            lines.append(f"# TYPE graph_{metric} histogram")
+            for (name, endpoint, graph), h in sorted(self.histograms.items()):
+                if name != metric:
+                    continue
+                labels = f'endpoint="{endpoint}",graph="{graph}"'
+                cumulative = 0
+                for bound, n in zip((*h.buckets, "+Inf"), h.counts):
+                    cumulative += n
+                    lines.append(f'graph_{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"graph_{metric}_sum{{{labels}}} {h.sum}")
+                lines.append(f"graph_{metric}_count{{{labels}}} {h.count}")
+        lines.append("# TYPE graph_requests_active gauge")
+        lines.append(f"graph_requests_active {admission.active}")
+        lines.append("# TYPE graph_requests_waiting gauge")
+        lines.append(f"graph_requests_waiting {admission.waiting}")
+        return "\n".join(lines) + "\n"
+
+
+# ---------------- 背压 ----------------
+
+
+class Admission:
+    """并发上限 + 有界的等待队列
+
+    Args:
+        max_concurrency: 同时运行的请求数
+        max_queue: 排队等待的请求数上限, 超出时立即拒绝
+        queue_timeout: 排队的最长时间(秒)
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise Overloaded(f"{self.active} requests running, {self.waiting} waiting")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except TimeoutError:
+            raise Overloaded(f"no free slot within {self.queue_timeout}s") from None
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+
+# ---------------- 服务 ----------------
+
+
+class GraphService:
+    """
+    Args:
+        graphs: 名称 -> 编译后的 graph
+        max_concurrency / max_queue / queue_timeout: 见 `Admission`
+        request_timeout: 单个请求 (含排队) 的超时时间(秒)
+        batch_concurrency: 单个 batch 请求内同时运行的条目数, 避免一个大 batch 占满所有并发
+    """
+
+    def __init__(
+        self,
+        graphs: dict[str, Any],
+        *,
+        max_concurrency: int = 256,
+        max_queue: int = 1024,
+        queue_timeout: float = 10.0,
+        request_timeout: float = 300.0,
+        batch_concurrency: int = 16,
+    ):
+        self.graphs = graphs
+        self.admission = Admission(max_concurrency, max_queue, queue_timeout)
+        self.request_timeout = request_timeout
+        self.batch_concurrency = batch_concurrency
+        self.metrics = Metrics()
+        self._thread_locks: weakref.WeakValueDictionary[tuple[str, str], asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+
+    def info(self) -> list[dict[str, Any]]:
+        return [
+            {"name": name, "threaded": graph.checkpointer is not None, "nodes": list(graph.nodes)}
+            for name, graph in self.graphs.items()
+        ]
+
+    def _graph(self, name: str) -> Any:
+        if name not in self.graphs:
+            raise KeyError(f"unknown graph {name!r}")
+        return self.graphs[name]
+
+    def _config(self, name: str, thread_id: str | None, config: dict | None) -> dict:
+        config = dict(config or {})
+        configurable = dict(config.get("configurable") or {})
+        if self._graph(name).checkpointer is not None:
+            if not thread_id:
+                raise ValueError(f"graph {name!r} has a checkpointer, thread_id is required")
+            # 所有 graph 共用同一个 checkpointer, thread_id 加上 graph 名称以免冲突
+            configurable["thread_id"] = f"{name}:{thread_id}"
+        config["configurable"] = configurable
+        return config
+
+    @asynccontextmanager
+    async def _session(self, name: str, thread_id: str | None) -> AsyncIterator[None]:
+        """同一会话串行 + 占用一个并发名额"""
+        if thread_id and self._graph(name).checkpointer is not None:
+            lock = self._thread_locks.setdefault((name, thread_id), asyncio.Lock())
+            async with lock, self.admission.slot():
+                yield
+        else:
+            async with self.admission.slot():
+                yield
+
+    @asynccontextmanager
+    async def _measure(self, endpoint: str, name: str) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except Overloaded:
+            status = "overloaded"
+            raise
+        except TimeoutError:
+            status = "timeout"
+            raise
+        except (KeyError, ValueError):
+            status = "bad_request"
+            raise
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.metrics.observe(endpoint, name, status, time.perf_counter() - start)
+
+    async def _invoke(self, name: str, input: Any, thread_id: str | None, config: dict | None) -> Any:
+        graph = self._graph(name)
+        config = self._config(name, thread_id, config)
+        async with asyncio.timeout(self.request_timeout):
+            async with self._session(name, thread_id):
+                return await graph.ainvoke(input, config)
+
+    async def invoke(self, name: str, input: Any, thread_id: str | None = None, config: dict | None = None) -> Any:
+        async with self._measure("invoke", name):
+            return await self._invoke(name, input, thread_id, config)
+
+    async def batch(
+        self,
+        name: str,
+        inputs: list[Any],
+        thread_ids: list[str | None] | None = None,
+        config: dict | None = None,
+    ) -> list[Any]:
+        """返回与 inputs 一一对应的结果, 单个条目失败时对应位置为 {"error": ...}"""
+        thread_ids = thread_ids or [None] * len(inputs)
+        if len(thread_ids) != len(inputs):
+            raise ValueError("thread_ids must have the same length as inputs")
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def run_one(input: Any, thread_id: str | None) -> Any:
+            async with semaphore:
+                try:
+                    return await self._invoke(name, input, thread_id, config)
+                except Exception as e:
+                    return {"error": f"{type(e).__name__}: {e}"}
+
+        async with self._measure("batch", name):
+            self._graph(name)
+            return await asyncio.gather(*(run_one(i, t) for i, t in zip(inputs, thread_ids)))
+
+    async def stream(
+        self,
+        name: str,
+        input: Any,
+        thread_id: str | None = None,
+        config: dict | None = None,
+        stream_mode: str | list[str] = ("messages", "updates"),
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """产出 (事件类型, 数据); messages 事件只包含 token 文本与节点名, 不转发完整的 chunk"""
+        graph = self._graph(name)
+        config = self._config(name, thread_id, config)
+        modes = [stream_mode] if isinstance(stream_mode, str) else list(stream_mode)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.request_timeout
+        start = time.perf_counter()
+        first_token = True
+        async with self._measure("stream", name):
+            async with asyncio.timeout(self.request_timeout):
+                # 排队计入超时; 进入之后逐个事件检查截止时间 (async generator 中不能跨 yield 使用 asyncio.timeout)
+                session = self._session(name, thread_id)
+                await session.__aenter__()
+            try:
+                events = graph.astream(input, config, stream_mode=modes)
+                try:
+                    while True:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            raise TimeoutError
+                        try:
+                            mode, chunk = await asyncio.wait_for(anext(events), remaining)
+                        except StopAsyncIteration:
+                            break
+                        if mode == "messages":
+                            message, metadata = chunk
+                            if not isinstance(message.content, str) or not message.content:
+                                continue
+                            if first_token:
+                                first_token = False
+                                self.metrics.observe_ttft("stream", name, time.perf_counter() - start)
+                            chunk = {"node": metadata.get("langgraph_node"), "content": message.content}
+                        yield mode, chunk
+                finally:
+                    await events.aclose()
+            finally:
+                await session.__aexit__(*sys.exc_info())
+
+    async def get_state(self, name: str, thread_id: str) -> dict[str, Any]:
+        graph = self._graph(name)
+        snapshot = await graph.aget_state(self._config(name, thread_id, None))
+        return {"values": snapshot.values, "next": list(snapshot.next), "checkpoint": snapshot.config}
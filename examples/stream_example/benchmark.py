@@ -0,0 +1,241 @@
+"""stream_example 循环的基准测试: 测量 langgraph 每个 superstep 的调度开销
+
+graph 中每轮循环为 before_condition_passthrough -> after_condition_passthrough -> (increment_a | increment_b),
+LLM 节点 (theory_analysis, process_interpreter) 使用离线 mock 模型 (common/mock_llm.py, 零延迟) 代替,
+因此测得的时间几乎全部是 langgraph 自身的开销.
+
+每个 upper_bound 在独立子进程中运行, 以便单独统计峰值 RSS. 输出指标:
+- supersteps, steps_per_sec: superstep 数及吞吐 (graph.invoke 的总耗时)
+- loops_per_sec: 每秒循环轮数, 用于对比 graph 与 fused_graph (两者每轮的 superstep 数不同)
+- p50_step_us, p99_step_us: 单个 superstep 的耗时分位数 (通过 stream_mode="tasks" 的事件时间戳计算)
+- peak_rss_mb: 子进程峰值 RSS
+- alloc_blocks_per_step: 每个 superstep 净增的内存块数 (sys.getallocatedblocks)
+- traced_peak_mb: tracemalloc 统计的 python 内存峰值 (仅 --trace-alloc 时)
+
+用法:
+    python examples/stream_example/benchmark.py --output results.json
+    python examples/stream_example/benchmark.py --upper-bounds 10 1000 100000 --compare results.json
+    python examples/stream_example/benchmark.py --fused --compare results.json
+
+某个规模的耗时超过 --time-budget 后, 更大的规模会被跳过.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from importlib.metadata import version
+from pathlib import Path
+
+DEFAULT_UPPER_BOUNDS = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def _load_graph(fused: bool = False):
+    # 必须在 import graph 之前设置, 使 LLM 节点使用零延迟的 mock 模型
+    os.environ["LLM_BACKEND"] = "mock"
+    os.environ["LLM_CACHE"] = "false"
+    os.environ["LLM_MOCK_LATENCY"] = "0"
+    os.environ["LLM_MOCK_JITTER"] = "0"
+    os.environ["LLM_MOCK_TOKENS_PER_SECOND"] = ""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import graph
+
+    return graph.fused_graph if fused else graph.graph
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def run_worker(
+    upper_bound: int, min_increment: int, max_increment: int, seed: int, trace_alloc: bool, fused: bool
+) -> dict:
+    graph = _load_graph(fused)
+    inputs = {"upper_bound": upper_bound, "min_increment": min_increment, "max_increment": max_increment}
+    # 每轮循环最多 3 个 superstep, 最坏情况每轮 a + b 只增加 2 * min_increment
+    config = {"recursion_limit": 3 * (upper_bound // (2 * min_increment) + 1) + 10}
+
+    # 预热: import/编译相关的一次性开销不计入结果
+    random.seed(seed)
+    graph.invoke({**inputs, "upper_bound": 10}, config)
+
+    # (1) 吞吐: 直接 invoke
+    random.seed(seed)
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    result = graph.invoke(inputs, config)
+    wall = time.perf_counter() - start
+    blocks_after = sys.getallocatedblocks()
+    loops = len(result["a_list"]) - 1
+    del result
+
+    # (2) 单步耗时: 用 tasks 事件切分 superstep, 同一 superstep 的任务开始事件是连续发出的
+    random.seed(seed)
+    step_starts = []
+    in_results = True
+    for event in graph.stream(inputs, config, stream_mode="tasks"):
+        is_result = "result" in event
+        if not is_result and in_results:
+            step_starts.append(time.perf_counter())
+        in_results = is_result
+    step_starts.append(time.perf_counter())
+    step_latencies = [(b - a) * 1e6 for a, b in zip(step_starts, step_starts[1:])]
+    supersteps = len(step_latencies)
+
+    record = {
+        "upper_bound": upper_bound,
+        "loops": loops,
+        "supersteps": supersteps,
+        "wall_s": wall,
+        "steps_per_sec": supersteps / wall if wall else 0.0,
+        "loops_per_sec": loops / wall if wall else 0.0,
+        "p50_step_us": _percentile(step_latencies, 50),
+        "p99_step_us": _percentile(step_latencies, 99),
+        "alloc_blocks_per_step": (blocks_after - blocks_before) / supersteps,
+    }
+
+    # (3) 可选: tracemalloc 统计内存峰值, 会显著拖慢运行, 因此单独跑一遍
+    if trace_alloc:
+        random.seed(seed)
+        tracemalloc.start()
+        graph.invoke(inputs, config)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        record["traced_peak_mb"] = peak / 2**20
+
+    # linux 下 ru_maxrss 单位为 KB, macOS 下为 B
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    record["peak_rss_mb"] = maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+    return record
+
+
+def _metadata() -> dict:
+    meta = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    for package in ["langgraph", "langchain-core"]:
+        try:
+            meta[package] = version(package)
+        except Exception:
+            pass
+    try:
+        meta["git_rev"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except OSError:
+        pass
+    return meta
+
+
+def print_table(results: list[dict], baseline: dict[int, dict] | None = None) -> None:
+    header = f"{'upper_bound':>11} {'steps':>9} {'steps/s':>10} {'loops/s':>10} {'p50 us':>9} {'p99 us':>9} {'rss MB':>8} {'blk/step':>9}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    for r in results:
+        if r.get("skipped"):
+            print(f"{r['upper_bound']:>11} skipped ({r['skipped']})")
+            continue
+        line = (
+            f"{r['upper_bound']:>11} {r['supersteps']:>9} {r['steps_per_sec']:>10.0f} {r['loops_per_sec']:>10.0f} "
+            f"{r['p50_step_us']:>9.1f} "
+            f"{r['p99_step_us']:>9.1f} {r['peak_rss_mb']:>8.1f} {r['alloc_blocks_per_step']:>9.2f}"
+        )
+        base = (baseline or {}).get(r["upper_bound"])
+        if base and not base.get("skipped"):
+            line += f" {r['loops_per_sec'] / base['loops_per_sec']:>7.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--upper-bounds", type=int, nargs="+", default=DEFAULT_UPPER_BOUNDS)
+    parser.add_argument("--min-increment", type=int, default=1)
+    parser.add_argument("--max-increment", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1024)
+    parser.add_argument("--trace-alloc", action="store_true", help="额外用 tracemalloc 统计内存峰值")
+    parser.add_argument("--fused", action="store_true", help="测试融合了 passthrough 节点的 fused_graph")
+    parser.add_argument("--time-budget", type=float, default=120.0, help="单个规模超过该耗时(秒)后跳过更大的规模")
+    parser.add_argument("--output", help="结果保存为 json")
+    parser.add_argument("--compare", help="与之前保存的 json 结果对比 loops/s")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        record = run_worker(
+            args.worker, args.min_increment, args.max_increment, args.seed, args.trace_alloc, args.fused
+        )
+        print(json.dumps(record))
+        return
+
+    results = []
+    skip_reason = None
+    for upper_bound in sorted(args.upper_bounds):
+        if skip_reason:
+            results.append({"upper_bound": upper_bound, "skipped": skip_reason})
+            continue
+        cmd = [
+            sys.executable, __file__, "--worker", str(upper_bound),
+            "--min-increment", str(args.min_increment), "--max-increment", str(args.max_increment),
+            "--seed", str(args.seed),
+        ]
+        if args.trace_alloc:
+            cmd.append("--trace-alloc")
+        if args.fused:
+            cmd.append("--fused")
+        start = time.perf_counter()
+        try:
+            # 子进程内会跑 2~3 遍, 超时时间相应放宽
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=args.time_budget * 4, check=True)
+        except subprocess.TimeoutExpired:
+            skip_reason = f"timeout > {args.time_budget * 4:.0f}s"
+            results.append({"upper_bound": upper_bound, "skipped": skip_reason})
+            continue
+        except subprocess.CalledProcessError as e:
+            print(e.stderr, file=sys.stderr)
+            raise
+        record = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(record)
+        print(f"upper_bound={upper_bound}: {record['supersteps']} supersteps in {record['wall_s']:.3f}s")
+        if time.perf_counter() - start > args.time_budget:
+            skip_reason = f"upper_bound={upper_bound} exceeded time budget"
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fr:
+            baseline = {r["upper_bound"]: r for r in json.load(fr)["results"]}
+    print()
+    print_table(results, baseline)
+
+    if args.output:
+        data = {
+            "meta": {
+                **_metadata(),
+                "graph": "fused_graph" if args.fused else "graph",
+                "min_increment": args.min_increment,
+                "max_increment": args.max_increment,
+                "seed": args.seed,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as fw:
+            json.dump(data, fw, ensure_ascii=False, indent=2)
+        print(f"\nresults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -52,59 +52,87 @@ import operator
 from typing import Annotated, TypedDict, Literal
 from langgraph.graph import StateGraph, START, END
 from langgraph.config import get_stream_writer
-from langchain_openai import ChatOpenAI
 import random
 from dotenv import load_dotenv
-import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 使 examples/common 可导入
+from common.channels import AppendOnlyIntChannel
+from common.graph_fusion import fuse_passthrough_nodes
+from common.llm import create_chat_model
+from common.llm_cache import get_llm_cache
+from simulation import simulate_loop_counts
 load_dotenv()
 
 
-# 自定义 reducer，用于追加列表元素
-def append_reducer(existing: list, new: int) -> list:
-    """追加新元素到列表"""
-    return existing + [new]
+# 最初的写法是自定义 reducer 追加列表元素:
+#
+#     def append_reducer(existing: list, new: int) -> list:
+#         return existing + [new]
+#
+# 但 existing + [new] 每次都会复制整个列表, 循环 n 次的总开销是 O(n^2).
+# 这里改用只追加的 channel: 追加为均摊 O(1), 节点中读到的是只读的列表视图
+# (支持 len / 下标 / 迭代, 打印效果与 list 相同), 详见 common/channels.py
 
 
 # 定义 State
 class State(TypedDict):
     a: int
     b: int
-    a_list: Annotated[list[int], append_reducer]
-    b_list: Annotated[list[int], append_reducer]
+    a_list: Annotated[list[int], AppendOnlyIntChannel]
+    b_list: Annotated[list[int], AppendOnlyIntChannel]
     upper_bound: int
     min_increment: int
     max_increment: int
     theory_analyse: str
     process_interpreter: str
+    # "llm": 由大模型预估循环次数; "simulation": 用蒙特卡洛模拟得到精确的最少/最多次数及分布 (见 simulation.py)
+    analysis_mode: Literal["llm", "simulation"]
+    n_trajectories: int
+    loop_counts: list[int]  # simulation 模式下, loop_counts[k] 为循环次数为 k 的轨迹数
+
+
+# set_default 使用的默认值, simulation 模式也使用同一组参数
+DEFAULTS = {
+    "a": 0,
+    "b": 0,
+    "upper_bound": 10,
+    "min_increment": 1,
+    "max_increment": 3,
+    "analysis_mode": "llm",
+    "n_trajectories": 100_000,
+}
 
 
 # 初始化 LLM
 # llm = ChatOpenAI(model="gpt-4", temperature=0)
 provider = "WILDCARD"
 model = "gpt-5-mini"
-base_url = os.environ[f"{provider}_BASE_URL"]
-api_key = os.environ[f"{provider}_API_KEY"]
 # 固定了下随机种子: 期望能输出相同的结果, 但事实上好像不生效
-llm = ChatOpenAI(model=model, base_url=base_url, api_key=api_key, seed=1024)
+llm = create_chat_model(provider, model, seed=1024)
 
 
 # Node 1: 设置默认值
 def set_default(state: State) -> State:
     """设置默认值并初始化列表"""
+    values = {key: state.get(key, default) for key, default in DEFAULTS.items()}
     return {
-        "a": state.get("a", 0),
-        "b": state.get("b", 0),
-        "a_list": state.get("a", 0),
-        "b_list": state.get("b", 0),
-        "upper_bound": state.get("upper_bound", 10),
-        "min_increment": state.get("min_increment", 1),
-        "max_increment": state.get("max_increment", 3),
+        **values,
+        "a_list": values["a"],
+        "b_list": values["b"],
     }
 
 
 # Node 2: 理论分析
 def theory_analysis(state: State) -> State:
-    """使用大模型分析循环次数"""
+    """使用大模型分析循环次数, simulation 模式下改为蒙特卡洛模拟"""
+    if state["analysis_mode"] == "simulation":
+        dist = simulate_loop_counts(
+            state["a"], state["b"], state["upper_bound"], state["min_increment"], state["max_increment"],
+            n_trajectories=state["n_trajectories"],
+        )
+        return {"theory_analyse": dist.summary(), "loop_counts": dist.counts.tolist()}
+
     prompt = f"""
     给定初始值 a={state['a']}, b={state['b']}, 上界={state['upper_bound']}.
     每次循环时，a 和 b 分别增加 [{state['min_increment']}, {state['max_increment']}] 范围内的随机整数。
@@ -170,6 +198,14 @@ def increment_b(state: State) -> State:
 def process_interpreter(state: State) -> State:
     """使用大模型解释整个执行过程"""
     actual_loops = len(state['a_list']) - 1  # 减去初始值
+
+    comparison = ""
+    if state.get("loop_counts"):
+        counts = state["loop_counts"]
+        total = sum(counts)
+        p = counts[actual_loops] / total if actual_loops < len(counts) else 0.0
+        cdf = sum(counts[: actual_loops + 1]) / total
+        comparison = f"模拟数据中, 循环次数恰为 {actual_loops} 的概率为 {p:.2%}, 不超过 {actual_loops} 的概率为 {cdf:.2%}"
     
     prompt = f"""
     请描述以下增量过程：
@@ -186,6 +222,7 @@ def process_interpreter(state: State) -> State:
     {state['theory_analyse']}
     
     实际循环次数：{actual_loops}
+    {comparison}
     最终结果：a={state['a']}, b={state['b']}, a+b={state['a'] + state['b']}
     
     请总结整个过程，并比较理论预估和实际执行的差异。
@@ -250,6 +287,10 @@ builder.add_edge("process_interpreter", END)
 # 编译图
 graph = builder.compile()
 
+# 可选: 编译期把两个 passthrough 节点融合掉, 每轮循环只剩 "increment_a+increment_b" 一个节点,
+# 条件边 should_continue 挂到 theory_analysis 和融合节点上 (见 common/graph_fusion.py)
+fused_graph = fuse_passthrough_nodes(builder).compile()
+
 
 # 测试运行
 if __name__ == "__main__":
@@ -286,4 +327,6 @@ if __name__ == "__main__":
     print(f"a 变化过程: {result2['a_list']}")
     print(f"b 变化过程: {result2['b_list']}")
     print(f"\n理论分析:\n{result2['theory_analyse']}")
-    print(f"\n过程解释:\n{result2['process_interpreter']}")
\ No newline at end of file
+    print(f"\n过程解释:\n{result2['process_interpreter']}")
+    if (cache := get_llm_cache()) is not None:
+        print(cache.stats)
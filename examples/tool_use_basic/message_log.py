@@ -0,0 +1,99 @@
+"""对话历史: 只追加的消息日志 + 引用它的临时分支, 取代每轮对整个历史的 deepcopy
+
+tool_use_basic 每轮先在历史的副本上进行工具调用 (assistant 的 tool_calls + tool 结果), 最后只把最终回答加入历史.
+原来的做法是 `deepcopy(conversation_messages)`, 每轮的开销与历史长度 (包括很长的工具输出) 成正比.
+
+- `MessageLog`: 已提交的历史, 只追加; 消息一旦加入就不再修改, 所以分支可以直接引用而不复制
+- `Branch`: 记录分叉时的历史长度 + 自己新增的消息; 创建、提交 (commit)、丢弃 (discard) 都与历史长度无关
+
+用法:
+    history = MessageLog([{"role": "system", "content": "..."}])
+    history.append({"role": "user", "content": "..."})
+    branch = history.branch()
+    branch.append(tool_call_message)
+    call_llm({"messages": branch.to_list()})
+    branch.discard()              # 或 branch.commit(): 把分支中的消息加入历史
+"""
+
+from collections.abc import Iterable, Iterator
+from itertools import chain, islice
+
+
+class BranchConflict(Exception):
+    """分支创建之后历史又被追加了消息, 不能再提交"""
+
+
+class MessageLog:
+    def __init__(self, messages: Iterable[dict] = ()):
+        self._messages: list[dict] = list(messages)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __getitem__(self, index):
+        return self._messages[index]
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._messages)
+
+    def append(self, message: dict) -> None:
+        self._messages.append(message)
+
+    def branch(self) -> "Branch":
+        return Branch(self)
+
+    def to_list(self) -> list[dict]:
+        """浅拷贝, 用于构造请求"""
+        return list(self._messages)
+
+
+class Branch:
+    """在 `MessageLog` 当前末尾分叉出的临时消息序列"""
+
+    def __init__(self, log: MessageLog):
+        self._log = log
+        self._base_len = len(log)
+        self._messages: list[dict] = []
+        self._closed = False
+
+    def __len__(self) -> int:
+        return self._base_len + len(self._messages)
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("branch index out of range")
+        if index < self._base_len:
+            return self._log[index]
+        return self._messages[index - self._base_len]
+
+    def __iter__(self) -> Iterator[dict]:
+        return chain(islice(self._log, self._base_len), self._messages)
+
+    @property
+    def new_messages(self) -> list[dict]:
+        """分叉之后新增的消息"""
+        return self._messages
+
+    def append(self, message: dict) -> None:
+        if self._closed:
+            raise ValueError("branch has already been committed or discarded")
+        self._messages.append(message)
+
+    def to_list(self) -> list[dict]:
+        """历史前缀 + 分支消息 (浅拷贝), 用于构造请求"""
+        return self._log._messages[: self._base_len] + self._messages
+
+    def commit(self) -> None:
+        """把分支中的消息加入历史, 开销只与分支中的消息数有关"""
+        if self._closed:
+            raise ValueError("branch has already been committed or discarded")
+        if len(self._log) != self._base_len:
+            raise BranchConflict("the log has been appended to since this branch was created")
+        self._log._messages.extend(self._messages)
+        self._closed = True
+
+    def discard(self) -> None:
+        self._messages = []
+        self._closed = True
@@ -0,0 +1,98 @@
+"""对话历史基准测试: 每轮 deepcopy 整个历史 vs MessageLog 分支
+
+模拟 tool_use_basic 的一轮: 追加用户消息 -> 分叉 -> 追加 tool_calls 与工具结果 -> 丢弃分支并追加最终回答.
+历史中的工具结果较长 (--tool-output-chars), 分别在历史长度为 --sizes 时统计每轮的耗时与新分配的内存.
+不包括构造请求时的浅拷贝 (to_list) 和 JSON 序列化, 这两项对两种做法相同, 单独列出 to_list 的耗时.
+
+用法:
+    python examples/tool_use_basic/message_log_benchmark.py --sizes 100 1000 10000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from message_log import MessageLog
+
+
+def make_turn(i: int, tool_output_chars: int) -> list[dict]:
+    """一轮对话中的消息: user, assistant(tool_calls), tool, assistant"""
+    return [
+        {"role": "user", "content": f"第 {i} 轮: 深圳今天的天气怎样"},
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": f"call_{i}",
+                    "type": "function",
+                    "function": {"name": "get_weather", "arguments": '{"location": "深圳"}'},
+                }
+            ],
+        },
+        {"role": "tool", "content": "晴" * tool_output_chars, "tool_call_id": f"call_{i}"},
+        {"role": "assistant", "content": f"第 {i} 轮的回答"},
+    ]
+
+
+def turn_deepcopy(history: list[dict], turn: list[dict]) -> None:
+    user, tool_call, tool_result, answer = turn
+    history.append(user)
+    messages = deepcopy(history)
+    messages.append(tool_call)
+    messages.append(tool_result)
+    history.append(answer)
+
+
+def turn_branch(history: MessageLog, turn: list[dict]) -> None:
+    user, tool_call, tool_result, answer = turn
+    history.append(user)
+    messages = history.branch()
+    messages.append(tool_call)
+    messages.append(tool_result)
+    messages.discard()
+    history.append(answer)
+
+
+def measure(fn, history, turns: list[list[dict]]) -> tuple[float, float]:
+    """返回 (平均每轮耗时 µs, 平均每轮新分配内存峰值 KiB)"""
+    start = time.perf_counter()
+    for turn in turns:
+        fn(history, turn)
+    elapsed = (time.perf_counter() - start) / len(turns) * 1e6
+    tracemalloc.start()
+    fn(history, turns[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="历史中的消息条数")
+    parser.add_argument("--turns", type=int, default=20, help="每个历史长度下测量的轮数")
+    parser.add_argument("--tool-output-chars", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'messages':>9} {'deepcopy µs/turn':>17} {'KiB':>9} {'branch µs/turn':>15} {'KiB':>6} {'to_list µs':>11}")
+    for size in args.sizes:
+        # 历史中包含工具调用过程 (例如 commit 了分支), 以体现长工具输出的拷贝开销
+        messages = [m for i in range(size // 4 + 1) for m in make_turn(i, args.tool_output_chars)][:size]
+        turns = [make_turn(size + i, args.tool_output_chars) for i in range(args.turns)]
+
+        copy_us, copy_kib = measure(turn_deepcopy, list(messages), turns)
+        log = MessageLog(messages)
+        branch_us, branch_kib = measure(turn_branch, log, turns)
+        start = time.perf_counter()
+        for _ in range(args.turns):
+            log.branch().to_list()
+        to_list_us = (time.perf_counter() - start) / args.turns * 1e6
+        print(f"{size:>9} {copy_us:>17.0f} {copy_kib:>9.0f} {branch_us:>15.1f} {branch_kib:>6.1f} {to_list_us:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
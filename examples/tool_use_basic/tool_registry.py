@@ -0,0 +1,188 @@
+"""工具注册表: JSON schema 定义 + 实现, 并发执行同一条 assistant 消息中的多个 tool_calls
+
+- `definitions` 直接作为请求中的 `tools` 字段
+- 同一条消息里的多个调用彼此独立, 并发执行: 同步工具放入线程池, 异步工具在事件循环中执行;
+  一轮的耗时约为最慢的那个工具, 而不是所有工具耗时之和
+- 每个工具有各自的超时; 超时、参数错误、未知工具、格式错误的调用、工具抛出的异常、无法序列化的返回值
+  都作为该工具的结果返回给模型, 而不是中断整个对话
+- 返回的 tool 消息与 tool_calls 的顺序一致
+
+用法:
+    registry = ToolRegistry()
+
+    @registry.register(GET_WEATHER_SCHEMA, timeout=5)
+    def get_weather(location: str) -> str: ...
+
+    payload = {"tools": registry.definitions, ...}
+    messages.extend(registry.execute(llm_output_message["tool_calls"]))
+"""
+
+import asyncio
+import inspect
+import json
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+
+@dataclass
+class Tool:
+    schema: dict  # {"name": ..., "description": ..., "parameters": {...}}
+    func: Callable[..., Any]
+    timeout: float | None = None
+
+    @property
+    def name(self) -> str:
+        return self.schema["name"]
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.func)
+
+
+class ToolError(Exception):
+    """作为工具结果返回给模型的错误"""
+
+
+class _ToolRaised(Exception):
+    """包装工具自身抛出的异常, 与注册表的超时 (wait_for 的 TimeoutError) 区分开"""
+
+    def __init__(self, error: Exception):
+        super().__init__(error)
+        self.error = error
+
+
+def _to_content(result: Any) -> str:
+    return result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+
+
+# 序列化放在工具调用内: 返回值无法转成 JSON (如 set) 同样作为该工具的错误
+def _call_sync(func: Callable[..., Any], args: dict) -> str:
+    try:
+        return _to_content(func(**args))
+    except Exception as e:
+        raise _ToolRaised(e) from e
+
+
+async def _call_async(func: Callable[..., Any], args: dict) -> str:
+    try:
+        return _to_content(await func(**args))
+    except Exception as e:
+        raise _ToolRaised(e) from e
+
+
+def _tool_name(tool_call: dict) -> str | None:
+    function = tool_call.get("function")
+    return function.get("name") if isinstance(function, dict) else None
+
+
+class ToolRegistry:
+    """
+    Args:
+        max_workers: 同步工具线程池的线程数
+        default_timeout: 未单独指定超时的工具的超时时间(秒), None 表示不限
+    """
+
+    def __init__(self, max_workers: int = 8, default_timeout: float | None = 30.0):
+        self.tools: dict[str, Tool] = {}
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._runner: asyncio.Runner | None = None
+        # 最近一次 execute 中各调用的耗时 [(name, seconds, ok)], 以及整轮的耗时
+        self.last_latencies: list[tuple[str, float, bool]] = []
+        self.last_wall_time = 0.0
+
+    def register(self, schema: dict, timeout: float | None = None) -> Callable[[Callable], Callable]:
+        """schema 为 OpenAI function 定义, 可以带或不带外层的 {"type": "function", "function": ...}"""
+        schema = schema.get("function", schema)
+        if "name" not in schema:
+            raise ValueError("tool schema must have a name")
+
+        def decorator(func: Callable) -> Callable:
+            self.tools[schema["name"]] = Tool(schema, func, timeout)
+            return func
+
+        return decorator
+
+    @property
+    def definitions(self) -> list[dict]:
+        return [{"type": "function", "function": tool.schema} for tool in self.tools.values()]
+
+    def _parse(self, tool_call: dict) -> tuple[Tool, dict]:
+        name = _tool_name(tool_call)
+        if name is None:
+            raise ToolError("malformed tool call: missing function name")
+        if name not in self.tools:
+            raise ToolError(f"unknown tool {name!r}")
+        tool = self.tools[name]
+        try:
+            args = json.loads(tool_call["function"].get("arguments") or "{}")
+        except json.JSONDecodeError as e:
+            raise ToolError(f"invalid JSON arguments: {e}") from None
+        if not isinstance(args, dict):
+            raise ToolError("arguments must be a JSON object")
+        parameters = tool.schema.get("parameters") or {}
+        if missing := [key for key in parameters.get("required", []) if key not in args]:
+            raise ToolError(f"missing required arguments: {', '.join(missing)}")
+        properties = parameters.get("properties")
+        if properties is not None and parameters.get("additionalProperties", True) is False:
+            if unknown := [key for key in args if key not in properties]:
+                raise ToolError(f"unexpected arguments: {', '.join(unknown)}")
+        return tool, args
+
+    async def _run(self, tool_call: dict) -> tuple[str, float, bool]:
+        start = time.perf_counter()
+        name = _tool_name(tool_call)
+        try:
+            tool, args = self._parse(tool_call)
+            timeout = tool.timeout if tool.timeout is not None else self.default_timeout
+            # 工具自身的异常 (包括工具内部的 TimeoutError, 如 HTTP 超时) 包装成 _ToolRaised,
+            # 这样下面的 TimeoutError 只可能来自 wait_for
+            if tool.is_async:
+                awaitable = _call_async(tool.func, args)
+            else:
+                # 超时后线程中的调用无法被中断, 只是不再等待其结果
+                awaitable = asyncio.get_running_loop().run_in_executor(self._executor, partial(_call_sync, tool.func, args))
+            content, ok = await asyncio.wait_for(awaitable, timeout), True
+        except TimeoutError:
+            content, ok = f"Error: tool {name} timed out after {timeout}s", False
+        except ToolError as e:
+            content, ok = f"Error: {e}", False
+        except _ToolRaised as e:
+            error = e.error
+            if isinstance(error, ToolError):
+                content, ok = f"Error: {error}", False
+            else:
+                content, ok = f"Error: {name} raised {type(error).__name__}: {error}", False
+        except Exception as e:
+            # 兜底: 注册表自身的意外错误也只影响这一个调用
+            content, ok = f"Error: {name} failed with {type(e).__name__}: {e}", False
+        return content, time.perf_counter() - start, ok
+
+    async def aexecute(self, tool_calls: list[dict]) -> list[dict]:
+        """并发执行, 返回与 tool_calls 顺序一致的 tool 消息"""
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._run(call) for call in tool_calls))
+        self.last_wall_time = time.perf_counter() - start
+        self.last_latencies = [
+            (_tool_name(call), seconds, ok) for call, (_, seconds, ok) in zip(tool_calls, results)
+        ]
+        return [
+            {"role": "tool", "content": content, "tool_call_id": call.get("id")}
+            for call, (content, _, _) in zip(tool_calls, results)
+        ]
+
+    def execute(self, tool_calls: list[dict]) -> list[dict]:
+        """同步调用方使用; 异步工具在注册表持有的事件循环中执行, 多次调用之间复用"""
+        if self._runner is None:
+            self._runner = asyncio.Runner()
+        return self._runner.run(self.aexecute(tool_calls))
+
+    def close(self) -> None:
+        if self._runner is not None:
+            self._runner.close()
+            self._runner = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,17 +1,32 @@
 from pyexpat.errors import messages
 from dotenv import load_dotenv
 import os
-import requests
-from copy import deepcopy
 import json
+import time
 from typing import Literal
 
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 使 examples/common 可导入
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common.http_client import post_json
+from common.llm import use_mock_backend
+from common.mock_llm import get_mock_backend
+from common.mock_server import start_mock_server
+from message_log import MessageLog
+from tool_registry import ToolRegistry
+
 load_dotenv()
 
 provider = "WILDCARD"
 MODEL = "gpt-5-mini"
-BASE_URL = os.environ[f"{provider}_BASE_URL"]
-API_KEY = os.environ[f"{provider}_API_KEY"]
+if use_mock_backend():
+    # 离线模式: 在本进程内启动 OpenAI 兼容的 mock 服务
+    _mock_server, BASE_URL = start_mock_server(get_mock_backend())
+    API_KEY = "mock"
+else:
+    BASE_URL = os.environ[f"{provider}_BASE_URL"]
+    API_KEY = os.environ[f"{provider}_API_KEY"]
 
 # 用户输入
 def render_yellow(text: str) -> str:
@@ -36,46 +51,67 @@ def print_message(message: dict, color: Literal["red", "green"]) -> None:
     elif color == "green":
         print(render_green(output_data))
 
+# 每次 LLM 请求的耗时分解 (见 common/http_client.py)
+timings = []
+
 def call_llm(payload: dict):
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}",
-    }
-    response = requests.post(f"{BASE_URL}/chat/completions", json=payload, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    # 复用进程内共享的连接池 (keep-alive), 带超时与 429/5xx 重试
+    headers = {"Authorization": f"Bearer {API_KEY}"}
+    response, timing = post_json(f"{BASE_URL}/chat/completions", payload, headers)
+    timings.append(timing)
+    print(render_green(f"[llm] {timing}"))
+    return response
+
+def summarize_timings() -> str:
+    if not timings:
+        return "no LLM requests"
+    n = len(timings)
+    new_connections = sum(not t.reused for t in timings)
+    return (
+        f"{n} LLM requests, {new_connections} new connection(s), "
+        f"avg connect {sum(t.connect for t in timings) / n * 1e3:.1f} ms, "
+        f"avg TTFB {sum(t.ttfb for t in timings) / n * 1e3:.1f} ms, "
+        f"avg total {sum(t.total for t in timings) / n * 1e3:.1f} ms, "
+        f"retries {sum(t.attempts - 1 for t in timings)}"
+    )
 
+# 工具定义 (JSON schema) 与实现注册在一起, 同一条消息中的多个工具调用并发执行 (见 tool_registry.py)
+registry = ToolRegistry()
+
+# 模拟调用天气接口的耗时(秒)
+WEATHER_API_LATENCY = 0.3
+
+@registry.register(
+    {
+        "name": "get_weather",
+        "description": "Get the current weather for a given location.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "location": {
+                    "type": "string",
+                    "description": "The city and state, e.g., San Francisco, CA",
+                },
+            },
+            "required": ["location"],
+        },
+    },
+    timeout=5,
+)
 def get_weather(location: str) -> str:
+    time.sleep(WEATHER_API_LATENCY)
     return f"{location} 的天气是晴, 35摄氏度"
 
 def main():
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "get_weather",
-                "description": "Get the current weather for a given location.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "location": {
-                            "type": "string",
-                            "description": "The city and state, e.g., San Francisco, CA",
-                        },
-                    },
-                    "required": ["location"],
-                },
-            }
-        }
-    ]
     common_payload = {
         "model": MODEL,
         # "messages": [],
-        "tools": tools,
+        "tools": registry.definitions,
         "tool_choice": "auto",  # 模型自动判断是否需要进行工具调用
     }
 
-    conversation_messages = []
+    # 只追加的对话历史, 每轮的工具调用在引用它的分支上进行, 无需复制历史 (见 message_log.py)
+    conversation_messages = MessageLog()
     conversation_messages.append(
         {"role": "system", "content": "You are a helpful assistant."},
     )
@@ -85,6 +121,8 @@ def main():
     while True:
         user_input = input(render_yellow("请输入问题: "))
         if user_input.lower() == "exit":
+            print(summarize_timings())
+            registry.close()
             break
         conversation_messages.append({"role": "user", "content": user_input})
         # HumanMessage
@@ -93,9 +131,9 @@ def main():
         max_iterations = 5
         current_iteration = 0
 
-        messages = deepcopy(conversation_messages)
-        while current_iteration < max_iterations:   
-            response = call_llm({**common_payload, "messages": messages})
+        messages = conversation_messages.branch()
+        while current_iteration < max_iterations:
+            response = call_llm({**common_payload, "messages": messages.to_list()})
             choice_tool_call = response["choices"][0]["finish_reason"] == "tool_calls"
             llm_output_message = response["choices"][0]['message']
             if choice_tool_call:
@@ -121,32 +159,24 @@ def main():
                 messages.append(llm_output_message)
                 print_message(messages[-1], "green")
 
-                for tool_call in llm_output_message["tool_calls"]:
-                    tool_name = tool_call['function']["name"]
-                    tool_args = json.loads(tool_call['function']["arguments"])
-
-                    if tool_name == "get_weather":
-                        tool_response = get_weather(**tool_args)
-                        # ToolMessage: 工具执行结果
-                        messages.append(
-                            {
-                                "role": "tool",
-                                "content": str(tool_response),
-                                "tool_call_id": tool_call["id"]
-                            }
-                        )
-                        print_message(messages[-1], "green")
-                    else:
-                        raise ValueError(f"Unknown tool: {tool_name}")
+                # ToolMessage: 工具执行结果, 多个调用并发执行, 按 tool_calls 的顺序返回
+                tool_messages = registry.execute(llm_output_message["tool_calls"])
+                for tool_message in tool_messages:
+                    messages.append(tool_message)
+                    print_message(messages[-1], "green")
+                latencies = ", ".join(f"{name} {seconds * 1e3:.0f} ms" for name, seconds, _ in registry.last_latencies)
+                print(render_green(f"[tools] {latencies}; wall time {registry.last_wall_time * 1e3:.0f} ms"))
             else:
-                # AIMessage
+                # AIMessage: 工具调用过程不加入历史, 只保留最终回答
+                messages.discard()
                 conversation_messages.append(response['choices'][0]['message'])
                 print_message(conversation_messages[-1], "red")
                 break
             
             current_iteration += 1
             if current_iteration == max_iterations and choice_tool_call:
-                conversation_messages.append("已多次使用工具调用但未得到最终回答，请您换个问法")
+                messages.discard()
+                conversation_messages.append({"role": "assistant", "content": "已多次使用工具调用但未得到最终回答，请您换个问法"})
                 print_message(conversation_messages[-1], "red")
 
 if __name__ == "__main__":
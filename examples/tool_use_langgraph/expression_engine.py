@@ -0,0 +1,258 @@
+"""calculator 工具的表达式引擎: 校验一次、编译一次、向量化求值
+
+`ne.evaluate(expression)` 每次都要解析表达式; 而 agent 给出的表达式几乎每次数字都不同
+(如 "1500 * 7.8" 与 "800 * 7.2"), numexpr 自带的缓存以表达式字符串为 key, 基本不会命中.
+
+`ExpressionEngine`:
+- 用 Python 的 ast 解析并校验 (长度、节点数、只允许算术/比较运算与白名单函数), 非法或病态的输入在求值前就被拒绝
+- 把所有数字字面量提取成 float64 参数 ("1500 * 7.8" -> "_c0 * _c1"), 得到与具体数字无关的模板;
+  模板编译成 `numexpr.NumExpr` 后缓存 (LRU), 结构相同的表达式共用同一个编译结果.
+  字面量都按浮点数计算, 也就避免了 numexpr 在编译期用 Python 整数折叠常量 (例如 9**9**9**9 会卡住)
+- 变量可以是标量或数组: 对一组取值只需一次 numexpr 调用
+- `evaluate_many`: 同一轮中的多个表达式按模板分组, 每组的字面量堆叠成数组, 一次调用算完
+
+numexpr 会把大数组分块交给线程池计算; `num_threads` 是进程级设置, 只在创建引擎时设置一次.
+"""
+
+import ast
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+
+import numexpr as ne
+import numpy as np
+
+# numexpr 支持的函数中允许使用的部分
+ALLOWED_FUNCTIONS = frozenset({
+    "sqrt", "exp", "expm1", "log", "log10", "log1p", "log2",
+    "sin", "cos", "tan", "arcsin", "arccos", "arctan", "arctan2",
+    "sinh", "cosh", "tanh", "arcsinh", "arccosh", "arctanh",
+    "abs", "where", "floor", "ceil",
+})
+NAMED_CONSTANTS = {"pi": math.pi, "e": math.e}
+
+_BIN_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod)
+_UNARY_OPS = (ast.UAdd, ast.USub)
+_CMP_OPS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+_CONST_PREFIX = "_c"
+
+
+class ExpressionError(ValueError):
+    """表达式不合法或超出限制"""
+
+
+@dataclass(frozen=True)
+class ParsedExpression:
+    template: str  # 字面量替换为 _c0, _c1, ... 之后的表达式
+    variables: tuple[str, ...]  # 用户变量, 按名称排序
+    constants: tuple[float, ...]
+    # 字面量对应的 0 维数组, 解析时创建一次
+    constant_args: tuple[np.ndarray, ...] = field(default=(), compare=False, repr=False)
+
+    @property
+    def signature(self) -> tuple[str, ...]:
+        return self.variables + tuple(f"{_CONST_PREFIX}{i}" for i in range(len(self.constants)))
+
+
+class _Lifter(ast.NodeTransformer):
+    """校验节点类型并把字面量替换成参数"""
+
+    def __init__(self, max_nodes: int):
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.constants: list[float] = []
+        self.variables: set[str] = set()
+
+    def visit(self, node: ast.AST) -> ast.AST:
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise ExpressionError(f"expression has more than {self.max_nodes} nodes")
+        return super().visit(node)
+
+    def _lift(self, value: float) -> ast.Name:
+        self.constants.append(float(value))
+        return ast.Name(id=f"{_CONST_PREFIX}{len(self.constants) - 1}", ctx=ast.Load())
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"unsupported literal {node.value!r}")
+        if isinstance(node.value, int) and node.value.bit_length() > 1024:
+            raise ExpressionError("integer literal is too large")
+        return self._lift(node.value)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id in NAMED_CONSTANTS:
+            return self._lift(NAMED_CONSTANTS[node.id])
+        if node.id.startswith("_"):
+            raise ExpressionError(f"invalid variable name {node.id!r}")
+        self.variables.add(node.id)
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        if isinstance(node.op, ast.FloorDiv):
+            # numexpr 没有整除运算, 改写为 floor(a / b), 与 Python 的 // 一致 (向负无穷取整)
+            division = ast.BinOp(left=self.visit(node.left), op=ast.Div(), right=self.visit(node.right))
+            return ast.Call(func=ast.Name(id="floor", ctx=ast.Load()), args=[division], keywords=[])
+        return self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if not isinstance(node.func, ast.Name) or node.func.id not in ALLOWED_FUNCTIONS or node.keywords:
+            raise ExpressionError(f"unsupported function call: {ast.unparse(node.func)}")
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        allowed = (
+            ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Load, *_BIN_OPS, *_UNARY_OPS, *_CMP_OPS
+        )
+        if not isinstance(node, allowed):
+            raise ExpressionError(f"unsupported syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+
+
+def _finite(result: np.ndarray, expression: str) -> np.ndarray:
+    # numexpr 按 IEEE 规则计算, 1/0 得到 inf, 0/0 得到 nan; 这类结果不应当作数值返回给模型
+    if not np.isfinite(result).all():
+        raise ExpressionError(f"{expression!r} has no finite value (division by zero or overflow)")
+    return result
+
+
+class ExpressionEngine:
+    """
+    Args:
+        max_length: 表达式最大字符数
+        max_nodes: 语法树最大节点数
+        max_elements: 单个变量 / 结果数组的最大元素数
+        cache_size: 解析结果与编译结果的缓存条目数
+        num_threads: numexpr 线程数 (进程级设置), None 表示保持 numexpr 的默认值
+    """
+
+    def __init__(
+        self,
+        max_length: int = 1000,
+        max_nodes: int = 500,
+        max_elements: int = 10_000_000,
+        cache_size: int = 512,
+        num_threads: int | None = None,
+    ):
+        self.max_length = max_length
+        self.max_nodes = max_nodes
+        self.max_elements = max_elements
+        self.cache_size = cache_size
+        self._parsed: OrderedDict[str, ParsedExpression] = OrderedDict()
+        self._compiled: OrderedDict[tuple[str, tuple[str, ...]], ne.NumExpr] = OrderedDict()
+        self._lock = threading.Lock()
+        self.parse_hits = self.compile_hits = self.compiles = 0
+        if num_threads is not None:
+            ne.set_num_threads(num_threads)
+
+    def _cache_get(self, cache: OrderedDict, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, cache: OrderedDict, key, value) -> None:
+        with self._lock:
+            cache[key] = value
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def parse(self, expression: str) -> ParsedExpression:
+        if not isinstance(expression, str):
+            raise ExpressionError("expression must be a string")
+        if len(expression) > self.max_length:
+            raise ExpressionError(f"expression is longer than {self.max_length} characters")
+        if (parsed := self._cache_get(self._parsed, expression)) is not None:
+            self.parse_hits += 1
+            return parsed
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except (SyntaxError, RecursionError, MemoryError) as e:
+            raise ExpressionError(f"invalid expression: {e}") from None
+        lifter = _Lifter(self.max_nodes)
+        try:
+            tree = lifter.visit(tree)
+        except RecursionError:
+            raise ExpressionError("expression is nested too deeply") from None
+        parsed = ParsedExpression(
+            ast.unparse(tree),
+            tuple(sorted(lifter.variables)),
+            tuple(lifter.constants),
+            tuple(np.asarray(c, dtype=np.float64) for c in lifter.constants),
+        )
+        self._cache_put(self._parsed, expression, parsed)
+        return parsed
+
+    def _compile(self, parsed: ParsedExpression) -> ne.NumExpr:
+        key = (parsed.template, parsed.signature)
+        if (compiled := self._cache_get(self._compiled, key)) is not None:
+            self.compile_hits += 1
+            return compiled
+        try:
+            compiled = ne.NumExpr(parsed.template, signature=[(name, np.float64) for name in parsed.signature])
+        except Exception as e:
+            raise ExpressionError(f"invalid expression: {e}") from None
+        self.compiles += 1
+        self._cache_put(self._compiled, key, compiled)
+        return compiled
+
+    def _variable(self, name: str, variables: Mapping[str, float | Sequence[float]]) -> np.ndarray:
+        if name not in variables:
+            raise ExpressionError(f"missing value for variable {name!r}")
+        try:
+            value = np.asarray(variables[name], dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ExpressionError(f"variable {name!r} must be a number or a list of numbers") from None
+        if value.ndim > 1:
+            raise ExpressionError(f"variable {name!r} must be a number or a 1-D list of numbers")
+        if value.size > self.max_elements:
+            raise ExpressionError(f"variable {name!r} has more than {self.max_elements} elements")
+        return value
+
+    def _run(self, compiled: ne.NumExpr, args: list[np.ndarray]) -> np.ndarray:
+        if any(a.ndim for a in args):
+            shape = np.broadcast_shapes(*(a.shape for a in args))
+            if math.prod(shape) > self.max_elements:
+                raise ExpressionError(f"result would have more than {self.max_elements} elements")
+        return compiled(*args)
+
+    def evaluate(
+        self, expression: str, variables: Mapping[str, float | Sequence[float]] | None = None
+    ) -> float | np.ndarray:
+        """变量都是标量时返回 float, 否则返回数组"""
+        parsed = self.parse(expression)
+        variables = variables or {}
+        args = [self._variable(name, variables) for name in parsed.variables]
+        args += parsed.constant_args
+        result = _finite(self._run(self._compile(parsed), args), expression)
+        return float(result) if result.ndim == 0 else result
+
+    def evaluate_many(
+        self, expressions: Sequence[str], variables: Mapping[str, float | Sequence[float]] | None = None
+    ) -> list[float | np.ndarray]:
+        """多个表达式按模板分组, 每组一次 numexpr 调用; 返回值与 expressions 顺序一致"""
+        variables = variables or {}
+        groups: dict[tuple[str, tuple[str, ...]], list[tuple[int, ParsedExpression]]] = {}
+        for i, expression in enumerate(expressions):
+            parsed = self.parse(expression)
+            groups.setdefault((parsed.template, parsed.signature), []).append((i, parsed))
+
+        results: list[float | np.ndarray] = [None] * len(expressions)
+        for members in groups.values():
+            parsed = members[0][1]
+            values = [self._variable(name, variables) for name in parsed.variables]
+            ndim = max((v.ndim for v in values), default=0)
+            # 字面量沿第 0 维堆叠, 变量沿其后的维度广播: 结果的第 i 行对应组内第 i 个表达式
+            constants = np.array([p.constants for _, p in members], dtype=np.float64).reshape(len(members), -1)
+            args = [v.reshape(1, *v.shape) if v.ndim else v for v in values]
+            args += [constants[:, j].reshape(-1, *([1] * ndim)) for j in range(constants.shape[1])]
+            output = self._run(self._compile(parsed), args)
+            output = np.broadcast_to(output, (len(members), *output.shape[1:]))
+            for row, (i, _) in enumerate(members):
+                _finite(output[row], expressions[i])
+                results[i] = float(output[row]) if output[row].ndim == 0 else output[row]
+        return results
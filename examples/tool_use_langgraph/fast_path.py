@@ -0,0 +1,234 @@
+"""agent 之前的快速路由: 确定性的简单问题直接调用工具回答, 不经过 LLM
+
+"现在几点"、"100 美元换成人民币是多少" 这类问题只需要调用一次工具, 不需要推理,
+却要经过 agent -> LLM -> tools -> agent -> LLM 两次 LLM 往返 (秒级).
+`FastPathRouter` 用本地规则 (正则) 识别这类问题, 直接调用对应工具并格式化回答 (毫秒级); 其余问题交给 agent.
+
+- 规则只匹配完整的、独立的问题 (正则整句匹配), 依赖上下文的问题 (如 "那提前两天呢") 一律交给 LLM
+- 可选的 `classifier` 钩子 (例如本地小模型): 规则都不匹配时调用, 返回 (工具名, 参数) 或 None
+- 写入的消息与 agent 调用工具时相同 (AIMessage(tool_calls) -> ToolMessage -> AIMessage),
+  后续轮次的 LLM 看到的对话历史是完整一致的
+- 工具执行出错 (如日期不合法) 时同样交给 LLM
+- 统计各规则的命中次数、命中率与耗时
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+_END = r"\s*[?？。!！]*\s*"
+_CURRENCIES = {
+    "美元": "USD", "美金": "USD", "usd": "USD",
+    "欧元": "EUR", "eur": "EUR",
+    "人民币": "CNY", "元": "CNY", "rmb": "CNY", "cny": "CNY",
+}
+_CURRENCY = "|".join(sorted(map(re.escape, _CURRENCIES), key=len, reverse=True))
+_CURRENCY_NAMES = {"USD": "美元", "EUR": "欧元", "CNY": "人民币"}
+_DATE = r"\d{4}-\d{1,2}-\d{1,2}"
+
+
+def _date(text: str) -> str:
+    """2025-1-5 -> 2025-01-05"""
+    year, month, day = text.split("-")
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def _number(value: float) -> str:
+    """10 位有效数字: 1/300 -> 0.003333333333, 不会因保留两位小数而变成 0"""
+    return f"{value:,.10g}"
+
+
+@dataclass
+class Route:
+    """一条规则: 正则整句匹配后, 用 args 构造工具参数, 用 answer 格式化回答"""
+
+    name: str
+    tool: str
+    pattern: re.Pattern
+    args: Callable[[re.Match], dict]
+    answer: Callable[[re.Match, dict, Any], str]
+
+
+DEFAULT_ROUTES = [
+    Route(
+        name="current_time",
+        tool="current_datetime",
+        pattern=re.compile(
+            r"(?:请问)?(?:现在|当前|今天)?(?:是)?(?:几点了?|什么时间|的?时间(?:是多少|是几点)?|几号|几月几号|什么日期|的?日期(?:是多少)?)"
+            + _END
+        ),
+        args=lambda m: {},
+        answer=lambda m, args, result: f"现在是 {result}",
+    ),
+    Route(
+        name="convert_currency",
+        tool="convert_currency",
+        pattern=re.compile(
+            rf"(\d+(?:\.\d+)?)\s*({_CURRENCY})\s*(?:换成|兑换成?|换算成?|折合|等于|是)\s*(?:多少)?\s*({_CURRENCY})"
+            rf"\s*(?:是多少|有多少|多少钱|多少)?" + _END,
+            re.IGNORECASE,
+        ),
+        args=lambda m: {
+            "amount": float(m[1]),
+            "from_currency": _CURRENCIES[m[2].lower()],
+            "to_currency": _CURRENCIES[m[3].lower()],
+        },
+        answer=lambda m, args, result: (
+            f"{_number(args['amount'])} {_CURRENCY_NAMES[args['from_currency']]} ≈ "
+            f"{_number(float(result))} {_CURRENCY_NAMES[args['to_currency']]}"
+        ),
+    ),
+    Route(
+        name="date_difference",
+        tool="date_difference",
+        pattern=re.compile(rf"({_DATE})\s*(?:和|与|到|至|距离?)\s*({_DATE})\s*(?:之间)?\s*(?:相差|相隔|差|隔|有)了?\s*多少天" + _END),
+        args=lambda m: {"date1": _date(m[1]), "date2": _date(m[2])},
+        answer=lambda m, args, result: f"{args['date1']} 与 {args['date2']} 相差 {result} 天",
+    ),
+    Route(
+        name="shift_date",
+        tool="shift_date",
+        pattern=re.compile(
+            rf"({_DATE})\s*(?:之|以)?(后|前)\s*(\d+)\s*天\s*(?:是)?\s*(?:哪天|哪一天|几号|几月几号|什么日期)" + _END
+        ),
+        args=lambda m: {"base_date": _date(m[1]), "day": int(m[3]) if m[2] == "后" else -int(m[3])},
+        answer=lambda m, args, result: f"{args['base_date']} {m[2]} {m[3]} 天是 {result}",
+    ),
+    Route(
+        name="calculator",
+        tool="calculator",
+        # 至少包含一个运算符的纯算式; 含日期 (2025-10-18) 的不是算式
+        pattern=re.compile(
+            rf"(?!.*(?<![\d.]){_DATE}(?![\d.]))"
+            r"(?:计算|算一下|请计算|求)?\s*([\d.\s()]+(?:\s*(?:\*\*|[-+*/%])\s*[\d.\s()]+)+)\s*(?:=|等于)?\s*(?:多少|几)?" + _END
+        ),
+        args=lambda m: {"expression": m[1].strip()},
+        answer=lambda m, args, result: f"{args['expression']} = {_number(float(result))}",
+    ),
+]
+
+
+@dataclass
+class FastPathStats:
+    queries: int = 0
+    fallthrough: int = 0
+    errors: int = 0  # 规则命中但工具执行失败, 交给 LLM
+    hits: dict[str, int] = field(default_factory=dict)
+    hit_time: float = 0.0
+
+    @property
+    def hit_count(self) -> int:
+        return sum(self.hits.values())
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hit_count / self.queries if self.queries else 0.0
+
+    def __str__(self) -> str:
+        avg = self.hit_time / self.hit_count * 1e3 if self.hit_count else 0.0
+        routes = ", ".join(f"{name}={n}" for name, n in sorted(self.hits.items()))
+        return (
+            f"fast path: {self.hit_count}/{self.queries} answered without LLM ({self.hit_rate:.1%}), "
+            f"avg {avg:.2f} ms; {self.fallthrough} sent to agent, {self.errors} tool errors; [{routes}]"
+        )
+
+
+class FastPathRouter:
+    """
+    Args:
+        tools: 可用的工具, 规则中引用的工具不在其中时该规则不生效
+        routes: 规则列表, 按顺序匹配
+        classifier: 规则都不匹配时调用 classifier(text), 返回 (工具名, 参数) 或 None;
+            命中时的回答为 "工具结果"
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        routes: Sequence[Route] = DEFAULT_ROUTES,
+        classifier: Callable[[str], tuple[str, dict] | None] | None = None,
+    ):
+        self.tools = {t.name: t for t in tools}
+        self.routes = [r for r in routes if r.tool in self.tools]
+        self.classifier = classifier
+        self.stats = FastPathStats()
+        self._lock = threading.Lock()
+
+    def _match(self, text: str) -> tuple[str, str, dict, Callable[[Any], str]] | None:
+        """返回 (规则名, 工具名, 参数, 格式化回答的函数)"""
+        for route in self.routes:
+            if m := route.pattern.fullmatch(text):
+                args = route.args(m)
+                return route.name, route.tool, args, lambda result, route=route, m=m, args=args: route.answer(m, args, result)
+        if self.classifier is not None and (choice := self.classifier(text)) is not None:
+            tool, args = choice
+            if tool in self.tools:
+                return "classifier", tool, args, str
+        return None
+
+    def route(self, messages: Sequence[AnyMessage]) -> dict | None:
+        """最后一条消息能直接回答时返回要写入 state 的消息, 否则返回 None"""
+        if not messages or not isinstance(messages[-1], HumanMessage) or not isinstance(messages[-1].content, str):
+            return None
+        start = time.perf_counter()
+        text = messages[-1].content.strip()
+        matched = self._match(text)
+        if matched is None:
+            with self._lock:
+                self.stats.queries += 1
+                self.stats.fallthrough += 1
+            return None
+        name, tool, args, answer = matched
+        call_id = f"call_fast_{uuid.uuid4().hex[:12]}"
+        try:
+            result = self.tools[tool].invoke(args)
+            content = answer(result)
+        except Exception:
+            with self._lock:
+                self.stats.queries += 1
+                self.stats.errors += 1
+            return None
+        with self._lock:
+            self.stats.queries += 1
+            self.stats.hits[name] = self.stats.hits.get(name, 0) + 1
+            self.stats.hit_time += time.perf_counter() - start
+        return {
+            "messages": [
+                AIMessage(content="", tool_calls=[{"name": tool, "args": args, "id": call_id, "type": "tool_call"}]),
+                ToolMessage(content=str(result), name=tool, tool_call_id=call_id),
+                AIMessage(content=content),
+            ]
+        }
+
+
+# 规则的自检: (问题, 应命中的规则名, None 表示交给 LLM)
+ROUTE_CHECKS = [
+    ("现在几点了?", "current_time"),
+    ("100 美元换成人民币是多少", "convert_currency"),
+    ("2025-10-01 和 2025-10-18 相差多少天", "date_difference"),
+    ("2025-10-18 之后 30 天是哪天", "shift_date"),
+    ("计算 3 + 5 * (2 - 1)", "calculator"),
+    ("1/300", "calculator"),
+    ("0.001*0.002", "calculator"),
+    ("2025-10-18", None),
+    ("2025-10-18?", None),
+    ("那提前两天呢", None),
+]
+# _number 的自检: (值, 回答中的写法)
+NUMBER_CHECKS = [(1 / 300, "0.003333333333"), (0.001 * 0.002, "2e-06"), (1234567.5, "1,234,567.5"), (720.0, "720")]
+
+
+if __name__ == "__main__":
+    for text, expected in ROUTE_CHECKS:
+        matched = next((r.name for r in DEFAULT_ROUTES if r.pattern.fullmatch(text)), None)
+        assert matched == expected, (text, matched, expected)
+    for value, expected in NUMBER_CHECKS:
+        assert _number(value) == expected, (value, _number(value), expected)
+    print(f"{len(ROUTE_CHECKS)} route checks, {len(NUMBER_CHECKS)} number checks passed")
@@ -29,21 +29,28 @@
 
 
 from datetime import datetime, timedelta
-import numexpr as ne
-import os
 from typing import Annotated, Literal, TypedDict, Any
 
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, AnyMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
 
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
 
 from dotenv import load_dotenv
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 使 examples/common 可导入
+from common.llm import create_chat_model
+from common.checkpointer import get_checkpointer
+from common.llm_cache import get_llm_cache
+from common.profiling import PhaseProfiler
+from common.tool_cache import ToolCache
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from expression_engine import ExpressionEngine, ExpressionError
+from fast_path import FastPathRouter
 load_dotenv()
 
 # --------------------------
@@ -82,21 +89,37 @@ def convert_currency(amount: float, from_currency: Literal["USD", "EUR", "CNY"],
     return amount * rates[(from_currency, to_currency)]
 
 
+# 表达式校验一次、编译后缓存, 支持批量与向量求值 (见 expression_engine.py)
+expression_engine = ExpressionEngine()
+
+
 @tool
-def calculator(expression: str) -> float:
+def calculator(
+    expression: str | list[str], variables: dict[str, float | list[float]] | None = None
+) -> float | list[float] | list[list[float]]:
     """
-    Evaluate a mathematical expression using numexpr.
+    Evaluate mathematical expressions using numexpr.
 
     Args:
-        expression (str): The expression to evaluate. Must be valid for `numexpr.evaluate()`.
-            Example: "3 + 5 * (2 - 1)"
+        expression (str | list[str]): The expression to evaluate, or a list of expressions to evaluate in one call
+            (e.g. all arithmetic steps of the current question). Supports + - * / // ** %, comparisons,
+            where(), sqrt/exp/log/sin/... and the constants pi and e.
+            Example: "3 + 5 * (2 - 1)", or ["1500 * 7.8", "800 * 7.2"]
+        variables (dict[str, float | list[float]] | None): Values of the names used in the expressions.
+            A list evaluates the expressions for every value at once.
+            Example: {"x": [100, 200, 300]} with "x * 7.2"
 
     Returns:
-        float: The evaluated numerical result.
+        float | list[float] | list[list[float]]: The evaluated numerical result; a list with one result per
+            expression when `expression` is a list, and a list of values per expression when a variable is a list.
     """
     try:
-        return float(ne.evaluate(expression))
-    except Exception as e:
+        if isinstance(expression, str):
+            result = expression_engine.evaluate(expression, variables)
+            return result if isinstance(result, float) else result.tolist()
+        results = expression_engine.evaluate_many(expression, variables)
+        return [r if isinstance(r, float) else r.tolist() for r in results]
+    except ExpressionError as e:
         raise ValueError(f"Invalid expression: {e}")
 
 
@@ -175,26 +198,45 @@ SYSTEM_PROMPT = """
 
 provider = "WILDCARD"
 modelPname = "gpt-5"
-base_url = os.environ[f"{provider}_BASE_URL"]
-api_key = os.environ[f"{provider}_API_KEY"]
-llm = ChatOpenAI(model=modelPname, base_url=base_url, api_key=api_key)
+llm = create_chat_model(provider, modelPname)
 
 
 tools = [convert_currency, calculator, current_datetime, date_difference, shift_date]
-tool_node = ToolNode(tools)
+# 纯函数工具按参数缓存结果 (见 common/tool_cache.py), current_datetime 的结果随时间变化, 不缓存;
+# 同一条 AIMessage 中的多个工具调用由 ToolNode 并发执行
+tool_cache = ToolCache(max_entries=1024, non_cacheable={"current_datetime"})
+tool_node = ToolNode(tools, wrap_tool_call=tool_cache.wrap_tool_call, awrap_tool_call=tool_cache.awrap_tool_call)
 
-# agent 节点
-def agent_node(state: AgentState):
-    """Agent节点，决定是否调用工具"""
+# 各阶段耗时: 启动时构建 prompt/生成工具 schema 各一次, 之后每步只有 prompt 格式化与 LLM 调用
+profiler = PhaseProfiler()
 
+# prompt 与绑定工具后的模型只构建一次; bind_tools 会根据 docstring 与类型注解生成所有工具的 JSON schema,
+# 放在 agent_node 里则每一步都要重新生成
+with profiler.phase("startup: build prompt"):
     prompt = ChatPromptTemplate.from_messages([
         ("system", SYSTEM_PROMPT),
         MessagesPlaceholder("input")
     ])
-    
-    # 绑定工具
-    model_with_tools = (prompt | llm.bind_tools(tools))
-    response = model_with_tools.invoke({"input": state["messages"]})
+with profiler.phase("startup: bind_tools (tool schemas)"):
+    model_with_tools = llm.bind_tools(tools)
+
+
+# 快速路由: 查时间、汇率换算、日期计算、纯算式这类问题直接调用工具回答, 不经过 LLM (见 fast_path.py)
+fast_path = FastPathRouter(tools)
+
+
+def fast_path_node(state: AgentState):
+    """能直接回答时写入 tool call、工具结果与回答, 否则不做修改"""
+    return fast_path.route(state["messages"]) or {}
+
+
+# agent 节点
+def agent_node(state: AgentState):
+    """Agent节点，决定是否调用工具"""
+    with profiler.phase("step: format prompt"):
+        prompt_value = prompt.invoke({"input": state["messages"]})
+    with profiler.phase("step: llm call"):
+        response = model_with_tools.invoke(prompt_value)
     return {"messages": [response]}
 
 
@@ -204,6 +246,7 @@ def agent_node(state: AgentState):
 
 builder = StateGraph(AgentState)
 
+builder.add_node("fast_path", fast_path_node)
 builder.add_node("agent", agent_node)
 builder.add_node("tools", tool_node)
 
@@ -217,8 +260,17 @@ def should_continue(state: AgentState):
 builder.add_conditional_edges("agent", should_continue, {"tools": "tools", END: END})
 builder.add_edge("tools", "agent")
 
-builder.set_entry_point("agent")
-memory = InMemorySaver()
+# 快速路由已经回答时直接结束, 否则交给 agent
+def after_fast_path(state: AgentState):
+    msg = state["messages"][-1]
+    if isinstance(msg, AIMessage) and not msg.tool_calls:
+        return END
+    return "agent"
+
+builder.add_conditional_edges("fast_path", after_fast_path, {"agent": "agent", END: END})
+
+builder.set_entry_point("fast_path")
+memory = get_checkpointer()
 graph = builder.compile(checkpointer=memory)
 
 
@@ -255,6 +307,11 @@ if __name__ == "__main__":
     while True:
         user_input = input("\n👤 你: ")
         if user_input.lower() in ["exit", "quit"]:
+            print(tool_cache.report())
+            print(profiler.report())
+            print(fast_path.stats)
+            if (cache := get_llm_cache()) is not None:
+                print(cache.stats)
             break
 
         events = graph.stream(
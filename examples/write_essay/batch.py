@@ -0,0 +1,234 @@
+"""write_essay 批量运行: 从 JSONL 读取输入, 并发生成文章, 结果逐行写入输出 JSONL
+
+输入每行一个 json 对象, 字段均可选:
+    {"id": "0001", "title": "春日里的希望", "keywords": ["春天", "花开", "阳光", "微风", "希望"]}
+- 没有 id 时使用行号
+- 给定 title / keywords 时跳过对应的生成节点
+
+输出按完成顺序 (而不是输入顺序) 每完成一篇写一行:
+    {"id", "title", "keywords", "article", "valid", "attempts", "tokens": {"input", "output", "total"}}
+    失败时为 {"id", "error"}
+
+token 用量来自各次 LLM 调用的 usage_metadata (流式调用在最后一个 chunk 中给出).
+字数超限而中途停止的流式候选稿收不到最后一个 chunk, 其 token 不计入, 所以 tokens/min 偏低.
+
+断点续跑: 输出文件本身就是进度记录, 每行写入后都会 flush + fsync. 用同样的命令重新运行时,
+已有成功结果的 id 直接跳过, 失败过的 id 默认重试 (--skip-failed 则跳过). 进程崩溃时最后一行可能只写了一半, 读取时忽略.
+
+并发与限流:
+- --concurrency: 同时运行的 graph 数 (graph.batch_as_completed 的 max_concurrency)
+- --rps / --burst: LLM 请求的令牌桶限流 (langchain 的 InMemoryRateLimiter), 挂在所有任务共享的 llm 上;
+  命中 LLM 缓存的请求不消耗令牌
+- --async: 使用 async_graph (并行生成候选稿) + abatch_as_completed
+
+用法:
+    python examples/write_essay/batch.py inputs.jsonl -o essays.jsonl --concurrency 16 --rps 5
+    LLM_BACKEND=mock python examples/write_essay/batch.py inputs.jsonl -o essays.jsonl --async
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TextIO
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import graph as essay  # noqa: E402
+
+
+def load_inputs(path: str) -> list[tuple[str, dict]]:
+    items = []
+    seen = set()
+    with open(path, encoding="utf-8") as fr:
+        for lineno, line in enumerate(fr, 1):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            item_id = str(data.get("id", lineno))
+            if item_id in seen:
+                raise ValueError(f"{path}:{lineno}: duplicate id {item_id!r}")
+            seen.add(item_id)
+            items.append((item_id, data))
+    return items
+
+
+def load_progress(path: str) -> tuple[set[str], set[str]]:
+    """返回 (已成功的 id, 只失败过的 id)"""
+    done, failed = set(), set()
+    if not os.path.exists(path):
+        return done, failed
+    # 按字节读取: 写了一半的行可能断在一个多字节字符的中间, 按文本读取会在解码时出错
+    with open(path, "rb") as fr:
+        for line in fr:
+            try:
+                record = json.loads(line.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                continue  # 崩溃时写了一半的行
+            (failed if "error" in record else done).add(record["id"])
+    return done, failed - done
+
+
+def open_output(path: str) -> TextIO:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # 上次崩溃留下的半行没有换行符, 先补上, 避免和新写入的记录粘在一起;
+    # 按字节检查最后一个字节, 半行可能断在多字节字符的中间
+    with open(path, "ab+") as fb:
+        if fb.tell() > 0:
+            fb.seek(-1, os.SEEK_END)
+            if fb.read(1) != b"\n":
+                fb.write(b"\n")
+    return open(path, "a", encoding="utf-8")
+
+
+def make_state(data: dict) -> essay.ArticleState:
+    return {
+        "title": data.get("title", ""),
+        "keywords": data.get("keywords", []),
+        "article": "",
+        "valid": False,
+        "attempts": 0,
+        "history": [],
+    }
+
+
+def _token_usage(handler: UsageMetadataCallbackHandler) -> dict[str, int]:
+    usage = {"input": 0, "output": 0, "total": 0}
+    for metadata in handler.usage_metadata.values():
+        usage["input"] += metadata.get("input_tokens", 0)
+        usage["output"] += metadata.get("output_tokens", 0)
+        usage["total"] += metadata.get("total_tokens", 0)
+    return usage
+
+
+@dataclass
+class BatchStats:
+    completed: int = 0
+    valid: int = 0
+    failed: int = 0
+    skipped: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        minutes = self.elapsed / 60 or float("inf")
+        tokens = self.input_tokens + self.output_tokens
+        return (
+            f"完成 {self.completed} 篇 (合格 {self.valid}), 失败 {self.failed}, 跳过 {self.skipped}, "
+            f"用时 {self.elapsed:.1f}s\n"
+            f"essays/min: {self.completed / minutes:.1f}, tokens/min: {tokens / minutes:.0f} "
+            f"(输入 {self.input_tokens}, 输出 {self.output_tokens}; 不含中途停止的流式候选稿)"
+        )
+
+
+class BatchRunner:
+    def __init__(self, items: list[tuple[str, dict]], output: TextIO, concurrency: int, n_candidates: int):
+        self.items = items
+        self.output = output
+        self.concurrency = concurrency
+        self.n_candidates = n_candidates
+        self.handlers = [UsageMetadataCallbackHandler() for _ in items]
+        self.stats = BatchStats()
+
+    def configs(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "max_concurrency": self.concurrency,
+                "callbacks": [handler],
+                "configurable": {"n_candidates": self.n_candidates},
+            }
+            for handler in self.handlers
+        ]
+
+    def on_result(self, index: int, output: dict | Exception) -> None:
+        item_id, _ = self.items[index]
+        usage = _token_usage(self.handlers[index])
+        self.stats.input_tokens += usage["input"]
+        self.stats.output_tokens += usage["output"]
+        if isinstance(output, Exception):
+            self.stats.failed += 1
+            record = {"id": item_id, "error": repr(output)}
+        else:
+            self.stats.completed += 1
+            self.stats.valid += bool(output["valid"])
+            record = {
+                "id": item_id,
+                "title": output["title"],
+                "keywords": output["keywords"],
+                "article": output["article"],
+                "valid": output["valid"],
+                "attempts": output["attempts"],
+                "tokens": usage,
+            }
+        self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.output.flush()
+        os.fsync(self.output.fileno())
+
+        finished = self.stats.completed + self.stats.failed
+        status = f"error: {record['error']}" if "error" in record else f"valid={record['valid']}"
+        print(f"[{finished}/{len(self.items)}] {item_id} {status}", file=sys.stderr)
+
+    def run(self) -> None:
+        inputs = [make_state(data) for _, data in self.items]
+        for index, output in essay.graph.batch_as_completed(inputs, self.configs(), return_exceptions=True):
+            self.on_result(index, output)
+
+    async def arun(self) -> None:
+        inputs = [make_state(data) for _, data in self.items]
+        async for index, output in essay.async_graph.abatch_as_completed(
+            inputs, self.configs(), return_exceptions=True
+        ):
+            self.on_result(index, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", help="输入 JSONL")
+    parser.add_argument("-o", "--output", required=True, help="输出 JSONL, 同时作为断点续跑的进度记录")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时运行的 graph 数")
+    parser.add_argument("--rps", type=float, default=0, help="每秒最多发出的 LLM 请求数, 0 表示不限流")
+    parser.add_argument("--burst", type=int, default=1, help="令牌桶容量, 即允许的突发请求数")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="使用 async_graph")
+    parser.add_argument("--n-candidates", type=int, default=essay.MAX_ATTEMPTS, help="--async 时每篇的候选稿数")
+    parser.add_argument("--skip-failed", action="store_true", help="不重试之前失败的输入")
+    args = parser.parse_args()
+
+    if args.rps > 0:
+        essay.llm.rate_limiter = InMemoryRateLimiter(
+            requests_per_second=args.rps, check_every_n_seconds=min(0.1, 1 / args.rps), max_bucket_size=args.burst
+        )
+
+    items = load_inputs(args.inputs)
+    done, failed = load_progress(args.output)
+    skip = done | failed if args.skip_failed else done
+    pending = [(item_id, data) for item_id, data in items if item_id not in skip]
+    print(
+        f"{len(items)} 个输入, 已完成 {len(done)}, 之前失败 {len(failed)}, 本次运行 {len(pending)}",
+        file=sys.stderr,
+    )
+
+    with open_output(args.output) as fw:
+        runner = BatchRunner(pending, fw, args.concurrency, args.n_candidates)
+        runner.stats.skipped = len(items) - len(pending)
+        start = time.perf_counter()
+        try:
+            if args.use_async:
+                asyncio.run(runner.arun())
+            else:
+                runner.run()
+        finally:
+            runner.stats.elapsed = time.perf_counter() - start
+            print(runner.stats)
+            if (cache := essay.get_llm_cache()) is not None:
+                print(cache.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,21 +20,27 @@ builder = StateGraph(...)
 graph = builder.compiler()
 """
 
+import asyncio
+import copy
+from contextlib import aclosing, closing
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import AIMessage
 from typing import TypedDict, List, Dict, Any
-from langchain_openai import ChatOpenAI
 
 from dotenv import load_dotenv
-import os
-from langchain_openai import ChatOpenAI
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 使 examples/common 可导入
+from common.llm import create_chat_model
+from common.llm_cache import get_llm_cache, streamed_call
+from streaming_check import StreamingArticleChecker
 load_dotenv()
 
 provider = "WILDCARD"
 model = "gpt-5-mini"
-base_url = os.environ[f"{provider}_BASE_URL"]
-api_key = os.environ[f"{provider}_API_KEY"]
-llm = ChatOpenAI(model=model, base_url=base_url, api_key=api_key)
+# 流式输出时也返回 token 用量 (batch.py 据此统计 tokens/min)
+llm = create_chat_model(provider, model, stream_usage=True)
 
 
 # === 定义状态 ===
@@ -48,6 +54,8 @@ class ArticleState(TypedDict):
 
 # === 节点1: 生成标题 ===
 def generate_title(state: ArticleState):
+    if state.get("title"):  # 批量运行时可以直接给定标题
+        return {}
     prompt = "请生成一个有创意的中文文章标题。"
     resp = llm.invoke(prompt)
     title = resp.content.strip()
@@ -55,6 +63,8 @@ def generate_title(state: ArticleState):
 
 # === 节点2: 生成关键词 ===
 def generate_keywords(state: ArticleState):
+    if state.get("keywords"):
+        return {}
     prompt = f"请为标题《{state['title']}》生成5个相关关键词，并以JSON数组格式输出，例如：[\"关键词1\", \"关键词2\", ...]"
     resp = llm.invoke(prompt)
     import json, re
@@ -68,45 +78,74 @@ def generate_keywords(state: ArticleState):
     return {"keywords": keywords}
 
 # === 节点3: 生成文章 ===
-def generate_article(state: ArticleState):
-    title = state["title"]
-    keywords = state["keywords"]
-    prompt = f"""请根据标题《{title}》和以下关键词:
+MAX_ATTEMPTS = 3
+MIN_WORDS, MAX_WORDS = 200, 250
+MIN_KEYWORD_COUNT = 3
+
+
+def build_article_prompt(title: str, keywords: List[str]) -> str:
+    return f"""请根据标题《{title}》和以下关键词:
 {keywords}
 写一篇200-250字的中文文章，每个关键词至少出现3次。
 """
-    resp = llm.invoke(prompt)
-    article = resp.content.strip()
+
+
+def draft_llm(attempt: int):
+    # 每次尝试的提示词相同, 用不同的 seed 区分, 否则开启 LLM 缓存后重写会拿到同一篇文章
+    return llm.bind(seed=attempt)
+
+
+def new_checker(keywords: List[str]) -> StreamingArticleChecker:
+    return StreamingArticleChecker(keywords, MIN_WORDS, MAX_WORDS, MIN_KEYWORD_COUNT)
+
+
+# 流式生成, 边生成边检查 (见 streaming_check.py), 字数一旦超过上限就停止生成
+# 流式调用不经过 LLM 缓存: 开启缓存时先查缓存 (命中的文章同样交给 checker 检查), 完整生成的文章写回缓存
+def generate_article(state: ArticleState):
+    attempt = state.get("attempts", 0) + 1
+    prompt = build_article_prompt(state["title"], state["keywords"])
+    checker = new_checker(state["keywords"])
+    cached = streamed_call(draft_llm(attempt), prompt)
+    if cached is not None and (text := cached.lookup()) is not None:
+        checker.feed(text)
+    else:
+        with closing(draft_llm(attempt).stream(prompt)) as stream:
+            for chunk in stream:
+                if not checker.feed(chunk.content):
+                    break
+        if cached is not None and not checker.exceeded:
+            cached.update("".join(checker.chunks))
+    article = checker.text
     new_history = state.get("history", [])
-    new_history.append({"attempt": state.get("attempts", 0) + 1, "article": article})
-    return {"article": article, "attempts": state.get("attempts", 0) + 1, "history": new_history}
+    new_history.append({"attempt": attempt, "article": article, **checker.result(), "aborted": checker.exceeded})
+    return {"article": article, "attempts": attempt, "history": new_history}
 
 # === 节点4: 检查文章 ===
-def check_article(state: ArticleState):
-    article = state["article"]
-    keywords = state["keywords"]
-
+def evaluate_article(article: str, keywords: List[str]) -> Dict[str, Any]:
     # 检查字数
     word_count = len(article)
-    word_ok = 200 <= word_count <= 250
+    word_ok = MIN_WORDS <= word_count <= MAX_WORDS
 
     # 检查关键词次数
-    keyword_ok = all(article.count(k) >= 3 for k in keywords)
+    keyword_check = {k: article.count(k) for k in keywords}
+    keyword_ok = all(count >= MIN_KEYWORD_COUNT for count in keyword_check.values())
 
-    valid = word_ok and keyword_ok
+    return {"valid": word_ok and keyword_ok, "word_count": word_count, "keyword_check": keyword_check}
 
+
+def check_article(state: ArticleState):
     new_history = state["history"]
-    new_history[-1]["valid"] = valid
-    new_history[-1]["word_count"] = word_count
-    new_history[-1]["keyword_check"] = {k: article.count(k) for k in keywords}
+    # 流式生成时 generate_article 已经完成了检查, 这里直接使用其结果
+    if "valid" not in new_history[-1]:
+        new_history[-1].update(evaluate_article(state["article"], state["keywords"]))
 
-    return {"valid": valid, "history": new_history}
+    return {"valid": new_history[-1]["valid"], "history": new_history}
 
 # === 条件边函数 ===
 def need_rewrite(state: ArticleState) -> str:
     if state["valid"]:
         return "pass"
-    elif state["attempts"] >= 3:
+    elif state["attempts"] >= MAX_ATTEMPTS:
         return "fail"
     else:
         return "retry"
@@ -138,6 +177,115 @@ builder.add_conditional_edges(
 
 graph = builder.compile()
 
+
+# === 异步版本: 同时生成多份候选稿, 取最先通过检查的一份 ===
+# 同步版本最坏情况要串行等待 3 次 LLM 调用, 这里并发发出 n_candidates 份请求,
+# 每份返回后立即检查, 第一份合格的文章胜出, 其余仍在生成的请求被取消, 最坏耗时约为 1 次 LLM 调用.
+# 使用方式: await async_graph.ainvoke(state, {"configurable": {"n_candidates": 3}}), 或 astream
+async def generate_article_candidates(state: ArticleState, config: RunnableConfig):
+    n_candidates = config.get("configurable", {}).get("n_candidates", MAX_ATTEMPTS)
+    prompt = build_article_prompt(state["title"], state["keywords"])
+    first_attempt = state.get("attempts", 0) + 1
+    attempts = range(first_attempt, first_attempt + n_candidates)
+    cached = {attempt: streamed_call(draft_llm(attempt), prompt) for attempt in attempts}
+
+    def record_of(attempt: int, checker: StreamingArticleChecker) -> Dict[str, Any]:
+        return {"attempt": attempt, "article": checker.text, **checker.result(), "aborted": checker.exceeded}
+
+    async def draft(attempt: int) -> Dict[str, Any]:
+        checker = new_checker(state["keywords"])
+        try:
+            async with aclosing(draft_llm(attempt).astream(prompt)) as stream:
+                async for chunk in stream:
+                    if not checker.feed(chunk.content):
+                        break
+            if cached[attempt] is not None and not checker.exceeded:
+                await cached[attempt].aupdate("".join(checker.chunks))
+        except Exception as e:
+            return {"attempt": attempt, "article": checker.text, "valid": False, "error": repr(e)}
+        return record_of(attempt, checker)
+
+    # 流式调用不经过 LLM 缓存: 先查缓存, 命中的候选稿直接检查, 其中已有合格的就不再发出请求
+    records = []
+    for attempt in attempts:
+        if cached[attempt] is not None and (text := await cached[attempt].alookup()) is not None:
+            checker = new_checker(state["keywords"])
+            checker.feed(text)
+            records.append(record_of(attempt, checker))
+    chosen = next((r for r in records if r["valid"]), None)
+    hits = {r["attempt"] for r in records}
+    tasks = {} if chosen else {
+        asyncio.create_task(draft(attempt)): attempt for attempt in attempts if attempt not in hits
+    }
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            record = await next_done
+            records.append(record)
+            if record["valid"]:
+                chosen = record
+                break
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    # 选中之后, 已完成但还没从 as_completed 取出的候选稿 (以及被取消前恰好完成的) 也要记录
+    recorded = {r["attempt"] for r in records}
+    for task, attempt in tasks.items():
+        if attempt not in recorded:
+            records.append({"attempt": attempt, "cancelled": True} if task.cancelled() else task.result())
+    if chosen is None:
+        # 都不合格时取最后完成的一份 (records 按完成顺序排列)
+        chosen = next((r for r in reversed(records) if "article" in r), {"article": "", "valid": False})
+    return {
+        "article": chosen["article"],
+        "valid": chosen["valid"],
+        "attempts": first_attempt - 1 + sum(not r.get("cancelled") for r in records),
+        "history": state.get("history", []) + sorted(records, key=lambda r: r["attempt"]),
+    }
+
+
+async_builder = StateGraph(ArticleState)
+
+async_builder.add_node("生成标题", generate_title)
+async_builder.add_node("生成关键词", generate_keywords)
+async_builder.add_node("并行生成文章", generate_article_candidates)
+
+async_builder.add_edge(START, "生成标题")
+async_builder.add_edge("生成标题", "生成关键词")
+async_builder.add_edge("生成关键词", "并行生成文章")
+async_builder.add_edge("并行生成文章", END)
+
+async_graph = async_builder.compile()
+
+
+def _check_cache(state: ArticleState):
+    """自检: 开启 LLM 缓存时 (如 LLM_BACKEND=mock LLM_CACHE=true), 重复运行同样的输入不再调用 LLM 写文章"""
+    assert get_llm_cache() is not None, "需要开启 LLM 缓存 (LLM_CACHE=true)"
+    backend = llm.backend  # 只支持 mock 模型, 在 backend 上统计写文章的调用次数
+    calls = []
+    respond = backend.respond
+
+    def counting_respond(messages, *args, **kwargs):
+        if "写一篇" in str(messages[-1]["content"]):
+            calls.append(1)
+        return respond(messages, *args, **kwargs)
+
+    backend.respond = counting_respond
+    for name, run in [
+        ("sync", lambda: graph.invoke(copy.deepcopy(state))),
+        ("async", lambda: asyncio.run(async_graph.ainvoke(copy.deepcopy(state)))),
+    ]:
+        first = run()
+        calls.clear()
+        second = run()
+        assert not calls, f"{name}: 第二次运行仍调用了 {len(calls)} 次 LLM 写文章"
+        assert second["article"] == first["article"], name
+        print(f"{name}: ok, 第二次运行命中缓存, 文章相同")
+    print(get_llm_cache().stats)
+
+
 # === 运行 ===
 if __name__ == "__main__":
     initial_state: ArticleState = {
@@ -150,7 +298,13 @@ if __name__ == "__main__":
     }
     # with open("graph.png", "wb") as fw: 
     #     fw.write(graph.get_graph().draw_mermaid_png())
-    result = graph.invoke(initial_state)
+    if "--check-cache" in sys.argv:
+        _check_cache(initial_state)
+        sys.exit()
+    if "--async" in sys.argv:
+        result = asyncio.run(async_graph.ainvoke(initial_state))
+    else:
+        result = graph.invoke(initial_state)
     print("==== 最终结果 ====")
     print(f"标题: {result['title']}")
     print(f"关键词: {result['keywords']}")
@@ -160,3 +314,5 @@ if __name__ == "__main__":
     print("历史记录:")
     for h in result["history"]:
         print(h)
+    if (cache := get_llm_cache()) is not None:
+        print(cache.stats)
@@ -0,0 +1,119 @@
+"""流式文章检查: 边接收 llm.stream 的 token 边统计字数和关键词次数
+
+check_article 需要等整篇文章生成完, 再对每个关键词做一遍 article.count(k).
+这里把所有关键词构建成一个 Aho–Corasick 自动机, 每个字符只处理一次, 同时统计所有关键词的出现次数;
+字数也在线累计. 一旦 (去掉首尾空白后的) 字数超过上限, 这篇文章必然不合格, 可以立即停止生成, 节省 token 和时间.
+
+统计结果与 check_article 完全一致:
+- 字数等于 len(article.strip())
+- 关键词次数等于 article.count(k), 即同一个关键词不重叠计数
+"""
+
+from collections import deque
+from typing import Any, Dict, List
+
+
+class AhoCorasick:
+    """多模式串匹配自动机, 支持跨 chunk 的流式输入"""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = [p for p in dict.fromkeys(patterns) if p]
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]  # 每个状态命中的模式串下标 (含 fail 链上的)
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = nxt
+            self.output[state].append(index)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def step(self, state: int, ch: str) -> int:
+        while state and ch not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(ch, 0)
+
+
+class StreamingArticleChecker:
+    """用法:
+        checker = StreamingArticleChecker(keywords)
+        for chunk in llm.stream(prompt):
+            if not checker.feed(chunk.content):
+                break  # 已超出字数上限, 提前结束生成
+        checker.result()  # 与 evaluate_article 返回格式相同
+    """
+
+    def __init__(self, keywords: List[str], min_length: int = 200, max_length: int = 250, min_count: int = 3):
+        self.keywords = list(keywords)
+        self.min_length = min_length
+        self.max_length = max_length
+        self.min_count = min_count
+        self.automaton = AhoCorasick(self.keywords)
+        self.counts = [0] * len(self.automaton.patterns)
+        self._last_end = [0] * len(self.automaton.patterns)  # 每个关键词上一次计数的结束位置, 用于不重叠计数
+        self._state = 0
+        self._pos = 0  # 去掉开头空白后的字符位置
+        self._length = 0  # 去掉首尾空白后的长度
+        self._started = False
+        self.chunks: List[str] = []
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def exceeded(self) -> bool:
+        return self._length > self.max_length
+
+    def feed(self, text: Any) -> bool:
+        """输入一个 chunk, 返回 False 表示已超出字数上限"""
+        if not isinstance(text, str) or not text:
+            return not self.exceeded
+        self.chunks.append(text)
+        automaton = self.automaton
+        for ch in text:
+            if not self._started:
+                if ch.isspace():
+                    continue
+                self._started = True
+            self._pos += 1
+            if not ch.isspace():
+                self._length = self._pos
+            self._state = automaton.step(self._state, ch)
+            for index in automaton.output[self._state]:
+                start = self._pos - len(automaton.patterns[index])
+                if start >= self._last_end[index]:
+                    self.counts[index] += 1
+                    self._last_end[index] = self._pos
+        return not self.exceeded
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks).strip()
+
+    def result(self) -> Dict[str, Any]:
+        by_pattern = dict(zip(self.automaton.patterns, self.counts))
+        keyword_check = {k: by_pattern.get(k, 0) for k in self.keywords}
+        valid = (
+            not self.exceeded
+            and self.min_length <= self._length <= self.max_length
+            and all(count >= self.min_count for count in keyword_check.values())
+        )
+        return {"valid": valid, "word_count": self._length, "keyword_check": keyword_check}